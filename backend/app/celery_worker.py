@@ -1,4 +1,6 @@
+import time
 from celery import Celery
+from celery.signals import before_task_publish
 from .config import settings
 
 celery_app = Celery(
@@ -9,7 +11,9 @@ celery_app = Celery(
         "app.workers.checker",
         "app.workers.mailer",
         "app.workers.email_batch",
-        "app.workers.cleanup"
+        "app.workers.webhooks",
+        "app.workers.cleanup",
+        "app.workers.metrics"
     ]
 )
 
@@ -59,11 +63,17 @@ celery_app.conf.beat_schedule = {
         'schedule': 3600.0,  # 60 minutes in seconds
         'args': (60,)
     },
-    # Process email queue every 10 minutes (reduce Redis load)
+    # Safety-net poll of the email queue (new alerts and due retries wake the dispatcher directly)
     'process-email-batch': {
-        'task': 'app.workers.email_batch.process_email_batch',
-        'schedule': 60.0, # Every 1.5 minutes to reduce Redis requests
-        'args': (7,)  # Increase batch size to maintain throughput
+        'task': 'app.workers.email_batch.dispatch_email_batches',
+        'schedule': settings.EMAIL_POLL_INTERVAL_SECONDS,
+        'args': (settings.EMAIL_BATCH_SIZE,)  # Sends are paced by the provider rate limiter
+    },
+    # Webhook deliveries are woken on queue; the poll picks up retries and stragglers
+    'process-webhook-deliveries': {
+        'task': 'app.workers.webhooks.process_webhook_deliveries',
+        'schedule': settings.WEBHOOK_POLL_INTERVAL_SECONDS,
+        'args': (settings.WEBHOOK_BATCH_SIZE,)
     },
     # Weekly data cleanup (every Sunday at 2 AM UTC)
     'weekly-data-cleanup': {
@@ -71,4 +81,10 @@ celery_app.conf.beat_schedule = {
     'schedule': 604800.0,  # 7 days in seconds  
     'args': ()
 },
-}
\ No newline at end of file
+}
+
+@before_task_publish.connect
+def _stamp_published_at(headers=None, **kwargs):
+    """Record publish time so tasks (e.g. check sweeps) can measure how long they waited"""
+    if headers is not None:
+        headers.setdefault('published_at', time.time())
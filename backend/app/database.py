@@ -1,24 +1,102 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 import logging
 from .config import settings
 from .models import Base
+from .utils.metrics import instrument_engine, timed_pool_class
 
 logger = logging.getLogger(__name__)
 
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,        
-    pool_recycle=300          
+    pool_recycle=300,
+    poolclass=timed_pool_class(QueuePool, "sync")
 )
+instrument_engine(engine, "sync")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine used by the FastAPI routes so DB round trips don't block the event loop
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    pool_recycle=300,
+    poolclass=timed_pool_class(AsyncAdaptedQueuePool, "async")
+)
+instrument_engine(async_engine.sync_engine, "async")
+
+# expire_on_commit=False keeps loaded attributes usable after commit without lazy IO
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+# create_all only creates missing tables, so columns and indexes added to existing
+# tables are applied here. Every statement must be idempotent, it runs on each startup.
+SCHEMA_UPGRADES = [
+    # Alert dedup key (email_queue.dedup_key)
+    "ALTER TABLE email_queue ADD COLUMN IF NOT EXISTS dedup_key VARCHAR",
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_email_queue_dedup_key ON email_queue (dedup_key) "
+    "WHERE dedup_key IS NOT NULL AND status <> 'failed'",
+    # SKIP LOCKED claims and lease reaping
+    "ALTER TABLE email_queue ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMPTZ",
+    "CREATE INDEX IF NOT EXISTS ix_email_queue_pending_scheduled ON email_queue (scheduled_at) "
+    "WHERE status = 'pending'",
+    "CREATE INDEX IF NOT EXISTS ix_email_queue_processing_claimed ON email_queue (claimed_at) "
+    "WHERE status = 'processing'",
+    # Template references instead of rendered bodies
+    "ALTER TABLE email_queue ADD COLUMN IF NOT EXISTS template_id VARCHAR",
+    "ALTER TABLE email_queue ADD COLUMN IF NOT EXISTS template_params JSONB",
+    "ALTER TABLE email_queue ALTER COLUMN html_content DROP NOT NULL",
+    "ALTER TABLE email_queue ALTER COLUMN text_content DROP NOT NULL",
+    # Alert digests
+    "ALTER TABLE email_queue ADD COLUMN IF NOT EXISTS digest_id UUID",
+    "CREATE INDEX IF NOT EXISTS ix_email_queue_user_created ON email_queue (user_id, created_at)",
+    # Alert latency stages
+    "ALTER TABLE email_queue ADD COLUMN IF NOT EXISTS probe_completed_at TIMESTAMPTZ",
+    "ALTER TABLE email_queue ADD COLUMN IF NOT EXISTS status_committed_at TIMESTAMPTZ",
+    "ALTER TABLE email_queue ADD COLUMN IF NOT EXISTS first_claimed_at TIMESTAMPTZ",
+    # Check lag
+    "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS last_checked_at TIMESTAMPTZ",
+    # Shared probes
+    "ALTER TABLE sweep_runs ADD COLUMN IF NOT EXISTS probes_sent INTEGER DEFAULT 0",
+    # Per-phase probe timings
+    "ALTER TABLE health_logs ADD COLUMN IF NOT EXISTS phase_timings INTEGER[]",
+    "ALTER TABLE health_log_spans ADD COLUMN IF NOT EXISTS phase_timing_sums FLOAT[]",
+    "ALTER TABLE health_log_spans ADD COLUMN IF NOT EXISTS phase_timing_count INTEGER NOT NULL DEFAULT 0",
+    # Streamed probe body size
+    "ALTER TABLE health_logs ADD COLUMN IF NOT EXISTS bytes_read INTEGER",
+    # Content assertions
+    "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS assertions JSONB",
+    # Pending confirmation re-checks
+    "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS confirmation_due_at TIMESTAMPTZ",
+    # Aggregate-only health log spans (per-check arrays dropped)
+    "ALTER TABLE health_log_spans DROP COLUMN IF EXISTS check_times",
+    "ALTER TABLE health_log_spans DROP COLUMN IF EXISTS response_times",
+    # Hourly, gapless health log spans (unused latency aggregates dropped)
+    "ALTER TABLE health_log_spans ADD COLUMN IF NOT EXISTS interval_minutes INTEGER",
+    "ALTER TABLE health_log_spans DROP COLUMN IF EXISTS response_time_sum_sq",
+    "ALTER TABLE health_log_spans DROP COLUMN IF EXISTS response_time_min",
+    "ALTER TABLE health_log_spans DROP COLUMN IF EXISTS response_time_max",
+]
+
+def upgrade_schema():
+    """Apply SCHEMA_UPGRADES to an existing database in one transaction"""
+    with engine.begin() as conn:
+        for statement in SCHEMA_UPGRADES:
+            conn.exec_driver_sql(statement)
+
 def create_tables():
-    """Create tables if they don't exist"""
+    """Create tables if they don't exist and upgrade existing ones"""
     try:
         # Create any missing tables based on current models
         Base.metadata.create_all(bind=engine)
+        upgrade_schema()
         logger.info("Database tables checked/created successfully")
     except Exception as e:
         logger.error(f"Error creating tables: {e}")
@@ -29,4 +107,8 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,68 @@
+"""
+Email send throughput benchmark against the fake Resend API
+
+    python -m app.email.fake_resend --port 9010 --rate-limit 2 --latency-ms 80
+    python -m app.email.bench --url http://localhost:9010 --messages 4000 --dispatchers 4
+
+Starts --dispatchers processes that each send their share of --messages
+through ResendTransport, like parallel process_email_batch tasks, and
+prints emails per second and how many requests the provider rate limited.
+The dispatchers draw from the shared rate limit in DATABASE_URL, so the
+expected ceiling is RESEND_RATE_LIMIT_PER_SECOND × RESEND_BATCH_MAX emails
+per second with no 429s.
+"""
+import argparse
+import asyncio
+import json
+import time
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+
+from ..config import settings
+
+def _dispatch(url: str, count: int) -> tuple:
+    """Send `count` messages; returns (sent, wall clock start, wall clock end) of the sends"""
+    from .transports import ResendTransport
+
+    async def send():
+        transport = ResendTransport(api_key="bench-api-key", base_url=url)
+        messages = [
+            {'from': 'bench@pingdaemon.local', 'to': [f"user{i}@example.com"], 'subject': 'bench', 'text': 'bench'}
+            for i in range(count)
+        ]
+        try:
+            started_at = time.time()
+            results = await transport.send_many(messages)
+            return sum(1 for result in results if result['success']), started_at, time.time()
+        finally:
+            await transport.close()
+
+    return asyncio.run(send())
+
+def _stats(url: str) -> dict:
+    with urllib.request.urlopen(f"{url.rstrip('/')}/stats") as response:
+        return json.load(response)
+
+def main():
+    parser = argparse.ArgumentParser(description="Email send throughput benchmark")
+    parser.add_argument("--url", default="http://127.0.0.1:9010")
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--dispatchers", type=int, default=settings.EMAIL_DISPATCHERS)
+    args = parser.parse_args()
+
+    before = _stats(args.url)
+    shares = [args.messages // args.dispatchers + (i < args.messages % args.dispatchers) for i in range(args.dispatchers)]
+    with ProcessPoolExecutor(args.dispatchers) as pool:
+        runs = list(pool.map(_dispatch, [args.url] * args.dispatchers, shares))
+    # From the first send to the last response, leaving out process start-up
+    sent = sum(run[0] for run in runs)
+    elapsed = max(run[2] for run in runs) - min(run[1] for run in runs)
+    after = _stats(args.url)
+
+    ceiling = settings.RESEND_RATE_LIMIT_PER_SECOND * settings.RESEND_BATCH_MAX
+    print(f"📊 {sent}/{args.messages} emails sent by {args.dispatchers} dispatchers in {elapsed:.2f}s")
+    print(f"   {sent / elapsed:.1f} emails/s (rate limit ceiling {ceiling:.0f}/s)")
+    print(f"   {after['requests'] - before['requests']} requests, {after['rate_limited'] - before['rate_limited']} rate limited (429)")
+
+if __name__ == "__main__":
+    main()
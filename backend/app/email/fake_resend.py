@@ -0,0 +1,172 @@
+"""
+Local stand-in for the Resend API, for testing and benchmarking email dispatch
+
+    python -m app.email.fake_resend --port 9010 --rate-limit 2 --latency-ms 80
+
+Set RESEND_API_URL=http://localhost:9010 (any RESEND_API_KEY) and the sink
+accepts POST /emails and POST /emails/batch like Resend, printing requests
+and emails per second once a second. Like the real API it answers 429 with
+retry-after when an API key goes over --rate-limit requests per second, so
+dispatchers that don't share their budget show up as 429s. --fail-rate
+answers that share of requests with a 500; --lost-rate accepts that share
+and then answers 500 anyway, like a response lost after delivery. An
+Idempotency-Key replays the stored response of an accepted request (409 if
+the payload differs). GET /stats returns the counters.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from uuid import uuid4
+
+_stats = {'requests': 0, 'emails': 0, 'rate_limited': 0, 'failed': 0, 'replayed': 0}
+_stats_lock = threading.Lock()
+
+# Per API key: [tokens, updated_at]
+_buckets = {}
+
+# Per (API key, idempotency key): (payload, response), or None while in progress
+_idempotent = {}
+
+def _take_token(key: str, rate: float) -> bool:
+    now = time.monotonic()
+    with _stats_lock:
+        tokens, updated_at = _buckets.get(key, (rate, now))
+        tokens = min(rate, tokens + (now - updated_at) * rate)
+        allowed = tokens >= 1
+        _buckets[key] = (tokens - 1 if allowed else tokens, now)
+        return allowed
+
+class _FakeResendHandler(BaseHTTPRequestHandler):
+    rate_limit = 0.0
+    latency = 0.0
+    fail_rate = 0.0
+    lost_rate = 0.0
+    verbose = False
+
+    def _reply(self, status: int, body: dict, headers: dict = None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path != "/stats":
+            return self._reply(404, {'message': 'Not found'})
+        with _stats_lock:
+            return self._reply(200, dict(_stats))
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"null")
+        if self.path not in ("/emails", "/emails/batch"):
+            return self._reply(404, {'message': 'Not found'})
+
+        with _stats_lock:
+            _stats['requests'] += 1
+
+        if self.rate_limit and not _take_token(self.headers.get("Authorization", ""), self.rate_limit):
+            with _stats_lock:
+                _stats['rate_limited'] += 1
+            return self._reply(429, {'message': 'Too many requests'}, {'retry-after': '1'})
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if random.random() < self.fail_rate:
+            with _stats_lock:
+                _stats['failed'] += 1
+            return self._reply(500, {'message': 'Internal server error'})
+
+        key = self.headers.get("Idempotency-Key")
+        if key:
+            key = (self.headers.get("Authorization", ""), key)
+            with _stats_lock:
+                stored = _idempotent.get(key, False)
+                if stored is False:
+                    _idempotent[key] = None
+            if stored is None:
+                return self._reply(409, {'name': 'concurrent_idempotent_requests', 'message': 'Request in progress'})
+            if stored:
+                payload, response = stored
+                if payload != body:
+                    return self._reply(409, {'name': 'invalid_idempotent_request', 'message': 'Key used with another payload'})
+                with _stats_lock:
+                    _stats['replayed'] += 1
+                return self._reply(200, response)
+
+        messages = body if self.path == "/emails/batch" else [body]
+        ids = [{'id': str(uuid4())} for _ in messages]
+        response = {'data': ids} if self.path == "/emails/batch" else ids[0]
+        with _stats_lock:
+            _stats['emails'] += len(messages)
+            if key:
+                _idempotent[key] = (body, response)
+        if self.verbose:
+            print(json.dumps({'path': self.path, 'to': [message.get('to') for message in messages]}))
+
+        if random.random() < self.lost_rate:
+            with _stats_lock:
+                _stats['failed'] += 1
+            return self._reply(500, {'message': 'Internal server error'})
+        self._reply(200, response)
+
+    def log_message(self, format, *args):
+        pass
+
+def _report():
+    last_requests = last_emails = 0
+    while True:
+        time.sleep(1)
+        with _stats_lock:
+            stats = dict(_stats)
+        if stats['requests'] != last_requests:
+            print(
+                f"📨 {stats['emails']} emails ({stats['emails'] - last_emails}/s) in {stats['requests']} requests "
+                f"({stats['requests'] - last_requests}/s), {stats['rate_limited']} rate limited, {stats['failed']} failed"
+            )
+            last_requests, last_emails = stats['requests'], stats['emails']
+
+def serve(host: str = "127.0.0.1", port: int = 9010, rate_limit: float = 0.0, latency_ms: float = 0.0,
+          fail_rate: float = 0.0, lost_rate: float = 0.0, verbose: bool = False,
+          report: bool = True) -> ThreadingHTTPServer:
+    """Start the fake API on a background thread and return the server (counters start from zero)"""
+    with _stats_lock:
+        _stats.update(dict.fromkeys(_stats, 0))
+        _buckets.clear()
+        _idempotent.clear()
+    _FakeResendHandler.rate_limit = rate_limit
+    _FakeResendHandler.latency = latency_ms / 1000
+    _FakeResendHandler.fail_rate = fail_rate
+    _FakeResendHandler.lost_rate = lost_rate
+    _FakeResendHandler.verbose = verbose
+
+    if report:
+        threading.Thread(target=_report, daemon=True).start()
+    server = ThreadingHTTPServer((host, port), _FakeResendHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake Resend API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9010)
+    parser.add_argument("--rate-limit", type=float, default=2, help="Requests per second per API key (0: unlimited)")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--fail-rate", type=float, default=0)
+    parser.add_argument("--lost-rate", type=float, default=0, help="Share of accepted requests answered with a 500")
+    parser.add_argument("--verbose", action="store_true", help="Print the recipients of every request")
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, args.rate_limit, args.latency_ms, args.fail_rate, args.lost_rate, args.verbose)
+    print(f"📮 Fake Resend API listening on http://{args.host}:{server.server_address[1]}/")
+    threading.Event().wait()
+
+if __name__ == "__main__":
+    main()
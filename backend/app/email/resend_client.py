@@ -1,20 +1,25 @@
 import logging
-import resend
 from typing import Dict, Any, Optional
 from datetime import datetime
 import html
 from ..config import settings
+from .transports import get_transport, send_message
 
 logger = logging.getLogger(__name__)
 
 class ResendClient:
-    """Resend API client for sending email alerts"""
+    """Client for sending email alerts through the configured email transport"""
     
     def __init__(self):
-        if not settings.RESEND_API_KEY:
-            raise ValueError("Resend API key not configured")
-        
-        resend.api_key = settings.RESEND_API_KEY
+        # Long-lived per-process transport (pooled client, no global API key)
+        self.transport = get_transport()
+    
+    def _send(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Send one message; raises on failure like the provider SDK did"""
+        result = send_message(params, self.transport)
+        if not result['success']:
+            raise Exception(result['error'])
+        return {'id': result.get('message_id')}
     
     def send_alert_email(
         self,
@@ -74,7 +79,7 @@ class ResendClient:
                 "text": text_content,
             }
             
-            email = resend.Emails.send(params)
+            email = self._send(params)
             
             logger.info(f"Alert email sent successfully to {recipient_email}")
             return {
@@ -204,7 +209,7 @@ class ResendClient:
                 "text": text_content,
             }
             
-            email = resend.Emails.send(params)
+            email = self._send(params)
             
             logger.info(f"Password reset email sent successfully to {recipient_email}")
             return {
@@ -330,7 +335,7 @@ class ResendClient:
                 "text": text_content,
             }
             
-            email = resend.Emails.send(params)
+            email = self._send(params)
             
             logger.info(f"Status change email sent successfully to {recipient_email}: {status_text}")
             return {
@@ -0,0 +1,302 @@
+# Email templates rendered at send time from small parameter payloads
+import html
+from functools import lru_cache
+from string import Template
+from typing import Dict, Any, Tuple, Callable
+
+from ..config import settings
+
+STATUS_CHANGE_TEMPLATE = "status_change"
+STATUS_DIGEST_TEMPLATE = "status_digest"
+
+def _compile(source: str) -> Template:
+    """Bake settings into the template once so only per-email fields remain"""
+    return Template(Template(source).safe_substitute(frontend_url=settings.FRONTEND_URL))
+
+_STATUS_CHANGE_HTML = _compile("""
+        <div style="max-width: 600px; margin: 0 auto; font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+            <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0;">
+                <h1 style="margin: 0; font-size: 24px;">Website Monitoring Update</h1>
+                <p style="margin: 10px 0 0; opacity: 0.9;">PingDaemon Monitoring Service</p>
+            </div>
+            
+            <div style="background: white; padding: 40px; border-radius: 0 0 10px 10px; box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);">
+                <div style="text-align: center; margin-bottom: 30px;">
+                    <div style="font-size: 32px; margin-bottom: 10px;">$status_icon</div>
+                    <h2 style="color: $status_color; margin: 0; font-size: 20px;">$status_text</h2>
+                    <p style="margin: 10px 0 0; color: #6c757d;">$intro_text</p>
+                </div>
+                
+                <div style="background: #f8f9fa; padding: 20px; border-radius: 8px; margin: 20px 0;">
+                    <p style="margin: 0 0 10px;"><strong>Website:</strong> <a href="$job_url" style="color: #667eea;">$job_url</a></p>
+                    <p style="margin: 0 0 10px;"><strong>Previous Status:</strong> $previous_status</p>
+                    <p style="margin: 0 0 10px;"><strong>Current Status:</strong> $current_status</p>
+                    <p style="margin: 0 0 10px;"><strong>Check Frequency:</strong> Every $job_interval minutes</p>
+                    <p style="margin: 0;"><strong>Failure Threshold:</strong> $failure_threshold consecutive failures</p>
+                </div>
+                
+                $error_block
+                
+                $started_block
+                
+                $setup_block
+                
+                <div style="text-align: center; margin: 20px 0; padding: 10px; background: #f5f5f5; border-radius: 5px;">
+                    <p style="margin: 0; color: #666; font-size: 12px;">
+                        You're receiving this because you have active monitors on PingDaemon.<br>
+                        <a href="$frontend_url/settings" style="color: #667eea;">Manage notification preferences</a>
+                    </p>
+                </div>
+                
+                <p style="text-align: center; margin: 30px 0 0; color: #6c757d; font-size: 14px;">
+                    Status change detected at $detected_at<br>
+                    <a href="$frontend_url/monitors" style="color: #667eea;">View Dashboard</a>
+                </p>
+            </div>
+        </div>
+        """)
+
+_STATUS_CHANGE_TEXT = _compile("""
+        Website Monitoring Update - PingDaemon
+        
+        $status_icon $status_text
+        
+        $intro_text
+        
+        Website: $job_url
+        Previous Status: $previous_status
+        Current Status: $current_status
+        Check Frequency: Every $job_interval minutes
+        Failure Threshold: $failure_threshold consecutive failures
+        
+        $error_block
+        
+        $started_block
+        
+        $setup_block
+        
+        Status change detected at $detected_at
+        View Dashboard: $frontend_url/monitors
+        
+        You're receiving this because you have active monitors on PingDaemon.
+        Manage preferences: $frontend_url/settings
+        """)
+
+_ERROR_BLOCK_HTML = Template('<div style="background: #fee; padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #f56565;"><p style="margin: 0; color: #c53030;"><strong>Error Details:</strong> $error_message</p></div>')
+_STARTED_BLOCK_HTML = Template('<div style="background: #f0fff4; padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #38a169;"><p style="margin: 0; color: #2f855a;"><strong>Monitoring Started!</strong> We will now check your service every $job_interval minutes and notify you of any changes.</p></div>')
+_SETUP_BLOCK_HTML = '<div style="background: #fff5f5; padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #f56565;"><p style="margin: 0; color: #c53030;"><strong>Monitor Setup Complete</strong> Your monitor is now active, but the initial check detected an issue. Please verify your service is accessible.</p></div>'
+
+_STARTED_BLOCK_TEXT = Template('Monitoring Started! We will now check your service every $job_interval minutes and notify you of any changes.')
+_SETUP_BLOCK_TEXT = 'Monitor Setup Complete: Your monitor is now active, but the initial check detected an issue. Please verify your service is accessible.'
+
+_STATUS_DIGEST_HTML = _compile("""
+        <div style="max-width: 600px; margin: 0 auto; font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+            <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0;">
+                <h1 style="margin: 0; font-size: 24px;">Website Monitoring Update</h1>
+                <p style="margin: 10px 0 0; opacity: 0.9;">PingDaemon Monitoring Service</p>
+            </div>
+            
+            <div style="background: white; padding: 40px; border-radius: 0 0 10px 10px; box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);">
+                <div style="text-align: center; margin-bottom: 30px;">
+                    <h2 style="margin: 0; font-size: 20px;">$alert_count MONITOR UPDATES</h2>
+                    <p style="margin: 10px 0 0; color: #6c757d;">Several of your monitored websites changed status at about the same time.</p>
+                </div>
+                
+                <div style="background: #f8f9fa; padding: 20px; border-radius: 8px; margin: 20px 0;">
+                    $alert_rows
+                </div>
+                
+                <p style="text-align: center; margin: 30px 0 0; color: #6c757d; font-size: 14px;">
+                    Summary sent at $sent_at<br>
+                    <a href="$frontend_url/monitors" style="color: #667eea;">View Dashboard</a>
+                </p>
+            </div>
+        </div>
+        """)
+
+_STATUS_DIGEST_TEXT = _compile("""
+        Website Monitoring Update - PingDaemon
+        
+        $alert_count MONITOR UPDATES
+        
+        Several of your monitored websites changed status at about the same time.
+        
+$alert_rows
+        
+        Summary sent at $sent_at
+        View Dashboard: $frontend_url/monitors
+        
+        You're receiving this because you have active monitors on PingDaemon.
+        Manage preferences: $frontend_url/settings
+        """)
+
+_DIGEST_ROW_HTML = Template('<p style="margin: 0 0 10px;">$status_icon <strong style="color: $status_color;">$status_text</strong> <a href="$job_url" style="color: #667eea;">$job_url</a> <span style="color: #6c757d;">($previous_status → $current_status at $detected_at)</span>$error_detail</p>')
+_DIGEST_ROW_TEXT = Template('        $status_icon $status_text: $job_url ($previous_status → $current_status at $detected_at)$error_detail')
+
+@lru_cache(maxsize=32)
+def get_status_change_variant(previous_status: str, current_status: str) -> Dict[str, str]:
+    """
+    Subject prefix and header of a status transition
+    
+    Handles all possible status transitions including:
+    - unknown → healthy (new monitor success)
+    - unknown → unhealthy (new monitor failure) 
+    - healthy → unhealthy (service went down)
+    - unhealthy → healthy (service restored)
+    """
+    if previous_status == 'unknown' and current_status == 'unhealthy':
+        # New monitor failed its first check
+        return {
+            'subject_prefix': "Monitor Issue",
+            'status_text': "INITIAL CHECK FAILED",
+            'intro_text': "Your website monitoring detected an accessibility issue.",
+            'status_icon': "🚨",  # Red siren for unhealthy
+            'status_color': "#dc3545"  # Bootstrap danger red
+        }
+    if previous_status == 'unknown' and current_status == 'healthy':
+        # New monitor passed its first check
+        return {
+            'subject_prefix': "Monitor Online",
+            'status_text': "MONITOR ACTIVE",
+            'intro_text': "Your website monitoring has been successfully activated.",
+            'status_icon': "✅",  # Green checkmark for healthy
+            'status_color': "#28a745"  # Bootstrap success green
+        }
+    if previous_status == 'healthy' and current_status == 'unhealthy':
+        # Existing healthy service went down
+        return {
+            'subject_prefix': "Service Down",
+            'status_text': "SERVICE DOWN",
+            'intro_text': "Your monitored website is currently experiencing issues.",
+            'status_icon': "🚨",
+            'status_color': "#dc3545"
+        }
+    if previous_status == 'unhealthy' and current_status == 'healthy':
+        # Service recovered from downtime
+        return {
+            'subject_prefix': "Service Restored",
+            'status_text': "SERVICE RESTORED",
+            'intro_text': "Your monitored website has returned to normal operation.",
+            'status_icon': "✅",
+            'status_color': "#28a745"
+        }
+    if current_status == 'healthy':
+        # Any other transition to healthy
+        return {
+            'subject_prefix': "Service Online",
+            'status_text': "SERVICE ONLINE",
+            'intro_text': "Your monitored website is online and healthy.",
+            'status_icon': "✅",
+            'status_color': "#28a745"
+        }
+    if current_status == 'unhealthy':
+        # Any other transition to unhealthy
+        return {
+            'subject_prefix': "Service Down",
+            'status_text': "SERVICE DOWN",
+            'intro_text': "Your monitored website is currently experiencing issues.",
+            'status_icon': "🚨",
+            'status_color': "#dc3545"
+        }
+    # Generic status change fallback
+    return {
+        'subject_prefix': "Status Update",
+        'status_text': f"{previous_status.upper()} TO {current_status.upper()}",
+        'intro_text': "Your monitored website status has changed.",
+        'status_icon': "⚪",  # White circle for unknown
+        'status_color': "#6c757d"  # Bootstrap secondary gray
+    }
+
+def status_change_subject(params: Dict[str, Any]) -> str:
+    variant = get_status_change_variant(params['previous_status'], params['current_status'])
+    return f"{variant['subject_prefix']}: {params['job_url']}"
+
+def render_status_change(params: Dict[str, Any]) -> Tuple[str, str, str]:
+    """Render (subject, html, text) of a status change alert"""
+    previous_status = params['previous_status']
+    current_status = params['current_status']
+    error_message = params.get('error_message')
+    variant = get_status_change_variant(previous_status, current_status)
+    
+    is_new_healthy = previous_status == 'unknown' and current_status == 'healthy'
+    is_new_unhealthy = previous_status == 'unknown' and current_status == 'unhealthy'
+    
+    fields = {
+        'status_icon': variant['status_icon'],
+        'status_color': variant['status_color'],
+        'status_text': variant['status_text'],
+        'intro_text': variant['intro_text'],
+        'previous_status': previous_status.title(),
+        'current_status': current_status.title(),
+        'job_interval': params['job_interval'],
+        'failure_threshold': params['failure_threshold'],
+        'detected_at': params['detected_at']
+    }
+    
+    html_content = _STATUS_CHANGE_HTML.substitute(
+        fields,
+        job_url=html.escape(params['job_url']),
+        error_block=_ERROR_BLOCK_HTML.substitute(error_message=html.escape(error_message)) if error_message else '',
+        started_block=_STARTED_BLOCK_HTML.substitute(job_interval=params['job_interval']) if is_new_healthy else '',
+        setup_block=_SETUP_BLOCK_HTML if is_new_unhealthy else ''
+    )
+    
+    text_content = _STATUS_CHANGE_TEXT.substitute(
+        fields,
+        job_url=params['job_url'],
+        error_block=f'Error Details: {error_message}' if error_message else '',
+        started_block=_STARTED_BLOCK_TEXT.substitute(job_interval=params['job_interval']) if is_new_healthy else '',
+        setup_block=_SETUP_BLOCK_TEXT if is_new_unhealthy else ''
+    )
+    
+    return status_change_subject(params), html_content, text_content
+
+def status_digest_subject(params: Dict[str, Any]) -> str:
+    alerts = params['alerts']
+    down = sum(1 for alert in alerts if alert['current_status'] == 'unhealthy')
+    up = sum(1 for alert in alerts if alert['current_status'] == 'healthy')
+    return f"Monitor Summary: {down} down, {up} online"
+
+def render_status_digest(params: Dict[str, Any]) -> Tuple[str, str, str]:
+    """Render (subject, html, text) of several status changes merged into one email"""
+    html_rows = []
+    text_rows = []
+    for alert in params['alerts']:
+        variant = get_status_change_variant(alert['previous_status'], alert['current_status'])
+        error_message = alert.get('error_message')
+        fields = {
+            'status_icon': variant['status_icon'],
+            'status_color': variant['status_color'],
+            'status_text': variant['status_text'],
+            'previous_status': alert['previous_status'].title(),
+            'current_status': alert['current_status'].title(),
+            'detected_at': alert['detected_at']
+        }
+        html_rows.append(_DIGEST_ROW_HTML.substitute(
+            fields,
+            job_url=html.escape(alert['job_url']),
+            error_detail=f'<br><span style="color: #c53030;">{html.escape(error_message)}</span>' if error_message else ''
+        ))
+        text_rows.append(_DIGEST_ROW_TEXT.substitute(
+            fields,
+            job_url=alert['job_url'],
+            error_detail=f' - {error_message}' if error_message else ''
+        ))
+    
+    fields = {'alert_count': len(params['alerts']), 'sent_at': params['sent_at']}
+    html_content = _STATUS_DIGEST_HTML.substitute(fields, alert_rows="\n                    ".join(html_rows))
+    text_content = _STATUS_DIGEST_TEXT.substitute(fields, alert_rows="\n".join(text_rows))
+    
+    return status_digest_subject(params), html_content, text_content
+
+_RENDERERS: Dict[str, Callable[[Dict[str, Any]], Tuple[str, str, str]]] = {
+    STATUS_CHANGE_TEMPLATE: render_status_change,
+    STATUS_DIGEST_TEMPLATE: render_status_digest,
+}
+
+def render_email(template_id: str, params: Dict[str, Any]) -> Tuple[str, str, str]:
+    """Render (subject, html, text) for a queued email's template reference"""
+    renderer = _RENDERERS.get(template_id)
+    if renderer is None:
+        raise ValueError(f"Unknown email template: {template_id}")
+    return renderer(params)
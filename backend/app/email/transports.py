@@ -0,0 +1,477 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import smtplib
+import threading
+import time
+from email.message import EmailMessage
+from email.utils import make_msgid
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+from uuid import uuid4
+
+import httpx
+from sqlalchemy import text
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+class TransientSendError(Exception):
+    """A send failure worth retrying (rate limit, provider 5xx, network error)"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter for transient send failures"""
+
+    def __init__(
+        self,
+        max_retries: Optional[int] = None,
+        base_delay: Optional[float] = None,
+        max_delay: Optional[float] = None
+    ):
+        self.max_retries = settings.EMAIL_RETRY_MAX if max_retries is None else max_retries
+        self.base_delay = base_delay or settings.EMAIL_RETRY_BASE_SECONDS
+        self.max_delay = max_delay or settings.EMAIL_RETRY_MAX_SECONDS
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    async def call(self, send: Callable[[], Awaitable[Any]]) -> Any:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await send()
+            except TransientSendError as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = e.retry_after if e.retry_after is not None else self.delay(attempt)
+                logger.warning(f"⏳ Transient email send failure ({e}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+class SharedTokenBucket:
+    """
+    Token bucket kept in the rate_limit_buckets table, shared by all processes
+
+    Each acquire is one atomic upsert that refills the bucket for the time
+    since the last call and reserves the tokens, going negative when they
+    aren't there yet; the caller then waits until its reservation is covered.
+    If the database can't be reached, acquire uses `fallback` for the next
+    FALLBACK_SECONDS before trying the database again.
+    """
+
+    FALLBACK_SECONDS = 30.0
+
+    _RESERVE = text("""
+        INSERT INTO rate_limit_buckets AS bucket (name, tokens, updated_at)
+        VALUES (:name, :capacity - :tokens, clock_timestamp())
+        ON CONFLICT (name) DO UPDATE SET
+            tokens = LEAST(
+                :capacity,
+                bucket.tokens + EXTRACT(EPOCH FROM clock_timestamp() - bucket.updated_at) * :rate
+            ) - :tokens,
+            updated_at = clock_timestamp()
+        RETURNING tokens
+    """)
+
+    def __init__(self, name: str, rate: float, capacity: Optional[float] = None, fallback: Optional[TokenBucket] = None):
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.fallback = fallback or TokenBucket(rate, self.capacity)
+        self._fallback_until = 0.0
+
+    def _reserve(self, tokens: float) -> float:
+        from ..database import engine
+
+        with engine.begin() as connection:
+            return connection.execute(
+                self._RESERVE,
+                {'name': self.name, 'capacity': self.capacity, 'rate': self.rate, 'tokens': tokens}
+            ).scalar()
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        if time.monotonic() < self._fallback_until:
+            await self.fallback.acquire(tokens)
+            return
+        try:
+            remaining = await asyncio.to_thread(self._reserve, tokens)
+        except Exception as e:
+            logger.warning(f"⚠️ Shared rate limit {self.name} unavailable ({e}), pacing this process only")
+            self._fallback_until = time.monotonic() + self.FALLBACK_SECONDS
+            await self.fallback.acquire(tokens)
+            return
+        if remaining < 0:
+            await asyncio.sleep(-remaining / self.rate)
+
+
+def _failed(error: str, count: int) -> List[Dict[str, Any]]:
+    return [{'success': False, 'error': error, 'status': 'failed'} for _ in range(count)]
+
+
+def _idempotency_key(chunk: List[Dict[str, Any]]) -> Optional[str]:
+    """Provider idempotency key of a request: the message's key, or a hash of a batch's keys"""
+    keys = [message.get('idempotency_key') for message in chunk]
+    if not all(keys):
+        return None
+    if len(keys) == 1:
+        return keys[0]
+    return "batch:" + hashlib.sha256("\n".join(keys).encode()).hexdigest()
+
+
+class EmailTransport:
+    """
+    Base class of email transports
+
+    Messages are Resend-style params dicts (from, to, subject, html, text)
+    plus an optional `idempotency_key` that identifies the message across
+    retries.
+    send_many splits them into chunks, sends the chunks concurrently with at
+    most `max_concurrency` in flight, retries TransientSendError with jitter,
+    and returns one result dict per message in input order.
+    """
+
+    name = "base"
+
+    def __init__(self, max_concurrency: Optional[int] = None, retry_policy: Optional[RetryPolicy] = None):
+        self.max_concurrency = max_concurrency or settings.EMAIL_TRANSPORT_CONCURRENCY
+        self.retry_policy = retry_policy or RetryPolicy()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _chunks(self, messages: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        return [[message] for message in messages]
+
+    async def _send_chunk(self, chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def _deliver(self, chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self._semaphore:
+            try:
+                return await self.retry_policy.call(lambda: self._send_chunk(chunk))
+            except Exception as e:
+                error_msg = str(e) if str(e) else f"{type(e).__name__}: Unknown error"
+                logger.error(f"💥 Exception sending {len(chunk)} emails via {self.name}: {error_msg}")
+                return _failed(error_msg, len(chunk))
+
+    async def send_many(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not messages:
+            return []
+        chunk_results = await asyncio.gather(*(self._deliver(chunk) for chunk in self._chunks(messages)))
+        return [result for results in chunk_results for result in results]
+
+    async def close(self) -> None:
+        pass
+
+
+class ResendTransport(EmailTransport):
+    """
+    Resend REST API over one pooled httpx.AsyncClient
+
+    Groups messages into calls to the batch endpoint (up to RESEND_BATCH_MAX
+    per call) and paces calls with a token bucket matched to the provider's
+    request rate limit. The limit is per API key, so the bucket lives in the
+    database and all dispatchers draw from it. The API key is sent per
+    request, no global state.
+
+    Requests carry an Idempotency-Key built from the messages' keys, so a
+    retry after a timeout or 5xx of a request the provider already accepted
+    is answered from its stored response instead of sending again.
+    """
+
+    name = "resend"
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        rate_per_second: Optional[float] = None,
+        batch_max: Optional[int] = None,
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.api_key = api_key or settings.RESEND_API_KEY
+        if not self.api_key:
+            raise ValueError("Resend API key not configured")
+
+        self.base_url = (base_url or settings.RESEND_API_URL).rstrip("/")
+        self.batch_max = batch_max or settings.RESEND_BATCH_MAX
+        # One budget per API key across processes, spent evenly (no bursts the
+        # provider could count against the next second); without the database
+        # each dispatcher falls back to its share of it
+        rate = rate_per_second or settings.RESEND_RATE_LIMIT_PER_SECOND
+        self.limiter = SharedTokenBucket(
+            f"resend:{hashlib.sha256(self.api_key.encode()).hexdigest()[:16]}",
+            rate,
+            capacity=1.0,
+            fallback=TokenBucket(rate / max(settings.EMAIL_DISPATCHERS, 1), capacity=1.0)
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=30.0,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency
+                )
+            )
+        return self._client
+
+    def _chunks(self, messages: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        return [messages[i:i + self.batch_max] for i in range(0, len(messages), self.batch_max)]
+
+    async def _send_chunk(self, chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        await self.limiter.acquire()
+        key = _idempotency_key(chunk)
+        headers = {"Idempotency-Key": key} if key else None
+        payload = [{k: v for k, v in message.items() if k != 'idempotency_key'} for message in chunk]
+        try:
+            if len(chunk) == 1:
+                response = await self._get_client().post("/emails", json=payload[0], headers=headers)
+            else:
+                response = await self._get_client().post("/emails/batch", json=payload, headers=headers)
+        except httpx.TransportError as e:
+            raise TransientSendError(f"{type(e).__name__}: {e}")
+
+        if response.status_code == 409 and key:
+            error = response.json().get('name')
+            if error == "concurrent_idempotent_requests":
+                raise TransientSendError("HTTP 409: request with this idempotency key still in progress")
+            if error == "invalid_idempotent_request":
+                # The key was accepted before with another payload (e.g. a digest
+                # re-rendered for a later attempt): the messages already went out
+                logger.warning(f"⚠️ Resend already accepted {len(chunk)} emails under idempotency key {key}")
+                return [{'success': True, 'message_id': None, 'status': 'sent'} for _ in chunk]
+        if response.status_code == 429:
+            retry_after = response.headers.get("retry-after")
+            raise TransientSendError("HTTP 429: rate limited", float(retry_after) if retry_after else None)
+        if response.status_code >= 500:
+            raise TransientSendError(f"HTTP {response.status_code}: {response.text}")
+        if response.status_code >= 400:
+            return _failed(f"HTTP {response.status_code}: {response.text}", len(chunk))
+
+        body = response.json()
+        sent = [body] if len(chunk) == 1 else body.get('data', [])
+        return [
+            {'success': True, 'message_id': item.get('id'), 'status': 'sent'}
+            for item in sent
+        ] + _failed('Missing from provider response', len(chunk) - len(sent))
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class SmtpTransport(EmailTransport):
+    """
+    SMTP relay with a pool of reusable connections
+
+    smtplib is blocking, so each send runs in a thread; idle connections are
+    kept for the next send instead of logging in again.
+    """
+
+    name = "smtp"
+
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: Optional[bool] = None,
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.host = host or settings.SMTP_HOST
+        if not self.host:
+            raise ValueError("SMTP host not configured")
+
+        self.port = port or settings.SMTP_PORT
+        self.username = username or settings.SMTP_USERNAME
+        self.password = password or settings.SMTP_PASSWORD
+        self.use_tls = settings.SMTP_USE_TLS if use_tls is None else use_tls
+        self._idle: List[smtplib.SMTP] = []
+
+    def _connect(self) -> smtplib.SMTP:
+        connection = smtplib.SMTP(self.host, self.port, timeout=30)
+        if self.use_tls:
+            connection.starttls()
+        if self.username:
+            connection.login(self.username, self.password or "")
+        return connection
+
+    @staticmethod
+    def _build_message(message: Dict[str, Any]) -> EmailMessage:
+        email = EmailMessage()
+        email["From"] = message["from"]
+        email["To"] = ", ".join(message["to"])
+        email["Subject"] = message["subject"]
+        email["Message-ID"] = make_msgid(domain=message["from"].rsplit("@", 1)[-1].rstrip(">"))
+        email.set_content(message.get("text") or "")
+        if message.get("html"):
+            email.add_alternative(message["html"], subtype="html")
+        return email
+
+    async def _send_chunk(self, chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        email = self._build_message(chunk[0])
+        connection = self._idle.pop() if self._idle else None
+        try:
+            if connection is None:
+                connection = await asyncio.to_thread(self._connect)
+            await asyncio.to_thread(connection.send_message, email)
+        except smtplib.SMTPResponseException as e:
+            self._discard(connection)
+            if 400 <= e.smtp_code < 500:
+                raise TransientSendError(f"SMTP {e.smtp_code}: {e.smtp_error!r}")
+            return _failed(f"SMTP {e.smtp_code}: {e.smtp_error!r}", 1)
+        except (smtplib.SMTPServerDisconnected, OSError) as e:
+            self._discard(connection)
+            raise TransientSendError(f"{type(e).__name__}: {e}")
+
+        self._idle.append(connection)
+        return [{'success': True, 'message_id': email["Message-ID"], 'status': 'sent'}]
+
+    @staticmethod
+    def _discard(connection: Optional[smtplib.SMTP]) -> None:
+        if connection is None:
+            return
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    async def close(self) -> None:
+        while self._idle:
+            connection = self._idle.pop()
+            try:
+                await asyncio.to_thread(connection.quit)
+            except Exception:
+                self._discard(connection)
+
+
+class FileTransport(EmailTransport):
+    """
+    Local sink for load testing: appends messages as JSON lines, or discards
+    them when no path is set. EMAIL_SINK_LATENCY_MS simulates provider latency.
+    """
+
+    name = "file"
+
+    def __init__(self, path: Optional[str] = None, latency_ms: Optional[float] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.path = settings.EMAIL_SINK_PATH if path is None else path
+        self.latency = (settings.EMAIL_SINK_LATENCY_MS if latency_ms is None else latency_ms) / 1000
+        self._file = None
+        self._lock = threading.Lock()
+
+    async def _send_chunk(self, chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        message_id = f"sink-{uuid4()}"
+        if self.path:
+            with self._lock:
+                if self._file is None:
+                    self._file = open(self.path, "a", buffering=1)
+                self._file.write(json.dumps({'id': message_id, **chunk[0]}) + "\n")
+        return [{'success': True, 'message_id': message_id, 'status': 'sent'}]
+
+    async def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+TRANSPORTS = {
+    ResendTransport.name: ResendTransport,
+    SmtpTransport.name: SmtpTransport,
+    FileTransport.name: FileTransport,
+}
+
+# Per-process state: a background event loop that outlives single sends, so
+# pooled clients and connections are reused across batches and callers
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_pid: Optional[int] = None
+_loop_lock = threading.Lock()
+_transports: Dict[str, EmailTransport] = {}
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _loop_pid
+
+    with _loop_lock:
+        # A forked worker child can't use its parent's loop thread or clients
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="email-transport", daemon=True).start()
+            _loop_pid = os.getpid()
+            _transports.clear()
+        return _loop
+
+def get_transport(name: Optional[str] = None) -> EmailTransport:
+    """Get this process's long-lived transport (default: EMAIL_TRANSPORT)"""
+    name = (name or settings.EMAIL_TRANSPORT).lower()
+    _get_loop()
+
+    with _loop_lock:
+        transport = _transports.get(name)
+        if transport is None:
+            if name not in TRANSPORTS:
+                raise ValueError(f"Unknown email transport: {name}")
+            transport = TRANSPORTS[name]()
+            _transports[name] = transport
+        return transport
+
+def send_messages(messages: List[Dict[str, Any]], transport: Optional[EmailTransport] = None) -> List[Dict[str, Any]]:
+    """Send messages from synchronous code; results are returned in input order"""
+    transport = transport or get_transport()
+    return asyncio.run_coroutine_threadsafe(transport.send_many(messages), _get_loop()).result()
+
+def send_message(message: Dict[str, Any], transport: Optional[EmailTransport] = None) -> Dict[str, Any]:
+    return send_messages([message], transport)[0]
+
+def close_transports() -> None:
+    """Close pooled clients and connections (worker/app shutdown)"""
+    if _loop is None or _loop_pid != os.getpid():
+        return
+    for transport in list(_transports.values()):
+        asyncio.run_coroutine_threadsafe(transport.close(), _loop).result()
+    _transports.clear()
@@ -0,0 +1,160 @@
+"""
+Local stand-in for Google's ID token signing certs, for testing OAuth logins offline
+
+    python -m app.fake_google --port 9011 --max-age 300 --rotate-every 600
+
+Set GOOGLE_CERTS_URL=http://localhost:9011/oauth2/v1/certs and the server
+answers like Google: {kid: PEM cert} with a Cache-Control max-age.
+GET /token?email=user@example.com mints an ID token signed by the current
+key for GOOGLE_CLIENT_ID (or --audience), to post to /auth/google.
+--rotate-every swaps in a new signing key, keeping the previous one
+published, like Google's key rotation. GET /stats returns how many times
+the certs were fetched.
+"""
+import argparse
+import datetime
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+from uuid import uuid4
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from google.auth import crypt, jwt as google_jwt
+
+from .config import settings
+
+_stats = {'cert_fetches': 0, 'tokens': 0}
+_lock = threading.Lock()
+
+class SigningKeys:
+    """Current signing key plus the previous one, as PEM certs by kid"""
+
+    def __init__(self):
+        self.certs: Dict[str, str] = {}
+        self.signer: Optional[crypt.RSASigner] = None
+        self.rotate()
+
+    def rotate(self) -> str:
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "fake-google")])
+        now = datetime.datetime.now(datetime.timezone.utc)
+        cert = (
+            x509.CertificateBuilder()
+            .subject_name(name)
+            .issuer_name(name)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(days=1))
+            .not_valid_after(now + datetime.timedelta(days=7))
+            .sign(key, hashes.SHA256())
+        )
+        kid = uuid4().hex
+        pem_key = key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        )
+        with _lock:
+            previous = self.signer.key_id if self.signer else None
+            self.certs = {
+                **({previous: self.certs[previous]} if previous else {}),
+                kid: cert.public_bytes(serialization.Encoding.PEM).decode()
+            }
+            self.signer = crypt.RSASigner.from_string(pem_key, key_id=kid)
+        return kid
+
+    def mint(self, audience: str, email: str, sub: Optional[str] = None, lifetime: int = 3600) -> str:
+        now = int(time.time())
+        payload = {
+            'iss': 'https://accounts.google.com',
+            'aud': audience,
+            'sub': sub or email,
+            'email': email,
+            'email_verified': True,
+            'name': email.split("@")[0],
+            'iat': now,
+            'exp': now + lifetime,
+        }
+        with _lock:
+            signer = self.signer
+        return google_jwt.encode(signer, payload).decode()
+
+class _FakeGoogleHandler(BaseHTTPRequestHandler):
+    keys: SigningKeys = None
+    max_age = 300
+    audience = ""
+
+    def _reply(self, status: int, body: dict, headers: dict = None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/oauth2/v1/certs":
+            with _lock:
+                _stats['cert_fetches'] += 1
+                certs = dict(self.keys.certs)
+            return self._reply(200, certs, {"Cache-Control": f"public, max-age={self.max_age}, must-revalidate"})
+        if url.path == "/token":
+            query = parse_qs(url.query)
+            email = query.get("email", ["user@example.com"])[0]
+            with _lock:
+                _stats['tokens'] += 1
+            return self._reply(200, {'id_token': self.keys.mint(self.audience, email, query.get("sub", [None])[0])})
+        if url.path == "/stats":
+            with _lock:
+                return self._reply(200, dict(_stats))
+        self._reply(404, {'message': 'Not found'})
+
+    def log_message(self, format, *args):
+        pass
+
+def _rotate_forever(keys: SigningKeys, every: float):
+    while True:
+        time.sleep(every)
+        print(f"🔑 Rotated signing key, new kid {keys.rotate()}")
+
+def serve(host: str = "127.0.0.1", port: int = 9011, max_age: int = 300, audience: Optional[str] = None,
+          rotate_every: float = 0) -> ThreadingHTTPServer:
+    """Start the stand-in on a background thread and return the server (its keys are server.keys)"""
+    with _lock:
+        _stats.update(dict.fromkeys(_stats, 0))
+    keys = SigningKeys()
+    _FakeGoogleHandler.keys = keys
+    _FakeGoogleHandler.max_age = max_age
+    _FakeGoogleHandler.audience = audience or settings.GOOGLE_CLIENT_ID
+
+    if rotate_every:
+        threading.Thread(target=_rotate_forever, args=(keys, rotate_every), daemon=True).start()
+    server = ThreadingHTTPServer((host, port), _FakeGoogleHandler)
+    server.daemon_threads = True
+    server.keys = keys
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for Google's ID token signing certs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9011)
+    parser.add_argument("--max-age", type=int, default=300, help="Cache-Control max-age of the certs response")
+    parser.add_argument("--audience", help="Client id minted tokens are for (default: GOOGLE_CLIENT_ID)")
+    parser.add_argument("--rotate-every", type=float, default=0, help="Seconds between key rotations (0: never)")
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, args.max_age, args.audience, args.rotate_every)
+    base = f"http://{args.host}:{server.server_address[1]}"
+    print(f"🔐 Fake Google certs at {base}/oauth2/v1/certs, tokens at {base}/token?email=...")
+    threading.Event().wait()
+
+if __name__ == "__main__":
+    main()
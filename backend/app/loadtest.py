@@ -0,0 +1,160 @@
+"""
+API load test: request latency percentiles under concurrency
+
+    python -m app.loadtest --url http://localhost:8000 --email bench@example.com --password secret \\
+        --path /health:20 --path /reports/:10 --duration 20
+
+Each --path PATH[:CONCURRENCY] keeps CONCURRENCY clients requesting PATH
+back to back (authenticated with --token, or a token from logging in with
+--email/--password) for --duration seconds, all at the same time, then
+prints requests per second and p50/p95/p99 latency per path. Running a
+cheap path next to an expensive one shows whether slow requests stall the
+others on the same uvicorn worker. --login CONCURRENCY adds clients that
+log in with --email/--password back to back (a login storm), reported
+as logins per second.
+
+--save FILE writes the summary as JSON; --compare FILE prints each path's
+change against a summary saved earlier (e.g. before a change):
+
+    python -m app.loadtest ... --save before.json
+    # apply the change, restart the API
+    python -m app.loadtest ... --compare before.json
+"""
+import argparse
+import asyncio
+import functools
+import json
+import math
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+def percentile(latencies: List[float], share: float) -> float:
+    """Nearest-rank percentile of latencies (share between 0 and 1)"""
+    ordered = sorted(latencies)
+    return ordered[max(math.ceil(share * len(ordered)) - 1, 0)]
+
+def parse_path(spec: str) -> Tuple[str, int]:
+    path, _, concurrency = spec.partition(":")
+    return path, int(concurrency or 10)
+
+LOGIN = "POST /auth/login"
+
+async def _client_loop(send: Callable[[], Awaitable[httpx.Response]], deadline: float, results: Dict[str, list]) -> None:
+    while time.monotonic() < deadline:
+        started_at = time.perf_counter()
+        try:
+            response = await send()
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        results['latencies' if ok else 'errors'].append(time.perf_counter() - started_at)
+
+async def login(url: str, email: str, password: str) -> str:
+    async with httpx.AsyncClient(base_url=url) as client:
+        response = await client.post("/auth/login", data={'username': email, 'password': password})
+        response.raise_for_status()
+        return response.json()['access_token']
+
+async def run(
+    url: str,
+    paths: List[Tuple[str, int]],
+    duration: float,
+    token: Optional[str] = None,
+    logins: int = 0,
+    credentials: Optional[Dict[str, str]] = None
+) -> Dict[str, dict]:
+    """Run the load and return per-path latencies (seconds) and errors"""
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    concurrency = sum(count for _, count in paths) + logins
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    results = {path: {'latencies': [], 'errors': []} for path, _ in paths}
+    if logins:
+        results[LOGIN] = {'latencies': [], 'errors': []}
+
+    async with httpx.AsyncClient(base_url=url, headers=headers, limits=limits, timeout=60.0) as client:
+        deadline = time.monotonic() + duration
+        clients = [
+            _client_loop(functools.partial(client.get, path), deadline, results[path])
+            for path, count in paths for _ in range(count)
+        ]
+        clients += [
+            _client_loop(functools.partial(client.post, "/auth/login", data=credentials), deadline, results[LOGIN])
+            for _ in range(logins)
+        ]
+        await asyncio.gather(*clients)
+    return results
+
+def summarize(results: Dict[str, dict], duration: float) -> Dict[str, dict]:
+    """Per-path requests per second, error count and p50/p95/p99 latency (ms; None without successes)"""
+    summary = {}
+    for path, result in results.items():
+        latencies = result['latencies']
+        summary[path] = {
+            'ok': len(latencies),
+            'errors': len(result['errors']),
+            'per_second': round(len(latencies) / duration, 1),
+            **{
+                name: round(percentile(latencies, share) * 1000, 1) if latencies else None
+                for name, share in (('p50', 0.50), ('p95', 0.95), ('p99', 0.99))
+            }
+        }
+    return summary
+
+def _change(before: Optional[float], after: Optional[float]) -> str:
+    if not before or after is None:
+        return ""
+    return f" ({(after - before) / before * 100:+.0f}%)"
+
+def report(summary: Dict[str, dict], baseline: Optional[Dict[str, dict]] = None) -> None:
+    """Print the summary; with a baseline, each figure is followed by the baseline and the change"""
+    for path, stats in summary.items():
+        before = (baseline or {}).get(path)
+        if stats['p50'] is None:
+            print(f"❌ {path}: no successful requests, {stats['errors']} errors")
+            continue
+
+        def figure(name: str, unit: str) -> str:
+            if before is None or before.get(name) is None:
+                return f"{stats[name]}{unit}"
+            return f"{stats[name]}{unit} vs {before[name]}{unit}{_change(before[name], stats[name])}"
+
+        errors = f"{stats['errors']} errors" + (f" vs {before['errors']}" if before else "")
+        print(
+            f"📊 {path}: {stats['ok']} ok ({figure('per_second', '/s')}), {errors}, "
+            f"p50 {figure('p50', 'ms')}, p95 {figure('p95', 'ms')}, p99 {figure('p99', 'ms')}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="API latency load test")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", action="append", help="PATH[:CONCURRENCY], repeatable (default /jobs:20)")
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--token", help="Bearer token for authenticated paths")
+    parser.add_argument("--email", help="Log in with this user instead of --token")
+    parser.add_argument("--password")
+    parser.add_argument("--login", type=int, default=0, help="Clients logging in back to back (needs --email)")
+    parser.add_argument("--save", help="Write the summary to this JSON file")
+    parser.add_argument("--compare", help="Compare against a summary written earlier with --save")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    token = args.token
+    if args.email:
+        token = asyncio.run(login(args.url, args.email, args.password))
+    paths = [parse_path(spec) for spec in args.path or ["/jobs:20"]]
+    credentials = {'username': args.email, 'password': args.password}
+    results = asyncio.run(run(args.url, paths, args.duration, token, args.login, credentials))
+    summary = summarize(results, args.duration)
+    report(summary, baseline)
+    if args.save:
+        with open(args.save, "w") as summary_file:
+            json.dump(summary, summary_file, indent=2)
+
+if __name__ == "__main__":
+    main()
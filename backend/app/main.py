@@ -1,9 +1,13 @@
 import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from .config import settings
-from .database import create_tables
-from .routes import auth, jobs, reports
+from .database import create_tables, async_engine
+from .routes import auth, jobs, reports, webhooks, metrics
+from .services.google_cert_cache import google_cert_cache
+from .email.transports import close_transports
+from .utils.metrics import MetricsMiddleware
 
 # Configure logging
 logging.basicConfig(
@@ -21,9 +25,12 @@ app.add_middleware(
     allow_headers=["*"],
     expose_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 app.include_router(auth.router)
 app.include_router(jobs.router)
 app.include_router(reports.router)
+app.include_router(webhooks.router)
+app.include_router(metrics.router)
 
 @app.get("/")
 async def root():
@@ -35,4 +42,12 @@ async def health_check():
 
 @app.on_event("startup")
 async def startup_event():
-    create_tables()
\ No newline at end of file
+    create_tables()
+    if settings.GOOGLE_CLIENT_ID:
+        google_cert_cache.schedule_refresh()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await google_cert_cache.close()
+    await run_in_threadpool(close_transports)
+    await async_engine.dispose()
\ No newline at end of file
@@ -5,7 +5,12 @@ Base = declarative_base()
 from .user import User
 from .job import Job
 from .log import HealthLog
+from .log_span import HealthLogSpan
 from .alert import Alert
 from .email_queue import EmailQueue
+from .webhook import Webhook, WebhookDelivery, WebhookDeadLetter
+from .sweep_run import SweepRun
+from .probe_circuit import ProbeCircuit
+from .rate_limit_bucket import RateLimitBucket
 
-__all__ = ["Base", "User", "Job", "HealthLog", "Alert", "EmailQueue"]
\ No newline at end of file
+__all__ = ["Base", "User", "Job", "HealthLog", "HealthLogSpan", "Alert", "EmailQueue", "Webhook", "WebhookDelivery", "WebhookDeadLetter", "SweepRun", "ProbeCircuit", "RateLimitBucket"]
\ No newline at end of file
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Index, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from uuid import uuid4
@@ -12,8 +12,12 @@ class EmailQueue(Base):
     recipient_email = Column(String, nullable=False)
     recipient_name = Column(String, nullable=False)
     subject = Column(String, nullable=False)
-    html_content = Column(Text, nullable=False)
-    text_content = Column(Text, nullable=False)
+    html_content = Column(Text, nullable=True)  # legacy pre-rendered body
+    text_content = Column(Text, nullable=True)
+    
+    # Template reference rendered at send time, see app/email/templates.py
+    template_id = Column(String, nullable=True)
+    template_params = Column(JSONB, nullable=True)
     
     # Status tracking
     status = Column(String, default="pending")  # pending, processing, sent, failed
@@ -24,6 +28,18 @@ class EmailQueue(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     scheduled_at = Column(DateTime(timezone=True), server_default=func.now())
     processed_at = Column(DateTime(timezone=True), nullable=True)
+    claimed_at = Column(DateTime(timezone=True), nullable=True)  # lease start while "processing"
+    
+    # Alert latency stages (enqueued = created_at, provider accepted = processed_at when sent)
+    probe_completed_at = Column(DateTime(timezone=True), nullable=True)
+    status_committed_at = Column(DateTime(timezone=True), nullable=True)
+    first_claimed_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Deterministic alert identity (job, transition, time window), see EmailQueueService.get_dedup_key
+    dedup_key = Column(String, nullable=True)
+    
+    # Id of the digest email this row was delivered in (the lead row's id)
+    digest_id = Column(UUID(as_uuid=True), nullable=True)
     
     # Error tracking
     error_message = Column(Text, nullable=True)
@@ -34,4 +50,20 @@ class EmailQueue(Base):
     
     # Relationships
     job = relationship("Job", back_populates="email_queue")
-    user = relationship("User")
\ No newline at end of file
+    user = relationship("User")
+    
+    __table_args__ = (
+        # One live email per dedup key; failed rows don't block a retry
+        Index(
+            "uq_email_queue_dedup_key",
+            "dedup_key",
+            unique=True,
+            postgresql_where=text("dedup_key IS NOT NULL AND status <> 'failed'")
+        ),
+        # Claim query scans only due, pending rows
+        Index("ix_email_queue_pending_scheduled", "scheduled_at", postgresql_where=text("status = 'pending'")),
+        # Per-user lookups for alert digests
+        Index("ix_email_queue_user_created", "user_id", "created_at"),
+        # Lease reaper scans only in-flight rows
+        Index("ix_email_queue_processing_claimed", "claimed_at", postgresql_where=text("status = 'processing'")),
+    )
\ No newline at end of file
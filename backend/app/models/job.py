@@ -1,5 +1,5 @@
 from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from uuid import uuid4
@@ -13,8 +13,11 @@ class Job(Base):
     interval = Column(Integer, nullable=False)  # in minutes (1, 5, 10)
     is_enabled = Column(Boolean, default=True)
     failure_threshold = Column(Integer, default=3)  # repeated failures before alert
+    assertions = Column(JSONB, nullable=True)  # content checks: [{"type": "contains"|"regex"|"json", ...}]
     current_status = Column(String, default="unknown")  # healthy, unhealthy, unknown
     previous_status = Column(String, default="unknown")  # for status change tracking
+    last_checked_at = Column(DateTime(timezone=True), nullable=True)  # last sweep that handled the job (probed or circuit skip), for check lag
+    confirmation_due_at = Column(DateTime(timezone=True), nullable=True)  # pending confirmation re-check
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
@@ -24,5 +27,6 @@ class Job(Base):
     # Relationships
     owner = relationship("User", back_populates="jobs")
     health_logs = relationship("HealthLog", back_populates="job")
+    health_log_spans = relationship("HealthLogSpan", back_populates="job")
     alerts = relationship("Alert")
     email_queue = relationship("EmailQueue")
\ No newline at end of file
@@ -1,5 +1,5 @@
 from sqlalchemy import Column, Integer, Boolean, DateTime, Float, ForeignKey, Text
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, ARRAY
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from uuid import uuid4
@@ -14,6 +14,9 @@ class HealthLog(Base):
     is_healthy = Column(Boolean, nullable=False)
     error_message = Column(Text, nullable=True)
     checked_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Whole milliseconds per probe phase: [dns, connect, tls, ttfb, transfer] (None = not reached)
+    phase_timings = Column(ARRAY(Integer), nullable=True)
+    bytes_read = Column(Integer, nullable=True)  # body bytes received by the probe
     
     # Foreign key to monitoring job
     job_id = Column(UUID(as_uuid=True), ForeignKey("jobs.id"))
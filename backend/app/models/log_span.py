@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, Boolean, DateTime, Float, ForeignKey, Text
+from sqlalchemy.dialects.postgresql import UUID, ARRAY
+from sqlalchemy.orm import relationship
+from uuid import uuid4
+from . import Base
+
+class HealthLogSpan(Base):
+    """Run of consecutive identical health checks collapsed into one record"""
+    __tablename__ = "health_log_spans"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4, index=True)
+    
+    # Shared outcome of every check in the run
+    status_code = Column(Integer)
+    is_healthy = Column(Boolean, nullable=False)
+    error_message = Column(Text, nullable=True)
+    
+    # Run bounds (database clock, like HealthLog.checked_at) and aggregates; a run
+    # never crosses a UTC hour boundary or skips a check
+    check_count = Column(Integer, nullable=False, default=0)
+    first_checked_at = Column(DateTime(timezone=True), nullable=False)
+    last_checked_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    response_time_count = Column(Integer, nullable=False, default=0)
+    response_time_sum = Column(Float, nullable=False, default=0.0)  # in milliseconds
+    # Per-phase millisecond sums over the checks with timings, in HealthLog.phase_timings order
+    phase_timing_sums = Column(ARRAY(Float), nullable=True)
+    phase_timing_count = Column(Integer, nullable=False, default=0)
+    
+    # Check interval of the job when the run started
+    interval_minutes = Column(Integer, nullable=True)
+    
+    # Open spans still accept new checks
+    is_open = Column(Boolean, default=True)
+    
+    # Foreign key to monitoring job
+    job_id = Column(UUID(as_uuid=True), ForeignKey("jobs.id"), index=True)
+    
+    # Relationship
+    job = relationship("Job", back_populates="health_log_spans")
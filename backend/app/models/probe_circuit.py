@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text
+from sqlalchemy.sql import func
+from . import Base
+
+class ProbeCircuit(Base):
+    """Circuit breaker state of a probe target (normalized URL) that keeps being unreachable"""
+    __tablename__ = "probe_circuits"
+    
+    target = Column(String, primary_key=True)
+    state = Column(String, nullable=False, default="closed")  # closed (still probing normally), open
+    
+    # Consecutive unreachable probes (connection failures and timeouts, not HTTP errors)
+    consecutive_failures = Column(Integer, nullable=False, default=0)
+    first_failure_at = Column(DateTime(timezone=True), nullable=False)
+    last_error = Column(Text, nullable=True)
+    
+    # While open: cheap TCP probes with a capped, doubling backoff
+    opened_at = Column(DateTime(timezone=True), nullable=True)
+    last_probed_at = Column(DateTime(timezone=True), nullable=False)
+    next_probe_at = Column(DateTime(timezone=True), nullable=True)
+    backoff_seconds = Column(Float, nullable=True)
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
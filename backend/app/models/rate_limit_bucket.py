@@ -0,0 +1,10 @@
+from sqlalchemy import Column, String, DateTime, Float
+from . import Base
+
+class RateLimitBucket(Base):
+    """Token bucket shared by every process that sends through one provider limit (see SharedTokenBucket)"""
+    __tablename__ = "rate_limit_buckets"
+    
+    name = Column(String, primary_key=True)  # e.g. "resend:<api key fingerprint>"
+    tokens = Column(Float, nullable=False)  # negative while callers are waiting for reserved tokens
+    updated_at = Column(DateTime(timezone=True), nullable=False)
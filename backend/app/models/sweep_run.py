@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from uuid import uuid4
+from . import Base
+
+class SweepRun(Base):
+    """One periodic check_jobs_by_interval tick: when it was due, when it ran, how long it took"""
+    __tablename__ = "sweep_runs"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4, index=True)
+    interval_minutes = Column(Integer, nullable=False, index=True)
+    status = Column(String, nullable=False)  # completed, coalesced, failed
+    
+    # scheduled_at is when beat published the tick; drift is how long it waited for a worker
+    scheduled_at = Column(DateTime(timezone=True), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=False)
+    drift_seconds = Column(Float, nullable=False)
+    duration_seconds = Column(Float, nullable=False)
+    
+    jobs_checked = Column(Integer, default=0)
+    probes_sent = Column(Integer, default=0)  # fewer than jobs_checked when jobs share a URL
+    jobs_per_second = Column(Float, nullable=True)
+    overran = Column(Boolean, default=False)  # took longer than the interval
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,78 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Index, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from uuid import uuid4
+from . import Base
+
+class Webhook(Base):
+    __tablename__ = "webhooks"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4, index=True)
+    url = Column(String, nullable=False)
+    kind = Column(String, default="json")  # json, slack
+    secret = Column(String, nullable=True)  # signs JSON payloads (X-PingDaemon-Signature)
+    is_active = Column(Boolean, default=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Foreign key to owner
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+
+    # Relationships
+    user = relationship("User")
+    deliveries = relationship("WebhookDelivery", back_populates="webhook", cascade="all, delete-orphan")
+
+
+class WebhookDelivery(Base):
+    """Retry queue: one row per event per webhook until delivered or dead-lettered"""
+    __tablename__ = "webhook_deliveries"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4, index=True)
+    event = Column(String, nullable=False)  # e.g. monitor.status_changed
+    payload = Column(JSONB, nullable=False)  # event data, formatted per webhook kind at send time
+    dedup_key = Column(String, nullable=True)
+
+    # Status tracking
+    status = Column(String, default="pending")  # pending, processing, sent
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=6)
+    last_error = Column(Text, nullable=True)
+    response_status = Column(Integer, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now())
+    claimed_at = Column(DateTime(timezone=True), nullable=True)
+    delivered_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Foreign keys
+    webhook_id = Column(UUID(as_uuid=True), ForeignKey("webhooks.id", ondelete="CASCADE"), nullable=False)
+    job_id = Column(UUID(as_uuid=True), ForeignKey("jobs.id"), nullable=True)
+
+    # Relationships
+    webhook = relationship("Webhook", back_populates="deliveries")
+
+    __table_args__ = (
+        # One delivery per event per endpoint (same keys as the email queue)
+        Index("uq_webhook_deliveries_dedup", "webhook_id", "dedup_key", unique=True),
+        Index("ix_webhook_deliveries_pending", "next_attempt_at", postgresql_where=text("status = 'pending'")),
+        Index("ix_webhook_deliveries_processing", "claimed_at", postgresql_where=text("status = 'processing'")),
+    )
+
+
+class WebhookDeadLetter(Base):
+    """Deliveries that ran out of attempts or were rejected by the endpoint"""
+    __tablename__ = "webhook_dead_letters"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4, index=True)
+    event = Column(String, nullable=False)
+    payload = Column(JSONB, nullable=False)
+    attempts = Column(Integer, nullable=False)
+    last_error = Column(Text, nullable=True)
+    response_status = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)  # when the event was first queued
+    dead_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # No FK on job_id: dead letters outlive the monitor for inspection
+    webhook_id = Column(UUID(as_uuid=True), ForeignKey("webhooks.id", ondelete="CASCADE"), nullable=False, index=True)
+    job_id = Column(UUID(as_uuid=True), nullable=True)
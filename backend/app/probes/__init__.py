@@ -0,0 +1 @@
+# Probe engine for scheduled health checks
\ No newline at end of file
@@ -0,0 +1,163 @@
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+from ..config import settings
+
+class _Matcher:
+    """One assertion evaluated over body chunks as they arrive"""
+
+    # True once the outcome can't change, so reading can stop early
+    decided = False
+
+    def feed(self, chunk: bytes) -> None:
+        raise NotImplementedError
+
+    def finish(self) -> Optional[str]:
+        """Failure detail, or None if the assertion holds"""
+        raise NotImplementedError
+
+class ContainsMatcher(_Matcher):
+    """
+    Substring search across chunk boundaries
+
+    Keeps the last len(needle) - 1 bytes of the previous chunk, so a needle
+    split over two chunks is still found without buffering the body.
+    """
+
+    def __init__(self, value: str):
+        self.value = value
+        self.needle = value.encode()
+        self.tail = b""
+        self.decided = not self.needle
+
+    def feed(self, chunk: bytes) -> None:
+        window = self.tail + chunk
+        if self.needle in window:
+            self.decided = True
+            return
+        self.tail = window[-(len(self.needle) - 1):] if len(self.needle) > 1 else b""
+
+    def finish(self) -> Optional[str]:
+        return None if self.decided else f"Body does not contain '{self.value}'"
+
+class RegexMatcher(_Matcher):
+    """
+    Regex search over a sliding window
+
+    Each search covers the carried-over window plus the new chunk, and the
+    last PROBE_REGEX_WINDOW_BYTES are carried over, so matches up to that
+    length are found wherever the chunk boundaries fall. One more byte is
+    carried as context only, so ^ and \\b don't match where the window was
+    cut, and a match reaching the end of what has arrived so far only counts
+    once more body (or the end of it) confirms it, so $ means the real end.
+    """
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self.regex = re.compile(pattern.encode())
+        self.window = settings.PROBE_REGEX_WINDOW_BYTES
+        self.tail = b""
+        # Leading bytes of the tail that are context, not searched
+        self.context = 0
+
+    def feed(self, chunk: bytes) -> None:
+        text = self.tail + chunk
+        match = self.regex.search(text, self.context)
+        # $ also matches before a final newline, so that byte may not be the end either
+        if match and match.end() < len(text) - 1:
+            self.decided = True
+            return
+        if len(text) > self.window + 1:
+            text = text[-(self.window + 1):]
+            self.context = 1
+        self.tail = text
+
+    def finish(self) -> Optional[str]:
+        if not self.decided and self.regex.search(self.tail, self.context):
+            self.decided = True
+        return None if self.decided else f"Body does not match /{self.pattern}/"
+
+class JsonFieldMatcher(_Matcher):
+    """
+    Value of a dotted path (data.items.0.status) in a JSON body
+
+    JSON can only be judged once the document is complete, so this one keeps
+    the (already size-capped) body and parses it in finish().
+    """
+
+    _MISSING = object()
+
+    def __init__(self, path: str, value: Optional[str] = None):
+        self.path = path
+        self.value = value
+        self.chunks: List[bytes] = []
+
+    def feed(self, chunk: bytes) -> None:
+        self.chunks.append(chunk)
+
+    def finish(self) -> Optional[str]:
+        try:
+            document = json.loads(b"".join(self.chunks))
+        except ValueError:
+            return "Body is not valid JSON (or exceeded the read limit)"
+
+        found = self._lookup(document, self.path)
+        if found is self._MISSING:
+            return f"JSON field '{self.path}' is missing"
+        if self.value is not None and _json_text(found) != self.value:
+            return f"JSON field '{self.path}' is {_json_text(found)!r}, expected {self.value!r}"
+        return None
+
+    @classmethod
+    def _lookup(cls, document: Any, path: str) -> Any:
+        for key in path.split("."):
+            if isinstance(document, dict) and key in document:
+                document = document[key]
+            elif isinstance(document, list) and key.isdigit() and int(key) < len(document):
+                document = document[int(key)]
+            else:
+                return cls._MISSING
+        return document
+
+def _json_text(value: Any) -> str:
+    """Compare scalars by their text: "ok" → ok, true → true, 200 → 200"""
+    return value if isinstance(value, str) else json.dumps(value)
+
+MATCHERS = {
+    "contains": lambda spec: ContainsMatcher(spec['value']),
+    "regex": lambda spec: RegexMatcher(spec['value']),
+    "json": lambda spec: JsonFieldMatcher(spec['path'], spec.get('value')),
+}
+
+class AssertionSet:
+    """
+    A job's content assertions, fed the streamed response body
+
+    The probe stops reading as soon as every assertion is decided (all
+    keyword/regex assertions matched and no JSON assertion pending) or the
+    byte limit is reached.
+    """
+
+    def __init__(self, specs: List[Dict[str, Any]]):
+        self.specs = specs
+        self.matchers = [MATCHERS[spec['type']](spec) for spec in specs]
+
+    def feed(self, chunk: bytes) -> bool:
+        """Feed a chunk; returns True when no more body is needed"""
+        for matcher in self.matchers:
+            if not matcher.decided:
+                matcher.feed(chunk)
+        return all(matcher.decided for matcher in self.matchers)
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """Outcome of each assertion: {'type', 'passed', 'detail'}"""
+        results = []
+        for spec, matcher in zip(self.specs, self.matchers):
+            detail = matcher.finish()
+            results.append({'type': spec['type'], 'passed': detail is None, 'detail': detail})
+        return results
+
+def assertions_key(specs: Optional[List[Dict[str, Any]]]) -> str:
+    """Stable text form of a job's assertions, for grouping identical probes"""
+    return json.dumps(specs or [], sort_keys=True)
@@ -0,0 +1,194 @@
+import ipaddress
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import dns.exception
+import dns.resolver
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# host → (expires_at, addresses, error); addresses is None for a cached failure
+CacheEntry = Tuple[float, Optional[List[str]], Optional[str]]
+
+class DnsCache:
+    """
+    Worker-local DNS cache for probes
+
+    Answers are kept for their record TTL (clamped to DNS_CACHE_MIN_TTL_SECONDS
+    and DNS_CACHE_MAX_TTL_SECONDS). Names that don't exist are cached for
+    DNS_NEGATIVE_TTL_SECONDS, so a typo'd monitor doesn't query the resolver
+    every tick; resolver timeouts and other transient errors are not cached.
+
+    Lookups go through dnspython to get TTLs. Names it can't resolve fall back
+    to getaddrinfo, which also covers /etc/hosts, and are cached for
+    DNS_CACHE_FALLBACK_TTL_SECONDS. Concurrent lookups of one host share a
+    single query.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, CacheEntry] = {}
+        self._host_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._resolver: Optional[dns.resolver.Resolver] = None
+        self._prefetcher: Optional[ThreadPoolExecutor] = None
+        self._pid = os.getpid()
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+
+    def _check_fork(self) -> None:
+        # A forked worker child can't use its parent's prefetch threads
+        if self._pid != os.getpid():
+            self._host_locks = {}
+            self._prefetcher = None
+            self._pid = os.getpid()
+
+    def _get_resolver(self) -> dns.resolver.Resolver:
+        if self._resolver is None:
+            self._resolver = dns.resolver.Resolver()
+        return self._resolver
+
+    def _cached(self, host: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(host)
+        if entry and entry[0] > time.monotonic():
+            return entry
+        return None
+
+    def resolve(self, host: str) -> Tuple[List[str], float]:
+        """
+        Addresses of a host, from the cache when fresh
+
+        Returns:
+            (addresses, seconds spent resolving; 0 on a cache hit)
+
+        Raises:
+            socket.gaierror: The name doesn't resolve (possibly a cached failure)
+        """
+        if _is_ip_address(host):
+            return [host], 0.0
+
+        with self._lock:
+            self._check_fork()
+            host_lock = self._host_locks.setdefault(host, threading.Lock())
+
+        started_at = time.perf_counter()
+        with host_lock:
+            entry = self._cached(host)
+            if entry is None:
+                self.misses += 1
+                entry = self._refresh(host)
+                elapsed = time.perf_counter() - started_at
+            else:
+                if entry[1] is None:
+                    self.negative_hits += 1
+                else:
+                    self.hits += 1
+                elapsed = 0.0
+
+        _, addresses, error = entry
+        if addresses is None:
+            raise socket.gaierror(socket.EAI_NONAME, error)
+        return addresses, elapsed
+
+    def _refresh(self, host: str) -> CacheEntry:
+        """Look a host up and store the result (callers hold the host's lock)"""
+        try:
+            addresses, ttl = self._lookup(host)
+            ttl = min(max(ttl, settings.DNS_CACHE_MIN_TTL_SECONDS), settings.DNS_CACHE_MAX_TTL_SECONDS)
+            entry = (time.monotonic() + ttl, addresses, None)
+        except socket.gaierror as e:
+            if e.errno not in (socket.EAI_NONAME, getattr(socket, "EAI_NODATA", socket.EAI_NONAME)):
+                # Transient (resolver down, timeout): let the probe fail, don't remember it
+                raise
+            entry = (time.monotonic() + settings.DNS_NEGATIVE_TTL_SECONDS, None, e.strerror or str(e))
+        self._entries[host] = entry
+        return entry
+
+    def _lookup(self, host: str) -> Tuple[List[str], float]:
+        """Resolve with TTL via dnspython, else through getaddrinfo"""
+        resolver = None
+        try:
+            resolver = self._get_resolver()
+        except dns.exception.DNSException as e:
+            logger.debug(f"No DNS resolver configuration, using getaddrinfo: {str(e)}")
+
+        if resolver is not None:
+            for record_type in ("A", "AAAA"):
+                try:
+                    answer = resolver.resolve(
+                        host, record_type, search=True, lifetime=settings.DNS_TIMEOUT_SECONDS
+                    )
+                    return [record.address for record in answer], answer.rrset.ttl
+                except dns.resolver.NoAnswer:
+                    continue
+                except dns.exception.DNSException:
+                    break
+
+        infos = socket.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        return list(dict.fromkeys(info[4][0] for info in infos)), settings.DNS_CACHE_FALLBACK_TTL_SECONDS
+
+    def prefetch(self, hosts: Iterable[str], timeout: float = 0) -> int:
+        """
+        Refresh, on the prefetch threads, hosts that are missing or expire
+        within DNS_PREFETCH_WINDOW_SECONDS
+
+        Args:
+            hosts: Hostnames about to be probed
+            timeout: Wait up to this many seconds for the lookups (0 returns at once)
+
+        Returns:
+            Number of lookups started
+        """
+        horizon = time.monotonic() + settings.DNS_PREFETCH_WINDOW_SECONDS
+        with self._lock:
+            self._check_fork()
+            stale = [
+                host for host in set(hosts)
+                if not _is_ip_address(host) and self._entries.get(host, (0.0,))[0] <= horizon
+            ]
+            if stale and self._prefetcher is None:
+                self._prefetcher = ThreadPoolExecutor(
+                    max_workers=settings.DNS_PREFETCH_WORKERS, thread_name_prefix="dns-prefetch"
+                )
+
+        lookups = [self._prefetcher.submit(self._prefetch_one, host) for host in stale]
+        if lookups and timeout > 0:
+            wait(lookups, timeout=timeout)
+        return len(stale)
+
+    def _prefetch_one(self, host: str) -> None:
+        with self._lock:
+            host_lock = self._host_locks.setdefault(host, threading.Lock())
+        try:
+            with host_lock:
+                self._refresh(host)
+        except OSError as e:
+            logger.debug(f"DNS prefetch failed for {host}: {str(e)}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'negative_hits': self.negative_hits
+        }
+
+def _is_ip_address(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+dns_cache = DnsCache()
@@ -0,0 +1,197 @@
+import socket
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import DecodeError, NewConnectionError, ProtocolError, ReadTimeoutError
+
+from .dns_cache import dns_cache
+
+USER_AGENT = "pingDaemon/1.0 Health Checker"
+
+# Probe phases, in the order they are stored (HealthLog.phase_timings)
+PHASES = ("dns", "connect", "tls", "ttfb", "transfer")
+
+BODY_CHUNK_SIZE = 16 * 1024
+
+# Phase timings (seconds) of the probe running on this thread
+_timings = threading.local()
+
+def start_timings() -> Dict[str, float]:
+    """Start collecting phase timings for a probe on the current thread"""
+    _timings.current = {}
+    return _timings.current
+
+def record_timing(phase: str, seconds: float) -> None:
+    current: Optional[Dict[str, float]] = getattr(_timings, "current", None)
+    if current is not None:
+        current[phase] = current.get(phase, 0.0) + seconds
+
+def finish_timings(
+    timings: Dict[str, float],
+    total_seconds: float,
+    response: Optional[requests.Response] = None
+) -> Dict[str, Optional[float]]:
+    """
+    Complete a probe's phase timings, in milliseconds
+
+    dns, connect and tls are measured on the connection. ttfb is the rest of
+    the time until response headers (request write plus server think time,
+    summed over redirect hops) and transfer is what remains after the headers.
+    Phases a failed probe never reached are None.
+    """
+    phases: Dict[str, Optional[float]] = {phase: timings.get(phase) for phase in PHASES}
+    if response is not None:
+        headers_seconds = sum(hop.elapsed.total_seconds() for hop in [*response.history, response])
+        network_seconds = sum(timings.get(phase, 0.0) for phase in ("dns", "connect", "tls"))
+        phases["ttfb"] = max(headers_seconds - network_seconds, 0.0)
+        phases["transfer"] = max(total_seconds - headers_seconds, 0.0)
+    return {phase: None if seconds is None else round(seconds * 1000, 2) for phase, seconds in phases.items()}
+
+def pack_timings(timings: Optional[Dict[str, Optional[float]]]) -> Optional[List[Optional[int]]]:
+    """Phase timings as whole milliseconds in PHASES order, for storage"""
+    if not timings:
+        return None
+    return [None if timings.get(phase) is None else int(round(timings[phase])) for phase in PHASES]
+
+class _CachedDnsConnectionMixin:
+    """Resolve through the worker's DnsCache instead of getaddrinfo on every connect"""
+
+    def _new_conn(self):
+        try:
+            addresses, dns_seconds = dns_cache.resolve(self._dns_host)
+        except socket.gaierror as e:
+            raise NewConnectionError(self, f"Failed to resolve '{self.host}' ({e})") from e
+        record_timing("dns", dns_seconds)
+
+        # Connect to the cached addresses in turn; TLS SNI and Host still use self.host
+        hostname = self._dns_host
+        last_error = None
+        started_at = time.perf_counter()
+        try:
+            for address in addresses:
+                self._dns_host = address
+                try:
+                    sock = super()._new_conn()
+                    self._socket_seconds = dns_seconds + time.perf_counter() - started_at
+                    return sock
+                except NewConnectionError as e:
+                    last_error = e
+            raise last_error
+        finally:
+            self._dns_host = hostname
+            record_timing("connect", time.perf_counter() - started_at)
+
+class _ProbeHTTPConnection(_CachedDnsConnectionMixin, HTTPConnection):
+    pass
+
+class _ProbeHTTPSConnection(_CachedDnsConnectionMixin, HTTPSConnection):
+
+    def connect(self):
+        # Everything connect() does beyond resolving and opening the socket is the TLS handshake
+        started_at = time.perf_counter()
+        self._socket_seconds = None
+        try:
+            super().connect()
+        finally:
+            if self._socket_seconds is not None:
+                record_timing("tls", time.perf_counter() - started_at - self._socket_seconds)
+
+class _ProbeHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _ProbeHTTPConnection
+
+class _ProbeHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _ProbeHTTPSConnection
+
+class ProbeAdapter(HTTPAdapter):
+    """requests adapter whose connections use the probe DNS cache"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _ProbeHTTPConnectionPool,
+            "https": _ProbeHTTPSConnectionPool,
+        }
+
+def new_probe_session() -> requests.Session:
+    session = requests.Session()
+    session.headers.update({'User-Agent': USER_AGENT})
+    adapter = ProbeAdapter()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def fetch(session: requests.Session, url: str, timeout: float, max_redirects: int) -> requests.Response:
+    """
+    GET a URL, streaming: returns once the final response's headers are in
+
+    Redirects are followed by hand so their bodies are never read (requests
+    drains each hop). The hops end up in response.history as usual.
+
+    Raises:
+        requests.exceptions.TooManyRedirects: More than max_redirects hops
+    """
+    history: List[requests.Response] = []
+    response = session.get(url, timeout=timeout, allow_redirects=False, stream=True)
+    while response.is_redirect:
+        response.close()
+        history.append(response)
+        if len(history) > max_redirects:
+            raise requests.exceptions.TooManyRedirects(
+                f"Exceeded {max_redirects} redirects", response=response
+            )
+        next_url = urljoin(response.url, session.get_redirect_target(response))
+        response = session.get(next_url, timeout=timeout, allow_redirects=False, stream=True)
+    response.history = history
+    return response
+
+def _set_read_timeout(response: requests.Response, seconds: float) -> None:
+    """Limit the next socket read of a streamed response to `seconds`"""
+    sock = getattr(getattr(response.raw, "connection", None), "sock", None)
+    if sock is not None:
+        sock.settimeout(seconds)
+
+def iter_body(response: requests.Response, limit: int, deadline: float) -> Iterator[bytes]:
+    """
+    Decoded body chunks, stopping after `limit` bytes
+
+    Each read returns whatever has arrived (read1) and the socket timeout is
+    the time left until `deadline`, so a server that drips bytes can't hold
+    the probe past it.
+
+    Raises:
+        requests.exceptions.ReadTimeout: The body took past `deadline` (time.time())
+    """
+    remaining = limit
+    while remaining > 0:
+        budget = deadline - time.time()
+        if budget <= 0:
+            raise requests.exceptions.ReadTimeout("Body read exceeded the probe timeout")
+        _set_read_timeout(response, budget)
+        try:
+            chunk = response.raw.read1(min(BODY_CHUNK_SIZE, remaining), decode_content=True)
+        except ReadTimeoutError as e:
+            raise requests.exceptions.ReadTimeout(e)
+        except ProtocolError as e:
+            raise requests.exceptions.ChunkedEncodingError(e)
+        except DecodeError as e:
+            raise requests.exceptions.ContentDecodingError(e)
+        if not chunk:
+            return
+        yield chunk
+        remaining -= len(chunk)
+
+def bytes_read(response: Optional[requests.Response]) -> int:
+    """Body bytes received on the wire (before decompression) for a response"""
+    if response is None or response.raw is None:
+        return 0
+    try:
+        return response.raw.tell()
+    except (AttributeError, OSError):
+        return 0
+
@@ -0,0 +1,125 @@
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# (host key, zero-argument probe callable)
+ProbeTask = Tuple[str, Callable[[], Any]]
+
+def host_key(url: str) -> str:
+    """Politeness key of a probe target: its hostname"""
+    return (urlsplit(url).hostname or url).lower()
+
+class HostScheduler:
+    """
+    Runs probes concurrently while staying polite to each origin
+
+    At most max_concurrency probes run at once overall, at most
+    per_host_concurrency per host, and consecutive probes to a host start at
+    least min_spacing seconds apart. Hosts take turns round-robin, so a host
+    with many monitors only waits on its own limits and never holds up the
+    queues of other hosts.
+
+    The limits hold within one run() call, i.e. one HealthService.check_jobs
+    batch, and are not shared with other calls or processes. Overlapping
+    sweeps of different intervals and confirmation re-checks each apply
+    their own, so a host due in k of them can see up to
+    k × per_host_concurrency probes at once. Single-job checks (check-now,
+    check_single_job) don't go through a scheduler at all.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        per_host_concurrency: Optional[int] = None,
+        min_spacing_seconds: Optional[float] = None
+    ):
+        self.max_concurrency = max_concurrency or settings.SWEEP_PROBE_CONCURRENCY
+        self.per_host_concurrency = per_host_concurrency or settings.PROBE_PER_HOST_CONCURRENCY
+        self.min_spacing = (
+            settings.PROBE_HOST_MIN_SPACING_MS / 1000 if min_spacing_seconds is None else min_spacing_seconds
+        )
+
+    def run(self, tasks: Sequence[ProbeTask]) -> List[Future]:
+        """
+        Run every task and wait for all of them
+
+        Returns:
+            One completed Future per task, in task order (exceptions stay on the future)
+        """
+        futures: List[Optional[Future]] = [None] * len(tasks)
+        queues: "OrderedDict[str, Deque[Tuple[int, Callable[[], Any]]]]" = OrderedDict()
+        for index, (host, probe) in enumerate(tasks):
+            queues.setdefault(host, deque()).append((index, probe))
+
+        in_flight: Dict[str, int] = {}
+        next_start: Dict[str, float] = {}
+        running = 0
+        condition = threading.Condition()
+
+        def _finished(host: str, _future: Future) -> None:
+            nonlocal running
+            with condition:
+                in_flight[host] -= 1
+                running -= 1
+                condition.notify()
+
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(self.max_concurrency, len(tasks))),
+            thread_name_prefix="sweep-probe"
+        ) as executor:
+            with condition:
+                while queues:
+                    now = time.monotonic()
+                    host, wake_at = self._next_host(queues, in_flight, next_start, now)
+                    if host is None or running >= self.max_concurrency:
+                        # Nothing may start yet: wait for a probe to finish or a spacing gap to pass
+                        condition.wait(None if wake_at is None or running >= self.max_concurrency else wake_at - now)
+                        continue
+
+                    index, probe = queues[host].popleft()
+                    if queues[host]:
+                        # Back of the line: every other host gets a turn first
+                        queues.move_to_end(host)
+                    else:
+                        del queues[host]
+
+                    in_flight[host] = in_flight.get(host, 0) + 1
+                    next_start[host] = now + self.min_spacing
+                    running += 1
+                    future = executor.submit(probe)
+                    future.add_done_callback(lambda done, host=host: _finished(host, done))
+                    futures[index] = future
+
+        return futures
+
+    def _next_host(
+        self,
+        queues: "OrderedDict[str, Deque]",
+        in_flight: Dict[str, int],
+        next_start: Dict[str, float],
+        now: float
+    ) -> Tuple[Optional[str], Optional[float]]:
+        """
+        First host in round-robin order that may start a probe now
+
+        Returns:
+            (host, None), or (None, earliest time a spacing-blocked host frees up;
+            None if every waiting host is at its concurrency cap)
+        """
+        wake_at = None
+        for host in queues:
+            if in_flight.get(host, 0) >= self.per_host_concurrency:
+                continue
+            ready_at = next_start.get(host, 0.0)
+            if ready_at <= now:
+                return host, None
+            wake_at = ready_at if wake_at is None else min(wake_at, ready_at)
+        return None, wake_at
@@ -0,0 +1,48 @@
+import socket
+import time
+from typing import Any, Dict
+from urllib.parse import urlsplit
+
+from .dns_cache import dns_cache
+from .http import PHASES
+from ..utils.urls import DEFAULT_PORTS
+
+def tcp_connect(url: str, timeout: float) -> Dict[str, Any]:
+    """
+    Cheap reachability probe: resolve and open a TCP connection, nothing else
+
+    Returns a check result like HealthService.check_url_health, except that
+    is_healthy only means "accepts connections" (status_code is always None).
+    """
+    parts = urlsplit(url)
+    port = parts.port or DEFAULT_PORTS.get(parts.scheme, 80)
+    started_at = time.perf_counter()
+    timings = dict.fromkeys(PHASES)
+    error_message = None
+
+    try:
+        addresses, dns_seconds = dns_cache.resolve(parts.hostname or "")
+        timings["dns"] = round(dns_seconds * 1000, 2)
+        if not addresses:
+            error_message = "TCP connect failed: No addresses resolved"
+        connect_started_at = time.perf_counter()
+        # Like the HTTP probe, try each resolved address until one accepts
+        for address in addresses:
+            try:
+                socket.create_connection((address, port), timeout=timeout).close()
+                error_message = None
+                break
+            except OSError as e:
+                error_message = f"TCP connect failed: {e.strerror or str(e)}"
+        timings["connect"] = round((time.perf_counter() - connect_started_at) * 1000, 2)
+    except socket.gaierror as e:
+        error_message = f"TCP connect failed: {e.strerror or str(e)}"
+
+    return {
+        'is_healthy': error_message is None,
+        'status_code': None,
+        'response_time': round((time.perf_counter() - started_at) * 1000, 2),
+        'error_message': error_message,
+        'timings': timings,
+        'bytes_read': 0
+    }
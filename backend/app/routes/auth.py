@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..database import get_db
+from ..database import get_async_db
 from ..schemas.user import UserCreate, UserResponse, UserLogin, ForgotPasswordRequest, ResetPasswordRequest, PasswordResetResponse, GoogleAuthRequest
 from ..services.auth_service import AuthService
 from ..services.google_oauth_service import GoogleOAuthService
@@ -15,11 +15,11 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 @router.post("/register", response_model=UserResponse)
 async def register(
     user_data: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Register a new user"""
     try:
-        user = AuthService.create_user(db, user_data)
+        user = await AuthService.create_user(db, user_data)
         return user
     except HTTPException:
         raise
@@ -32,10 +32,10 @@ async def register(
 @router.post("/login")
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Login user and return access token"""
-    user = AuthService.authenticate_user(db, form_data.username, form_data.password)
+    user = await AuthService.authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -57,28 +57,28 @@ async def login(
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current user information"""
-    user = AuthService.get_current_user(db, token)
+    user = await AuthService.get_current_user(db, token)
     return user
 
 # Dependency to get current user (for use in other routes)
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Dependency to get current authenticated user"""
-    return AuthService.get_current_user(db, token)
+    return await AuthService.get_current_user(db, token)
 
 @router.post("/forgot-password", response_model=PasswordResetResponse)
 async def forgot_password(
     request: ForgotPasswordRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Request password reset email"""
     try:
-        AuthService.request_password_reset(db, request.email)
+        await AuthService.request_password_reset(db, request.email)
         return PasswordResetResponse(
             message="If an account with that email exists, password reset instructions have been sent."
         )
@@ -91,10 +91,10 @@ async def forgot_password(
 @router.post("/verify-reset-token")
 async def verify_reset_token(
     token: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Verify if reset token is valid"""
-    user = AuthService.verify_reset_token(db, token)
+    user = await AuthService.verify_reset_token(db, token)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -105,11 +105,11 @@ async def verify_reset_token(
 @router.post("/reset-password", response_model=PasswordResetResponse)
 async def reset_password(
     request: ResetPasswordRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Reset password using token"""
     try:
-        AuthService.reset_password(db, request.token, request.password)
+        await AuthService.reset_password(db, request.token, request.password)
         return PasswordResetResponse(
             message="Password has been successfully reset"
         )
@@ -125,7 +125,7 @@ async def reset_password(
 @router.post("/google")
 async def google_oauth(
     request: GoogleAuthRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Authenticate user with Google OAuth token"""
     return await GoogleOAuthService.authenticate_with_google(db, request.google_token)
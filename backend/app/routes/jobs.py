@@ -1,14 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import ValidationError
 from typing import List
 from uuid import UUID
 
-from ..database import get_db
+from ..database import get_async_db
 from ..models.user import User
-from ..schemas.job import JobCreate, JobUpdate, JobResponse
+from ..schemas.job import JobCreate, JobUpdate, JobResponse, AssertionSpec
 from ..services.job_service import JobService
 from ..services.scheduler_service import SchedulerService
-from ..services.health_service import HealthService
+from ..services.probe_service import ProbeService
 from .auth import get_current_user
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
@@ -19,10 +21,10 @@ router = APIRouter(prefix="/jobs", tags=["jobs"])
 async def create_job(
     job_data: JobCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new monitoring job"""
-    return JobService.create_job(db, job_data, current_user)
+    return await JobService.create_job(db, job_data, current_user)
 
 # Handle both /jobs and /jobs/ for GET user jobs
 @router.get("", response_model=List[JobResponse])
@@ -30,77 +32,77 @@ async def create_job(
 async def get_user_jobs(
     page: int = Query(1, ge=1, description="Page number (starts from 1)"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get monitoring jobs for the current user with pagination (10 jobs per page)"""
     skip = (page - 1) * 10
     limit = 10
-    return JobService.get_user_jobs(db, current_user, skip, limit)
+    return await JobService.get_user_jobs(db, current_user, skip, limit)
 
 @router.get("/{job_id}", response_model=JobResponse)
 async def get_job(
     job_id: UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific monitoring job by ID"""
-    return JobService.get_job_by_id(db, job_id, current_user)
+    return await JobService.get_job_by_id(db, job_id, current_user)
 
 @router.put("/{job_id}", response_model=JobResponse)
 async def update_job(
     job_id: UUID,
     job_data: JobUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update an existing monitoring job"""
-    return JobService.update_job(db, job_id, job_data, current_user)
+    return await JobService.update_job(db, job_id, job_data, current_user)
 
 @router.delete("/{job_id}")
 async def delete_job(
     job_id: UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a monitoring job"""
-    success = JobService.delete_job(db, job_id, current_user)
+    success = await JobService.delete_job(db, job_id, current_user)
     return {"message": "Job deleted successfully"}
 
 @router.patch("/{job_id}/toggle", response_model=JobResponse)
 async def toggle_job_status(
     job_id: UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Toggle job enabled/disabled status"""
-    return JobService.toggle_job_status(db, job_id, current_user)
+    return await JobService.toggle_job_status(db, job_id, current_user)
 
 @router.post("/{job_id}/check", response_model=dict)
 async def trigger_immediate_health_check(
     job_id: UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Trigger an immediate health check for a specific job"""
     # Verify job belongs to user
-    job = JobService.get_job_by_id(db, job_id, current_user)
+    job = await JobService.get_job_by_id(db, job_id, current_user)
     
     # Schedule immediate check
-    result = SchedulerService.schedule_immediate_check(job_id)
+    result = await run_in_threadpool(SchedulerService.schedule_immediate_check, job_id)
     return result
 
 @router.post("/{job_id}/check-now", response_model=dict)
 async def perform_direct_health_check(
     job_id: UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Perform immediate synchronous health check and return results directly"""
     # Verify job belongs to user
-    job = JobService.get_job_by_id(db, job_id, current_user)
+    job = await JobService.get_job_by_id(db, job_id, current_user)
     
-    # Perform immediate health check directly
-    result = HealthService.perform_health_check(db, job)
+    # Perform immediate health check on the probe pool (concurrent requests share one probe)
+    result = await ProbeService.check_job_now(job.id)
     
     return {
         "success": True,
@@ -120,7 +122,7 @@ async def get_task_status(
     current_user: User = Depends(get_current_user)
 ):
     """Get the status of a scheduled health check task"""
-    result = SchedulerService.get_task_status(task_id)
+    result = await run_in_threadpool(SchedulerService.get_task_status, task_id)
     return result
 
 @router.post("/test-url", response_model=dict)
@@ -133,8 +135,14 @@ async def test_url(
     if not url:
         raise HTTPException(status_code=400, detail="URL is required")
     
-    # Perform health check on the URL
-    result = HealthService.check_url_health(url)
+    # Optional content assertions, validated like a job's
+    try:
+        assertions = [AssertionSpec(**assertion).dict() for assertion in url_data.get('assertions') or []]
+    except (ValidationError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid assertions: {e}")
+    
+    # Perform health check on the URL (concurrent requests share one probe)
+    result = await ProbeService.test_url(url, assertions or None)
     
     return {
         "success": True,
@@ -142,5 +150,8 @@ async def test_url(
         "is_accessible": result['is_healthy'],
         "status_code": result['status_code'],
         "response_time": result['response_time'],
-        "error_message": result['error_message']
+        "error_message": result['error_message'],
+        "timings": result.get('timings'),
+        "bytes_read": result.get('bytes_read'),
+        "assertions": result.get('assertions')
     }
\ No newline at end of file
@@ -0,0 +1,36 @@
+import secrets
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..database import get_async_db
+from ..services.metrics_service import MetricsService
+from ..utils.metrics import CONTENT_TYPE
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+LOCAL_CLIENTS = ("127.0.0.1", "::1")
+
+async def verify_metrics_access(request: Request) -> None:
+    """Dependency: the METRICS_TOKEN bearer token, or a localhost client when no token is set"""
+    if not settings.METRICS_TOKEN:
+        if request.client is None or request.client.host not in LOCAL_CLIENTS:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Set METRICS_TOKEN to scrape metrics from other hosts"
+            )
+        return
+    
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+@router.get("", dependencies=[Depends(verify_metrics_access)])
+async def get_metrics(db: AsyncSession = Depends(get_async_db)):
+    """API process metrics and queue depths (Prometheus text format)"""
+    return Response(content=await MetricsService.render(db), media_type=CONTENT_TYPE)
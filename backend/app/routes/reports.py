@@ -1,10 +1,10 @@
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from ..database import get_db
+from ..database import get_async_db
 from ..models.user import User
-from ..schemas.reports import UptimeHistoryItem, ResponseTimeItem, IncidentItem, PerformanceMetrics, ReportsData
+from ..schemas.reports import UptimeHistoryItem, ResponseTimeItem, PhaseTimingItem, IncidentItem, PerformanceMetrics, ReportsData
 from ..services.reports_service import ReportsService
 from .auth import get_current_user
 
@@ -14,40 +14,49 @@ router = APIRouter(prefix="/reports", tags=["reports"])
 async def get_uptime_history(
     days: int = Query(7, ge=1, le=30, description="Number of days to retrieve (1-30)"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get uptime history for the last N days"""
-    return ReportsService.get_uptime_history(db, current_user, days)
+    return await ReportsService.get_uptime_history(db, current_user, days)
 
 @router.get("/response-times", response_model=List[ResponseTimeItem])
 async def get_response_time_history(
     hours: int = Query(24, ge=6, le=168, description="Number of hours to retrieve (6-168)"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get response time trends for the last N hours"""
-    return ReportsService.get_response_time_history(db, current_user, hours)
+    return await ReportsService.get_response_time_history(db, current_user, hours)
+
+@router.get("/phase-timings", response_model=List[PhaseTimingItem])
+async def get_phase_timing_history(
+    hours: int = Query(24, ge=6, le=168, description="Number of hours to retrieve (6-168)"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get average probe phase timings (dns, connect, tls, ttfb, transfer) for the last N hours"""
+    return await ReportsService.get_phase_timing_history(db, current_user, hours)
 
 @router.get("/incidents", response_model=List[IncidentItem])
 async def get_incidents_by_day(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get incidents count for each day of the current week"""
-    return ReportsService.get_incidents_by_day(db, current_user)
+    return await ReportsService.get_incidents_by_day(db, current_user)
 
 @router.get("/metrics", response_model=PerformanceMetrics)
 async def get_performance_metrics(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get overall performance metrics for the last 30 days"""
-    return ReportsService.get_performance_metrics(db, current_user)
+    return await ReportsService.get_performance_metrics(db, current_user)
 
 @router.get("/", response_model=ReportsData)
 async def get_all_reports_data(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all reports data in one response"""
-    return ReportsService.get_all_reports_data(db, current_user)
\ No newline at end of file
+    return await ReportsService.get_all_reports_data(db, current_user)
\ No newline at end of file
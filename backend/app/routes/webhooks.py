@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from uuid import UUID
+
+from ..database import get_async_db
+from ..models.user import User
+from ..schemas.webhook import WebhookCreate, WebhookResponse, WebhookDeadLetterResponse
+from ..services.webhook_service import WebhookService
+from .auth import get_current_user
+
+router = APIRouter(prefix="/webhooks", tags=["webhooks"])
+
+@router.get("", response_model=List[WebhookResponse])
+@router.get("/", response_model=List[WebhookResponse])
+async def get_user_webhooks(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get the current user's webhook endpoints"""
+    return await WebhookService.get_user_webhooks(db, current_user)
+
+@router.post("", response_model=WebhookResponse)
+@router.post("/", response_model=WebhookResponse)
+async def create_webhook(
+    webhook_data: WebhookCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Add a webhook endpoint that receives monitor status changes"""
+    return await WebhookService.create_webhook(db, webhook_data, current_user)
+
+@router.delete("/{webhook_id}")
+async def delete_webhook(
+    webhook_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Delete a webhook endpoint with its queued and dead-lettered deliveries"""
+    await WebhookService.delete_webhook(db, webhook_id, current_user)
+    return {"message": "Webhook deleted successfully"}
+
+@router.get("/dead-letters", response_model=List[WebhookDeadLetterResponse])
+async def get_dead_letters(
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get deliveries that could not be delivered, newest first"""
+    return await WebhookService.get_dead_letters(db, current_user, limit)
+
+@router.post("/dead-letters/{dead_letter_id}/redrive")
+async def redrive_dead_letter(
+    dead_letter_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Queue a dead-lettered delivery again"""
+    delivery_id = await WebhookService.redrive_dead_letter(db, dead_letter_id, current_user)
+    return {"message": "Delivery queued", "delivery_id": delivery_id}
@@ -1,14 +1,40 @@
 # Job CRUD schemas
+import re
 from pydantic import BaseModel, HttpUrl, Field, validator
-from typing import Optional
+from typing import Optional, List, Literal
 from datetime import datetime
 from uuid import UUID
 
+class AssertionSpec(BaseModel):
+    """Content check on a 2xx response body"""
+    type: Literal["contains", "regex", "json"]
+    value: Optional[str] = Field(None, max_length=1000, description="Text, pattern, or expected JSON value")
+    path: Optional[str] = Field(None, max_length=200, description="Dotted JSON path (json assertions only)")
+    
+    @validator('value', always=True)
+    def validate_value(cls, v, values):
+        kind = values.get('type')
+        if kind in ("contains", "regex") and not v:
+            raise ValueError(f'A {kind} assertion needs a value')
+        if kind == "regex":
+            try:
+                re.compile(v)
+            except re.error as e:
+                raise ValueError(f'Invalid regex: {e}')
+        return v
+    
+    @validator('path', always=True)
+    def validate_path(cls, v, values):
+        if values.get('type') == "json" and not v:
+            raise ValueError('A json assertion needs a path')
+        return v
+
 class JobBase(BaseModel):
     url: HttpUrl
     interval: int = Field(..., description="Monitoring interval in minutes (5, 10, 15, 30, 60)")
     is_enabled: bool = True
     failure_threshold: int = Field(3, ge=1, le=10, description="Number of failures before alert (1-10)")
+    assertions: List[AssertionSpec] = Field(default_factory=list, max_length=5, description="Content checks (up to 5)")
     
     @validator('interval')
     def validate_interval(cls, v):
@@ -16,6 +42,10 @@ class JobBase(BaseModel):
         if v not in allowed_intervals:
             raise ValueError(f'Interval must be one of {allowed_intervals} minutes')
         return v
+    
+    @validator('assertions', pre=True)
+    def default_assertions(cls, v):
+        return v or []
 
 class JobCreate(JobBase):
     pass
@@ -25,6 +55,7 @@ class JobUpdate(BaseModel):
     interval: Optional[int] = Field(None, description="Monitoring interval in minutes (5, 10, 15, 30, 60)")
     is_enabled: Optional[bool] = None
     failure_threshold: Optional[int] = Field(None, ge=1, le=10, description="Number of failures before alert (1-10)")
+    assertions: Optional[List[AssertionSpec]] = Field(None, max_length=5, description="Content checks (up to 5)")
     
     @validator('interval')
     def validate_interval(cls, v):
@@ -1,6 +1,6 @@
 # Health log schemas
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime
 from uuid import UUID
 
@@ -11,6 +11,8 @@ class HealthLogResponse(BaseModel):
     is_healthy: bool
     error_message: Optional[str]
     checked_at: datetime
+    phase_timings: Optional[List[Optional[int]]] = None
+    bytes_read: Optional[int] = None
     job_id: UUID
     
     class Config:
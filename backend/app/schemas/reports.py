@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 
 class UptimeHistoryItem(BaseModel):
@@ -10,6 +10,14 @@ class ResponseTimeItem(BaseModel):
     time: str
     responseTime: float
 
+class PhaseTimingItem(BaseModel):
+    time: str
+    dns: Optional[float] = None
+    connect: Optional[float] = None
+    tls: Optional[float] = None
+    ttfb: Optional[float] = None
+    transfer: Optional[float] = None
+
 class IncidentItem(BaseModel):
     day: str
     incidents: int
@@ -23,5 +31,6 @@ class PerformanceMetrics(BaseModel):
 class ReportsData(BaseModel):
     uptimeHistory: List[UptimeHistoryItem]
     responseTimeHistory: List[ResponseTimeItem]
+    phaseTimingHistory: List[PhaseTimingItem] = []
     incidentsByDay: List[IncidentItem]
     metrics: PerformanceMetrics
\ No newline at end of file
@@ -0,0 +1,43 @@
+# Webhook schemas
+from pydantic import BaseModel, HttpUrl, Field, validator
+from typing import Optional, Dict, Any
+from datetime import datetime
+from uuid import UUID
+
+class WebhookCreate(BaseModel):
+    url: HttpUrl
+    kind: str = Field("json", description="Payload format: json or slack")
+    secret: Optional[str] = Field(None, description="Signs JSON payloads with HMAC-SHA256 (X-PingDaemon-Signature)")
+    is_active: bool = True
+    
+    @validator('kind')
+    def validate_kind(cls, v):
+        allowed_kinds = ['json', 'slack']
+        if v not in allowed_kinds:
+            raise ValueError(f'Kind must be one of {allowed_kinds}')
+        return v
+
+class WebhookResponse(BaseModel):
+    id: UUID
+    url: str
+    kind: str
+    is_active: bool
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class WebhookDeadLetterResponse(BaseModel):
+    id: UUID
+    webhook_id: UUID
+    job_id: Optional[UUID]
+    event: str
+    payload: Dict[str, Any]
+    attempts: int
+    last_error: Optional[str]
+    response_status: Optional[int]
+    created_at: datetime
+    dead_at: datetime
+    
+    class Config:
+        from_attributes = True
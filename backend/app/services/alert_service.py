@@ -4,7 +4,7 @@ from uuid import UUID
 from typing import Dict, Any
 
 from ..models.job import Job
-from ..models.log import HealthLog
+from .check_history_service import CheckHistoryService
 from ..workers.mailer import send_alert_email
 
 logger = logging.getLogger(__name__)
@@ -24,30 +24,23 @@ class AlertService:
         Returns:
             bool: True if alert should be sent
         """
-        # Get recent health logs to check failure count
-        recent_logs = db.query(HealthLog).filter(
-            HealthLog.job_id == job.id
-        ).order_by(HealthLog.checked_at.desc()).limit(job.failure_threshold).all()
+        # Get recent check outcomes to check failure count
+        recent_outcomes = CheckHistoryService.get_recent_outcomes(db, job.id, job.failure_threshold + 1)
         
-        # Must have enough logs to meet threshold
-        if len(recent_logs) < job.failure_threshold:
+        # Must have enough checks to meet threshold
+        if len(recent_outcomes) < job.failure_threshold:
             return False
         
-        # All recent logs must be failures
-        all_failures = all(not log.is_healthy for log in recent_logs)
+        # All recent checks must be failures
+        all_failures = all(not is_healthy for is_healthy in recent_outcomes[:job.failure_threshold])
         
         # Only send alert if we've just crossed the threshold
         # (to avoid spam on subsequent failures)
         if all_failures:
-            # Check if we have exactly threshold failures
-            # If we have more than threshold, check if the (threshold+1)th log was healthy
-            next_logs = db.query(HealthLog).filter(
-                HealthLog.job_id == job.id
-            ).order_by(HealthLog.checked_at.desc()).limit(job.failure_threshold + 1).all()
-            
-            if len(next_logs) == job.failure_threshold + 1:
-                # If the next log was healthy, this is the first time we hit threshold
-                return next_logs[-1].is_healthy
+            # If we have more than threshold, check if the (threshold+1)th check was healthy
+            if len(recent_outcomes) == job.failure_threshold + 1:
+                # If the next check was healthy, this is the first time we hit threshold
+                return recent_outcomes[-1]
             else:
                 # This is the first time we have enough failures
                 return True
@@ -1,4 +1,6 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from fastapi.concurrency import run_in_threadpool
 from fastapi import HTTPException, status
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
@@ -9,17 +11,18 @@ import string
 
 from ..models.user import User
 from ..schemas.user import UserCreate
-from ..utils.security import hash_password, verify_password, create_access_token
+from ..utils.security import hash_password_async, verify_and_update_password_async, create_access_token
+from ..utils.user_cache import user_cache
 from ..config import settings
 from ..email.resend_client import ResendClient
 
 class AuthService:
     
     @staticmethod
-    def create_user(db: Session, user_data: UserCreate) -> User:
+    async def create_user(db: AsyncSession, user_data: UserCreate) -> User:
         """Create a new user with hashed password"""
         # Check if user already exists
-        existing_user = db.query(User).filter(User.email == user_data.email).first()
+        existing_user = (await db.execute(select(User).where(User.email == user_data.email))).scalars().first()
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -27,25 +30,33 @@ class AuthService:
             )
         
         # Create new user
-        hashed_password = hash_password(user_data.password)
+        hashed_password = await hash_password_async(user_data.password)
         db_user = User(
             email=user_data.email,
             hashed_password=hashed_password
         )
         
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
         return db_user
     
     @staticmethod
-    def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
+    async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
         """Authenticate user with email and password"""
-        user = db.query(User).filter(User.email == email).first()
-        if not user:
+        user = (await db.execute(select(User).where(User.email == email))).scalars().first()
+        if not user or not user.hashed_password:
             return None
-        if not verify_password(password, user.hashed_password):
+        
+        is_valid, new_hash = await verify_and_update_password_async(password, user.hashed_password)
+        if not is_valid:
             return None
+        
+        # Rehash with the current bcrypt parameters
+        if new_hash:
+            user.hashed_password = new_hash
+            await db.commit()
+            user_cache.invalidate(user.id)
         return user
     
     @staticmethod
@@ -72,8 +83,8 @@ class AuthService:
             )
     
     @staticmethod
-    def get_current_user(db: Session, token: str) -> User:
-        """Get current user from JWT token"""
+    async def get_current_user(db: AsyncSession, token: str) -> User:
+        """Get current user from JWT token (served from the user cache when possible)"""
         payload = AuthService.verify_token(token)
         user_id = payload.get("sub")
         if user_id is None:
@@ -83,13 +94,22 @@ class AuthService:
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        user = db.query(User).filter(User.id == UUID(user_id)).first()
+        user_id = UUID(user_id)
+        exp = payload.get("exp")
+        
+        cached_user = user_cache.get(user_id, exp)
+        if cached_user is not None:
+            return cached_user
+        
+        user = (await db.execute(select(User).where(User.id == user_id))).scalars().first()
         if user is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="User not found",
                 headers={"WWW-Authenticate": "Bearer"},
             )
+        
+        user_cache.set(user, exp)
         return user
     
     @staticmethod
@@ -98,9 +118,9 @@ class AuthService:
         return ''.join(secrets.choice(string.ascii_letters + string.digits) for _ in range(32))
     
     @staticmethod
-    def request_password_reset(db: Session, email: str) -> bool:
+    async def request_password_reset(db: AsyncSession, email: str) -> bool:
         """Generate password reset token for user"""
-        user = db.query(User).filter(User.email == email).first()
+        user = (await db.execute(select(User).where(User.email == email))).scalars().first()
         if not user:
             # For security, don't reveal if email exists or not
             return True
@@ -112,12 +132,15 @@ class AuthService:
         # Update user with reset token
         user.reset_token = reset_token
         user.reset_token_expires = reset_expires
-        db.commit()
+        await db.commit()
+        user_cache.invalidate(user.id)
         
         # Send password reset email
         try:
             email_client = ResendClient()
-            result = email_client.send_password_reset_email(
+            # Resend's client is blocking, keep it off the event loop
+            result = await run_in_threadpool(
+                email_client.send_password_reset_email,
                 recipient_email=email,
                 recipient_name=email,  # Using email as name for now
                 reset_token=reset_token
@@ -135,19 +158,22 @@ class AuthService:
         return True
     
     @staticmethod
-    def verify_reset_token(db: Session, token: str) -> Optional[User]:
+    async def verify_reset_token(db: AsyncSession, token: str) -> Optional[User]:
         """Verify reset token and return user if valid"""
-        user = db.query(User).filter(
-            User.reset_token == token,
-            User.reset_token_expires > datetime.utcnow()
-        ).first()
+        result = await db.execute(
+            select(User).where(
+                User.reset_token == token,
+                User.reset_token_expires > datetime.utcnow()
+            )
+        )
+        user = result.scalars().first()
         
         return user
     
     @staticmethod
-    def reset_password(db: Session, token: str, new_password: str) -> bool:
+    async def reset_password(db: AsyncSession, token: str, new_password: str) -> bool:
         """Reset user password using token"""
-        user = AuthService.verify_reset_token(db, token)
+        user = await AuthService.verify_reset_token(db, token)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -155,9 +181,10 @@ class AuthService:
             )
         
         # Update password and clear reset token
-        user.hashed_password = hash_password(new_password)
+        user.hashed_password = await hash_password_async(new_password)
         user.reset_token = None
         user.reset_token_expires = None
-        db.commit()
+        await db.commit()
+        user_cache.invalidate(user.id)
         
         return True
\ No newline at end of file
@@ -0,0 +1,285 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, and_, func
+from typing import List, Dict, Any, Optional, Union
+from uuid import UUID
+
+from ..models.log import HealthLog
+from ..models.log_span import HealthLogSpan
+from ..probes.http import PHASES, pack_timings
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+class CheckHistoryService:
+    """
+    Storage and retrieval of health check history
+
+    In "full" mode every check becomes a HealthLog row. In "rle" mode only state
+    changes and latency anomalies get full rows; the checks that repeat the
+    previous outcome are appended to a HealthLogSpan. Rows and spans of a job
+    never overlap in time, so readers can merge them without double counting.
+    Spans keep only their bounds, count and running sums. They close at every
+    UTC hour, after a missed check and when the job interval changes, so a
+    span is a gapless run inside one hour and report windows on whole hours
+    never cut through one.
+    """
+
+    @staticmethod
+    def _as_utc(value: datetime) -> datetime:
+        """Treat naive datetimes as UTC so they compare with stored timestamps"""
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value
+
+    @staticmethod
+    def _utc_hour(value: datetime) -> datetime:
+        return CheckHistoryService._as_utc(value).astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+    @staticmethod
+    def _continues_span(span: HealthLogSpan, now: datetime, interval_minutes: Optional[int]) -> bool:
+        """A check may join an open span in the same UTC hour, at the same interval, with no check missed"""
+        if CheckHistoryService._utc_hour(span.first_checked_at) != CheckHistoryService._utc_hour(now):
+            return False
+        if interval_minutes is None:
+            return True
+        if span.interval_minutes != interval_minutes:
+            return False
+        max_gap = timedelta(minutes=interval_minutes) * settings.RLE_MAX_GAP_FACTOR
+        return CheckHistoryService._as_utc(now) - CheckHistoryService._as_utc(span.last_checked_at) <= max_gap
+
+    @staticmethod
+    def _signature(is_healthy: bool, status_code: Optional[int], error_message: Optional[str]) -> tuple:
+        return (is_healthy, status_code, error_message)
+
+    @staticmethod
+    def _is_latency_anomaly(baseline: Optional[float], response_time: Optional[float]) -> bool:
+        """A check is anomalous when it is much slower than the run it would join"""
+        if baseline is None or response_time is None or baseline <= 0:
+            return False
+        return response_time > baseline * settings.RLE_LATENCY_ANOMALY_FACTOR
+
+    @staticmethod
+    def record_check(
+        db: Session,
+        job_id: UUID,
+        check_result: Dict[str, Any],
+        interval_minutes: Optional[int] = None
+    ) -> Union[HealthLog, HealthLogSpan]:
+        """
+        Store a health check result using the configured storage mode
+
+        Args:
+            interval_minutes: Check interval of the job, used to close a span
+                after a missed check or an interval change
+        """
+        if settings.HEALTH_LOG_STORAGE_MODE != "rle":
+            return CheckHistoryService._add_health_log(db, job_id, check_result)
+
+        signature = CheckHistoryService._signature(
+            check_result['is_healthy'],
+            check_result['status_code'],
+            check_result['error_message']
+        )
+        response_time = check_result['response_time']
+
+        last_log = db.query(HealthLog).filter(
+            HealthLog.job_id == job_id
+        ).order_by(HealthLog.checked_at.desc()).first()
+
+        # The database clock stamps spans, as it does HealthLog rows
+        open_span, now = db.query(HealthLogSpan, func.now()).filter(
+            HealthLogSpan.job_id == job_id,
+            HealthLogSpan.is_open == True
+        ).order_by(HealthLogSpan.last_checked_at.desc()).first() or (None, None)
+
+        # Only a span that is newer than the last full row may be extended
+        if open_span and last_log and open_span.last_checked_at < last_log.checked_at:
+            open_span.is_open = False
+            open_span = None
+
+        if open_span:
+            span_signature = CheckHistoryService._signature(
+                open_span.is_healthy, open_span.status_code, open_span.error_message
+            )
+            span_mean = (
+                open_span.response_time_sum / open_span.response_time_count
+                if open_span.response_time_count else None
+            )
+            is_anomaly = CheckHistoryService._is_latency_anomaly(span_mean, response_time)
+            if (
+                span_signature == signature
+                and not is_anomaly
+                and open_span.check_count < settings.RLE_MAX_SPAN_CHECKS
+                and CheckHistoryService._continues_span(open_span, now, interval_minutes)
+            ):
+                open_span.last_checked_at = now
+                CheckHistoryService._add_to_aggregates(open_span, response_time, check_result.get('timings'))
+                db.commit()
+                return open_span
+
+            # Close the run; a full or finished (new hour, gap) span continues in a new one, anything else gets a full row
+            open_span.is_open = False
+            if span_signature == signature and not is_anomaly:
+                return CheckHistoryService._start_span(db, job_id, check_result, interval_minutes)
+            return CheckHistoryService._add_health_log(db, job_id, check_result)
+
+        if last_log:
+            log_signature = CheckHistoryService._signature(
+                last_log.is_healthy, last_log.status_code, last_log.error_message
+            )
+            if (
+                log_signature == signature
+                and not CheckHistoryService._is_latency_anomaly(last_log.response_time, response_time)
+            ):
+                return CheckHistoryService._start_span(db, job_id, check_result, interval_minutes)
+
+        return CheckHistoryService._add_health_log(db, job_id, check_result)
+
+    @staticmethod
+    def _add_health_log(db: Session, job_id: UUID, check_result: Dict[str, Any]) -> HealthLog:
+        health_log = HealthLog(
+            job_id=job_id,
+            status_code=check_result['status_code'],
+            response_time=check_result['response_time'],
+            is_healthy=check_result['is_healthy'],
+            error_message=check_result['error_message'],
+            phase_timings=pack_timings(check_result.get('timings')),
+            bytes_read=check_result.get('bytes_read')
+        )
+
+        db.add(health_log)
+        db.commit()
+        db.refresh(health_log)
+        return health_log
+
+    @staticmethod
+    def _start_span(
+        db: Session,
+        job_id: UUID,
+        check_result: Dict[str, Any],
+        interval_minutes: Optional[int] = None
+    ) -> HealthLogSpan:
+        span = HealthLogSpan(
+            job_id=job_id,
+            interval_minutes=interval_minutes,
+            status_code=check_result['status_code'],
+            is_healthy=check_result['is_healthy'],
+            error_message=check_result['error_message'],
+            check_count=0,
+            first_checked_at=func.now(),
+            last_checked_at=func.now(),
+            response_time_count=0,
+            response_time_sum=0.0,
+            phase_timing_count=0,
+            is_open=True
+        )
+        CheckHistoryService._add_to_aggregates(span, check_result['response_time'], check_result.get('timings'))
+
+        db.add(span)
+        db.commit()
+        return span
+
+    @staticmethod
+    def _add_to_aggregates(
+        span: HealthLogSpan,
+        response_time: Optional[float],
+        timings: Optional[Dict[str, Optional[float]]] = None
+    ) -> None:
+        span.check_count = (span.check_count or 0) + 1
+
+        if response_time is not None:
+            span.response_time_count = (span.response_time_count or 0) + 1
+            span.response_time_sum = (span.response_time_sum or 0.0) + response_time
+
+        if timings:
+            sums = span.phase_timing_sums or [0.0] * len(PHASES)
+            span.phase_timing_sums = [total + (timings.get(phase) or 0.0) for total, phase in zip(sums, PHASES)]
+            span.phase_timing_count = (span.phase_timing_count or 0) + 1
+
+    @staticmethod
+    def get_recent_outcomes(db: Session, job_id: UUID, limit: int) -> List[bool]:
+        """
+        Get is_healthy of the most recent checks, newest first
+
+        Merges full rows and spans so threshold logic sees the same sequence in
+        either storage mode.
+        """
+        recent_logs = db.query(HealthLog.is_healthy, HealthLog.checked_at).filter(
+            HealthLog.job_id == job_id
+        ).order_by(HealthLog.checked_at.desc()).limit(limit).all()
+
+        recent_spans = db.query(
+            HealthLogSpan.is_healthy, HealthLogSpan.check_count, HealthLogSpan.last_checked_at
+        ).filter(
+            HealthLogSpan.job_id == job_id
+        ).order_by(HealthLogSpan.last_checked_at.desc()).limit(limit).all()
+
+        if not recent_spans:
+            return [log.is_healthy for log in recent_logs]
+
+        entries = [(CheckHistoryService._as_utc(log.checked_at), log.is_healthy, 1) for log in recent_logs]
+        entries += [(CheckHistoryService._as_utc(span.last_checked_at), span.is_healthy, span.check_count) for span in recent_spans]
+        entries.sort(key=lambda entry: entry[0], reverse=True)
+
+        outcomes = []
+        for _, is_healthy, count in entries:
+            outcomes.extend([is_healthy] * count)
+            if len(outcomes) >= limit:
+                break
+
+        return outcomes[:limit]
+
+    @staticmethod
+    async def get_span_stats(
+        db: AsyncSession,
+        job_ids: List[UUID],
+        start: datetime,
+        end: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """
+        Aggregate the spans whose first check falls inside [start, end)
+
+        Spans never cross a UTC hour, so a window whose bounds are whole UTC
+        hours holds every check of the spans it selects and none of the others.
+        """
+        stats = {
+            'total': 0,
+            'healthy': 0,
+            'unhealthy': 0,
+            'response_time_sum': 0.0,
+            'response_time_count': 0,
+            'phase_timing_sums': [0.0] * len(PHASES),
+            'phase_timing_count': 0
+        }
+        if not job_ids:
+            return stats
+
+        filters = [
+            HealthLogSpan.job_id.in_(job_ids),
+            HealthLogSpan.first_checked_at >= start
+        ]
+        if end is not None:
+            filters.append(HealthLogSpan.first_checked_at < end)
+
+        spans = (await db.execute(select(HealthLogSpan).where(and_(*filters)))).scalars().all()
+
+        for span in spans:
+            stats['total'] += span.check_count
+            if span.is_healthy:
+                stats['healthy'] += span.check_count
+            else:
+                stats['unhealthy'] += span.check_count
+            stats['response_time_sum'] += span.response_time_sum
+            stats['response_time_count'] += span.response_time_count
+
+            if span.phase_timing_count:
+                stats['phase_timing_count'] += span.phase_timing_count
+                stats['phase_timing_sums'] = [
+                    total + phase_sum
+                    for total, phase_sum in zip(stats['phase_timing_sums'], span.phase_timing_sums)
+                ]
+
+        return stats
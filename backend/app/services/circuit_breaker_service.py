@@ -0,0 +1,162 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.orm import Session
+from sqlalchemy import select, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+from typing import Dict, Any, Iterable, Optional
+
+from ..models.probe_circuit import ProbeCircuit
+from ..probes.tcp import tcp_connect
+from ..utils.metrics import CIRCUIT_TRANSITIONS_TOTAL, CIRCUIT_SKIPPED_PROBES_TOTAL
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# What a sweep does with a target
+PROBE = "probe"  # full HTTP probe
+TCP_PROBE = "tcp"  # circuit open: TCP connect first, full probe only if it connects
+SKIP = "skip"  # circuit open and backing off
+
+class CircuitBreakerService:
+    """
+    Per-target circuit breaker for the check sweeps
+
+    A target whose probes keep failing without a response (connection errors,
+    timeouts) for CIRCUIT_FAILURE_THRESHOLD probes over at least
+    CIRCUIT_MIN_FAILING_SECONDS opens its circuit. Sweeps then probe it with a
+    short TCP connect instead of a full HTTP request that would wait out the
+    timeout, and only every backoff (doubling up to
+    CIRCUIT_MAX_BACKOFF_SECONDS). The first connect that succeeds closes the
+    circuit and the full probe runs at once.
+
+    A tick is only skipped if the next tick still lands within
+    CIRCUIT_MAX_RECOVERY_DELAY_SECONDS of the last probe, so a recovery is
+    never hidden for longer than that. Skipped jobs keep their status, so
+    they stay reported as down.
+    """
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return settings.CIRCUIT_FAILURE_THRESHOLD > 0
+
+    @staticmethod
+    def load(db: Session, targets: Iterable[str]) -> Dict[str, ProbeCircuit]:
+        """Circuits of the given targets that are tracking failures"""
+        targets = list(targets)
+        if not targets or not CircuitBreakerService.is_enabled():
+            return {}
+        return {
+            circuit.target: circuit
+            for circuit in db.scalars(select(ProbeCircuit).where(ProbeCircuit.target.in_(targets)))
+        }
+
+    @staticmethod
+    def plan(circuit: Optional[ProbeCircuit], interval_minutes: int, now: datetime) -> str:
+        """Decide how this tick probes a target (PROBE, TCP_PROBE or SKIP)"""
+        if circuit is None or circuit.state != "open":
+            return PROBE
+
+        next_tick = now + timedelta(minutes=interval_minutes)
+        recovery_deadline = circuit.last_probed_at + timedelta(seconds=settings.CIRCUIT_MAX_RECOVERY_DELAY_SECONDS)
+        if circuit.next_probe_at and now < circuit.next_probe_at and next_tick <= recovery_deadline:
+            CIRCUIT_SKIPPED_PROBES_TOTAL.inc()
+            return SKIP
+        return TCP_PROBE
+
+    @staticmethod
+    def probe_open_target(target: str, full_probe) -> Any:
+        """Probe an open-circuit target: full_probe() only runs if a TCP connect succeeds"""
+        reachability = tcp_connect(target, settings.CIRCUIT_TCP_TIMEOUT_SECONDS)
+        if reachability['is_healthy']:
+            return full_probe()
+        reachability['error_message'] = f"Circuit open: {reachability['error_message']}"
+        return reachability, datetime.now(timezone.utc)
+
+    @staticmethod
+    def is_unreachable(check_result: Dict[str, Any]) -> bool:
+        """Failed without any HTTP response: the failures the breaker is for"""
+        return not check_result['is_healthy'] and check_result['status_code'] is None
+
+    @staticmethod
+    def record(
+        db: Session,
+        target: str,
+        circuit: Optional[ProbeCircuit],
+        check_result: Dict[str, Any],
+        now: datetime
+    ) -> Optional[ProbeCircuit]:
+        """
+        Update a target's circuit with a probe outcome (caller commits)
+
+        Runs in a savepoint. Another sweep that probed the same target at the
+        same time may insert, update or delete the row first; that sweep's
+        outcome is kept and the rest of this sweep goes on.
+
+        Returns:
+            The circuit, or None once the target is reachable again
+        """
+        if not CircuitBreakerService.is_enabled():
+            return None
+
+        try:
+            with db.begin_nested():
+                return CircuitBreakerService._apply_outcome(db, target, circuit, check_result, now)
+        except (IntegrityError, StaleDataError):
+            logger.info(f"Circuit for {target} was updated by a concurrent sweep, keeping its state")
+            return None
+
+    @staticmethod
+    def _apply_outcome(
+        db: Session,
+        target: str,
+        circuit: Optional[ProbeCircuit],
+        check_result: Dict[str, Any],
+        now: datetime
+    ) -> Optional[ProbeCircuit]:
+        if not CircuitBreakerService.is_unreachable(check_result):
+            if circuit is not None:
+                if circuit.state == "open":
+                    CIRCUIT_TRANSITIONS_TOTAL.labels("closed").inc()
+                    logger.info(f"🟢 Circuit closed for {target} after {circuit.consecutive_failures} unreachable probes")
+                db.delete(circuit)
+            return None
+
+        if circuit is None:
+            circuit = ProbeCircuit(target=target, state="closed", consecutive_failures=0, first_failure_at=now)
+            db.add(circuit)
+
+        circuit.consecutive_failures += 1
+        circuit.last_error = check_result['error_message']
+        circuit.last_probed_at = now
+
+        if circuit.state == "open":
+            circuit.backoff_seconds = min(circuit.backoff_seconds * 2, settings.CIRCUIT_MAX_BACKOFF_SECONDS)
+        elif (
+            circuit.consecutive_failures >= settings.CIRCUIT_FAILURE_THRESHOLD
+            and (now - circuit.first_failure_at).total_seconds() >= settings.CIRCUIT_MIN_FAILING_SECONDS
+        ):
+            circuit.state = "open"
+            circuit.opened_at = now
+            circuit.backoff_seconds = min(settings.CIRCUIT_BASE_BACKOFF_SECONDS, settings.CIRCUIT_MAX_BACKOFF_SECONDS)
+            CIRCUIT_TRANSITIONS_TOTAL.labels("open").inc()
+            logger.warning(
+                f"🔌 Circuit opened for {target}: {circuit.consecutive_failures} unreachable probes "
+                f"since {circuit.first_failure_at.isoformat()}"
+            )
+
+        if circuit.state == "open":
+            circuit.next_probe_at = now + timedelta(seconds=circuit.backoff_seconds)
+        return circuit
+
+    @staticmethod
+    def cleanup_stale(db: Session, days: int = 7) -> int:
+        """Delete circuits of targets that haven't been probed for `days` (monitor removed or changed)"""
+        deleted = db.execute(
+            delete(ProbeCircuit)
+            .where(ProbeCircuit.last_probed_at < datetime.now(timezone.utc) - timedelta(days=days))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        logger.info(f"Cleaned up {deleted} stale probe circuits")
+        return deleted
@@ -1,9 +1,11 @@
 import logging
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
+from sqlalchemy import func
 from typing import Dict, Any
 
 from ..models.log import HealthLog
+from ..models.log_span import HealthLogSpan
 from ..models.email_queue import EmailQueue
 
 logger = logging.getLogger(__name__)
@@ -31,7 +33,12 @@ class DataRetentionService:
                 HealthLog.checked_at < cutoff_date
             ).count()
             
-            if old_logs_count == 0:
+            # Spans are removed once their newest check falls out of retention
+            old_spans_count = db.query(HealthLogSpan).filter(
+                HealthLogSpan.last_checked_at < cutoff_date
+            ).count()
+            
+            if old_logs_count == 0 and old_spans_count == 0:
                 logger.info("No old health logs to clean up")
                 return {
                     'success': True,
@@ -44,13 +51,19 @@ class DataRetentionService:
                 HealthLog.checked_at < cutoff_date
             ).delete(synchronize_session=False)
             
+            deleted_spans = db.query(HealthLogSpan).filter(
+                HealthLogSpan.last_checked_at < cutoff_date
+            ).delete(synchronize_session=False)
+            
             db.commit()
             
-            logger.info(f"Cleaned up {deleted} health logs older than {days_to_keep} days")
+            logger.info(f"Cleaned up {deleted} health logs and {deleted_spans} health log spans older than {days_to_keep} days")
             
             return {
                 'success': True,
-                'deleted_count': deleted,
+                'deleted_count': deleted + deleted_spans,
+                'deleted_logs': deleted,
+                'deleted_spans': deleted_spans,
                 'cutoff_date': cutoff_date.isoformat(),
                 'days_kept': days_to_keep,
                 'message': f'Successfully deleted {deleted} old health logs'
@@ -136,12 +149,25 @@ class DataRetentionService:
                 HealthLog.checked_at > datetime.utcnow() - timedelta(days=7)
             ).count()
             
+            # Count health log spans and the checks they hold
+            total_health_log_spans = db.query(HealthLogSpan).count()
+            total_span_checks = db.query(func.coalesce(func.sum(HealthLogSpan.check_count), 0)).scalar()
+            
             # Count email queue
             total_emails = db.query(EmailQueue).count()
             pending_emails = db.query(EmailQueue).filter(
                 EmailQueue.status == "pending"
             ).count()
             
+            # Enqueue-to-send latency of emails sent in the last 24 hours
+            send_latency_avg, send_latency_max = db.query(
+                func.avg(func.extract("epoch", EmailQueue.processed_at - EmailQueue.created_at)),
+                func.max(func.extract("epoch", EmailQueue.processed_at - EmailQueue.created_at))
+            ).filter(
+                EmailQueue.status == "sent",
+                EmailQueue.processed_at > datetime.utcnow() - timedelta(days=1)
+            ).one()
+            
             # Get oldest records
             oldest_health_log = db.query(HealthLog).order_by(
                 HealthLog.checked_at.asc()
@@ -157,9 +183,17 @@ class DataRetentionService:
                     'last_7_days': recent_health_logs,
                     'oldest_date': oldest_health_log.checked_at.isoformat() if oldest_health_log else None
                 },
+                'health_log_spans': {
+                    'total': total_health_log_spans,
+                    'checks': total_span_checks
+                },
                 'email_queue': {
                     'total': total_emails,
                     'pending': pending_emails,
+                    'enqueue_to_send_seconds_24h': {
+                        'avg': round(float(send_latency_avg), 3) if send_latency_avg is not None else None,
+                        'max': round(float(send_latency_max), 3) if send_latency_max is not None else None
+                    },
                     'oldest_date': oldest_email.created_at.isoformat() if oldest_email else None
                 },
                 'collected_at': datetime.utcnow().isoformat()
@@ -1,19 +1,46 @@
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from sqlalchemy import select, update, func, and_, case, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from typing import List, Dict, Any, Optional
 from uuid import UUID
-import html
+import time
 
 from ..models.email_queue import EmailQueue
 from ..models.job import Job
 from ..models.user import User
+from ..email.templates import STATUS_CHANGE_TEMPLATE, status_change_subject
 from ..config import settings
+from ..utils.metrics import ALERT_LATENCY_SECONDS
 
 logger = logging.getLogger(__name__)
 
+# Monotonic times at which dispatcher wake-ups sent from this process will run
+_pending_wakes: List[float] = []
+
 class EmailQueueService:
     
+    @staticmethod
+    def get_dedup_key(job: Job, previous_status: str, current_status: str, now: datetime = None) -> str:
+        """
+        Deterministic deduplication key for a status change alert
+        
+        The first status of a monitor (unknown → anything) gets one activation
+        key for its lifetime; other transitions are keyed per fixed
+        EMAIL_DEDUP_WINDOW_MINUTES window. Windows are counted in UTC whatever
+        the process time zone; a naive ``now`` is taken to be UTC.
+        """
+        if previous_status == "unknown":
+            return f"{job.id}:activation"
+        
+        now = now or datetime.now(timezone.utc)
+        if now.tzinfo is None:
+            now = now.replace(tzinfo=timezone.utc)
+        window_seconds = settings.EMAIL_DEDUP_WINDOW_MINUTES * 60
+        window_index = int(now.timestamp()) // window_seconds
+        return f"{job.id}:{previous_status}>{current_status}:{window_index}"
+    
     @staticmethod
     def queue_status_change_alert(
         db: Session,
@@ -21,209 +48,175 @@ class EmailQueueService:
         user: User,
         previous_status: str,
         current_status: str,
-        error_message: str = None
-    ) -> EmailQueue:
+        error_message: str = None,
+        probe_completed_at: datetime = None,
+        status_committed_at: datetime = None
+    ) -> Optional[UUID]:
         """
         Queue an email alert for status change with deduplication
         
-        Prevents duplicate emails for the same status change within a time window
-        """
+        Uses INSERT ... ON CONFLICT DO NOTHING on the unique dedup_key index,
+        so a duplicate costs one indexed write and no lookup. Alerts that follow
+        another one for the same user are held for the digest window.
         
-        # DEDUPLICATION: Check for recent duplicate emails
-        duplicate_window_minutes = 5  # Don't send duplicate emails within 5 minutes
-        cutoff_time = datetime.utcnow() - timedelta(minutes=duplicate_window_minutes)
-        
-        # Generate email subject for comparison
-        subject, _, _ = EmailQueueService._get_status_change_email_content(
-            job, previous_status, current_status, error_message
-        )
+        Args:
+            probe_completed_at: When the check that caused the change finished
+            status_committed_at: When the new job status was committed
         
-        # Check if we already sent this type of email recently
-        existing_email = db.query(EmailQueue).filter(
-            EmailQueue.job_id == job.id,
-            EmailQueue.recipient_email == user.email,
-            EmailQueue.subject == subject,
-            EmailQueue.created_at >= cutoff_time,
-            EmailQueue.status.in_(["pending", "processing", "sent"])
-        ).first()
-        
-        if existing_email:
-            logger.info(f"🚫 DUPLICATE EMAIL PREVENTED: {previous_status} → {current_status} for job {job.id} (recent email: {existing_email.id})")
-            return existing_email
-        
-        # Generate full email content
-        subject, html_content, text_content = EmailQueueService._get_status_change_email_content(
-            job, previous_status, current_status, error_message
-        )
+        Returns:
+            ID of the queued email, or None if an equivalent alert already exists
+        """
+        dedup_key = EmailQueueService.get_dedup_key(job, previous_status, current_status)
         
-        # Create email queue entry
-        email_queue = EmailQueue(
-            recipient_email=user.email,
-            recipient_name=user.email,
-            subject=subject,
-            html_content=html_content,
-            text_content=text_content,
-            job_id=job.id,
-            user_id=user.id,
-            status="pending"
-        )
+        # Store a template reference; the body is rendered when the batch is sent
+        template_params = {
+            'job_url': job.url,
+            'job_interval': job.interval,
+            'failure_threshold': job.failure_threshold,
+            'previous_status': previous_status,
+            'current_status': current_status,
+            'error_message': error_message,
+            'detected_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S UTC")
+        }
+        subject = status_change_subject(template_params)
+        scheduled_at = EmailQueueService.get_digest_schedule(db, user.id)
         
-        db.add(email_queue)
+        # Create email queue entry unless the dedup key is already taken
+        email_queue_id = db.execute(
+            pg_insert(EmailQueue)
+            .values(
+                recipient_email=user.email,
+                recipient_name=user.email,
+                subject=subject,
+                template_id=STATUS_CHANGE_TEMPLATE,
+                template_params=template_params,
+                job_id=job.id,
+                user_id=user.id,
+                status="pending",
+                dedup_key=dedup_key,
+                probe_completed_at=probe_completed_at,
+                status_committed_at=status_committed_at,
+                **({'scheduled_at': scheduled_at} if scheduled_at else {})
+            )
+            .on_conflict_do_nothing(
+                index_elements=[EmailQueue.dedup_key],
+                index_where=and_(EmailQueue.dedup_key.isnot(None), EmailQueue.status != "failed")
+            )
+            .returning(EmailQueue.id)
+        ).scalar()
         db.commit()
-        db.refresh(email_queue)
+        
+        if email_queue_id is None:
+            logger.info(f"🚫 DUPLICATE EMAIL PREVENTED: {previous_status} → {current_status} for job {job.id} (dedup key: {dedup_key})")
+            return None
         
         logger.info(f"📧 Email queued: {previous_status} → {current_status} for job {job.id} ({user.email})")
         
-        return email_queue
+        # A held digest needs a wake-up when its window ends, not now
+        hold_seconds = (scheduled_at - datetime.now(timezone.utc)).total_seconds() if scheduled_at else 0
+        EmailQueueService.wake_dispatcher(countdown=hold_seconds)
+        
+        return email_queue_id
     
     @staticmethod
-    def _get_status_change_email_content(
-        job: Job, 
-        previous_status: str, 
-        current_status: str, 
-        error_message: str = None
-    ) -> tuple:
+    def get_digest_schedule(db: Session, user_id: UUID) -> Optional[datetime]:
         """
-        Generate spam-optimized email content for any status change
+        When a new alert for a user should be sent
         
-        Handles all possible status transitions including:
-        - unknown → healthy (new monitor success)
-        - unknown → unhealthy (new monitor failure) 
-        - healthy → unhealthy (service went down)
-        - unhealthy → healthy (service restored)
+        The first alert in a window goes out immediately (None keeps the
+        default of now). Later alerts join the digest already being held for
+        the user, or start one that is sent ALERT_DIGEST_WINDOW_SECONDS from now.
         """
+        window_seconds = settings.ALERT_DIGEST_WINDOW_SECONDS
+        if window_seconds <= 0:
+            return None
         
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S UTC")
+        held_until, recent_count = db.execute(
+            select(
+                func.max(case(
+                    (and_(EmailQueue.status == "pending", EmailQueue.scheduled_at > func.now()), EmailQueue.scheduled_at)
+                )),
+                func.count(EmailQueue.id)
+            ).where(
+                EmailQueue.user_id == user_id,
+                EmailQueue.template_id == STATUS_CHANGE_TEMPLATE,
+                EmailQueue.created_at >= func.now() - timedelta(seconds=window_seconds)
+            )
+        ).one()
         
-        # Handle all status transition scenarios with visual indicators
-        if previous_status == 'unknown' and current_status == 'unhealthy':
-            # New monitor failed its first check
-            subject = f"Monitor Issue: {job.url}"
-            status_text = "INITIAL CHECK FAILED"
-            intro_text = "Your website monitoring detected an accessibility issue."
-            status_icon = "🚨"  # Red siren for unhealthy
-            status_color = "#dc3545"  # Bootstrap danger red
-            
-        elif previous_status == 'unknown' and current_status == 'healthy':
-            # New monitor passed its first check
-            subject = f"Monitor Online: {job.url}"
-            status_text = "MONITOR ACTIVE"
-            intro_text = "Your website monitoring has been successfully activated."
-            status_icon = "✅"  # Green checkmark for healthy
-            status_color = "#28a745"  # Bootstrap success green
-            
-        elif previous_status == 'healthy' and current_status == 'unhealthy':
-            # Existing healthy service went down
-            subject = f"Service Down: {job.url}"
-            status_text = "SERVICE DOWN"
-            intro_text = "Your monitored website is currently experiencing issues."
-            status_icon = "🚨"  # Red siren for unhealthy
-            status_color = "#dc3545"  # Bootstrap danger red
-            
-        elif previous_status == 'unhealthy' and current_status == 'healthy':
-            # Service recovered from downtime
-            subject = f"Service Restored: {job.url}"
-            status_text = "SERVICE RESTORED"
-            intro_text = "Your monitored website has returned to normal operation."
-            status_icon = "✅"  # Green checkmark for healthy
-            status_color = "#28a745"  # Bootstrap success green
-            
-        elif current_status == 'healthy':
-            # Any other transition to healthy
-            subject = f"Service Online: {job.url}"
-            status_text = "SERVICE ONLINE" 
-            intro_text = "Your monitored website is online and healthy."
-            status_icon = "✅"  # Green checkmark for healthy
-            status_color = "#28a745"  # Bootstrap success green
-            
-        elif current_status == 'unhealthy':
-            # Any other transition to unhealthy
-            subject = f"Service Down: {job.url}"
-            status_text = "SERVICE DOWN"
-            intro_text = "Your monitored website is currently experiencing issues."
-            status_icon = "🚨"  # Red siren for unhealthy
-            status_color = "#dc3545"  # Bootstrap danger red
-            
-        else:
-            # Generic status change fallback
-            subject = f"Status Update: {job.url}"
-            status_text = f"{previous_status.upper()} TO {current_status.upper()}"
-            intro_text = "Your monitored website status has changed."
-            status_icon = "⚪"  # White circle for unknown
-            status_color = "#6c757d"  # Bootstrap secondary gray
-        
-        # HTML email content with visual status icons
-        html_content = f"""
-        <div style="max-width: 600px; margin: 0 auto; font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-            <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0;">
-                <h1 style="margin: 0; font-size: 24px;">Website Monitoring Update</h1>
-                <p style="margin: 10px 0 0; opacity: 0.9;">PingDaemon Monitoring Service</p>
-            </div>
-            
-            <div style="background: white; padding: 40px; border-radius: 0 0 10px 10px; box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);">
-                <div style="text-align: center; margin-bottom: 30px;">
-                    <div style="font-size: 32px; margin-bottom: 10px;">{status_icon}</div>
-                    <h2 style="color: {status_color}; margin: 0; font-size: 20px;">{status_text}</h2>
-                    <p style="margin: 10px 0 0; color: #6c757d;">{intro_text}</p>
-                </div>
-                
-                <div style="background: #f8f9fa; padding: 20px; border-radius: 8px; margin: 20px 0;">
-                    <p style="margin: 0 0 10px;"><strong>Website:</strong> <a href="{html.escape(job.url)}" style="color: #667eea;">{html.escape(job.url)}</a></p>
-                    <p style="margin: 0 0 10px;"><strong>Previous Status:</strong> {previous_status.title()}</p>
-                    <p style="margin: 0 0 10px;"><strong>Current Status:</strong> {current_status.title()}</p>
-                    <p style="margin: 0 0 10px;"><strong>Check Frequency:</strong> Every {job.interval} minutes</p>
-                    <p style="margin: 0;"><strong>Failure Threshold:</strong> {job.failure_threshold} consecutive failures</p>
-                </div>
-                
-                {f'<div style="background: #fee; padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #f56565;"><p style="margin: 0; color: #c53030;"><strong>Error Details:</strong> {html.escape(error_message)}</p></div>' if error_message else ''}
-                
-                {f'<div style="background: #f0fff4; padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #38a169;"><p style="margin: 0; color: #2f855a;"><strong>Monitoring Started!</strong> We will now check your service every {job.interval} minutes and notify you of any changes.</p></div>' if previous_status == 'unknown' and current_status == 'healthy' else ''}
-                
-                {f'<div style="background: #fff5f5; padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #f56565;"><p style="margin: 0; color: #c53030;"><strong>Monitor Setup Complete</strong> Your monitor is now active, but the initial check detected an issue. Please verify your service is accessible.</p></div>' if previous_status == 'unknown' and current_status == 'unhealthy' else ''}
-                
-                <div style="text-align: center; margin: 20px 0; padding: 10px; background: #f5f5f5; border-radius: 5px;">
-                    <p style="margin: 0; color: #666; font-size: 12px;">
-                        You're receiving this because you have active monitors on PingDaemon.<br>
-                        <a href="{settings.FRONTEND_URL}/settings" style="color: #667eea;">Manage notification preferences</a>
-                    </p>
-                </div>
-                
-                <p style="text-align: center; margin: 30px 0 0; color: #6c757d; font-size: 14px;">
-                    Status change detected at {timestamp}<br>
-                    <a href="{settings.FRONTEND_URL}/monitors" style="color: #667eea;">View Dashboard</a>
-                </p>
-            </div>
-        </div>
-        """
-        
-        # Plain text email content with status icon
-        text_content = f"""
-        Website Monitoring Update - PingDaemon
-        
-        {status_icon} {status_text}
-        
-        {intro_text}
-        
-        Website: {job.url}
-        Previous Status: {previous_status.title()}
-        Current Status: {current_status.title()}
-        Check Frequency: Every {job.interval} minutes
-        Failure Threshold: {job.failure_threshold} consecutive failures
-        
-        {f'Error Details: {error_message}' if error_message else ''}
+        if held_until is not None:
+            return held_until
+        if recent_count:
+            return datetime.now(timezone.utc) + timedelta(seconds=window_seconds)
+        return None
+    
+    @staticmethod
+    def count_recent_sends(db: Session, user_ids: List[UUID]) -> Dict[UUID, int]:
+        """Emails (a digest counts once) sent to each user within the digest window"""
+        if not user_ids:
+            return {}
         
-        {f'Monitoring Started! We will now check your service every {job.interval} minutes and notify you of any changes.' if previous_status == 'unknown' and current_status == 'healthy' else ''}
+        delivery_id = func.coalesce(EmailQueue.digest_id, EmailQueue.id)
+        rows = db.execute(
+            select(EmailQueue.user_id, func.count(func.distinct(delivery_id)))
+            .where(
+                EmailQueue.user_id.in_(user_ids),
+                EmailQueue.status == "sent",
+                EmailQueue.processed_at >= func.now() - timedelta(seconds=settings.ALERT_DIGEST_WINDOW_SECONDS)
+            )
+            .group_by(EmailQueue.user_id)
+        ).all()
+        return {user_id: count for user_id, count in rows}
+    
+    @staticmethod
+    def defer_emails(db: Session, email_ids: List[UUID], delay_seconds: float) -> int:
+        """Return claimed emails to the queue without using up an attempt, waking the dispatcher when they are due"""
+        if not email_ids:
+            return 0
         
-        {f'Monitor Setup Complete: Your monitor is now active, but the initial check detected an issue. Please verify your service is accessible.' if previous_status == 'unknown' and current_status == 'unhealthy' else ''}
+        deferred = db.execute(
+            update(EmailQueue)
+            .where(EmailQueue.id.in_(email_ids))
+            .values(
+                status="pending",
+                attempts=func.greatest(EmailQueue.attempts - 1, 0),
+                claimed_at=None,
+                scheduled_at=func.now() + timedelta(seconds=delay_seconds)
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
         
-        Status change detected at {timestamp}
-        View Dashboard: {settings.FRONTEND_URL}/monitors
+        if deferred:
+            EmailQueueService.wake_dispatcher(countdown=delay_seconds)
+        return deferred
+    
+    @staticmethod
+    def wake_dispatcher(countdown: float = 0) -> None:
+        """
+        Trigger an email batch once queued rows are due
         
-        You're receiving this because you have active monitors on PingDaemon.
-        Manage preferences: {settings.FRONTEND_URL}/settings
+        The batch runs EMAIL_WAKE_DELAY_SECONDS after ``countdown`` (the time
+        until held or deferred rows are due). A process sends at most one
+        wake-up per delay window of run time, so an outage storm that queues
+        hundreds of alerts wakes the dispatcher a handful of times, not once per row.
         """
+        delay = settings.EMAIL_WAKE_DELAY_SECONDS
+        countdown = max(countdown, 0) + delay
+        now = time.monotonic()
+        run_at = now + countdown
+        
+        _pending_wakes[:] = [at for at in _pending_wakes if at > now]
+        if any(abs(run_at - at) < delay for at in _pending_wakes):
+            return
+        _pending_wakes.append(run_at)
         
-        return subject, html_content, text_content
+        try:
+            from ..workers.email_batch import dispatch_email_batches
+            dispatch_email_batches.apply_async(args=(settings.EMAIL_BATCH_SIZE,), countdown=countdown)
+        except Exception as e:
+            # The safety-net poll will still pick the email up
+            logger.warning(f"⚠️ Failed to wake email dispatcher: {str(e)}")
     
     @staticmethod
     def get_pending_emails(db: Session, limit: int = 2) -> List[EmailQueue]:
@@ -234,6 +227,76 @@ class EmailQueueService:
             EmailQueue.scheduled_at <= datetime.utcnow()
         ).order_by(EmailQueue.scheduled_at).limit(limit).all()
     
+    @staticmethod
+    def claim_pending_emails(db: Session, limit: int = 2) -> List[EmailQueue]:
+        """
+        Atomically claim due pending emails for this worker
+        
+        Runs UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED) RETURNING,
+        so concurrent dispatchers never receive the same row. Claimed rows are
+        "processing" with a lease that starts at claimed_at.
+        """
+        claimable_ids = select(EmailQueue.id).where(
+            EmailQueue.status == "pending",
+            EmailQueue.attempts < EmailQueue.max_attempts,
+            EmailQueue.scheduled_at <= func.now()
+        ).order_by(EmailQueue.scheduled_at, EmailQueue.user_id).limit(limit).with_for_update(skip_locked=True)
+        
+        claimed = db.scalars(
+            update(EmailQueue)
+            .where(EmailQueue.id.in_(claimable_ids.scalar_subquery()))
+            .values(
+                status="processing",
+                attempts=EmailQueue.attempts + 1,
+                claimed_at=func.now(),
+                first_claimed_at=func.coalesce(EmailQueue.first_claimed_at, func.now())
+            )
+            .returning(EmailQueue),
+            execution_options={"synchronize_session": False}
+        ).all()
+        
+        # Detach before commit so the returned values aren't expired and reloaded row by row
+        for email in claimed:
+            db.expunge(email)
+        db.commit()
+        
+        return sorted(claimed, key=lambda email: email.scheduled_at)
+    
+    @staticmethod
+    def release_expired_claims(db: Session, lease_seconds: int = None) -> int:
+        """Return "processing" rows whose lease expired (crashed worker) to the queue"""
+        lease_seconds = lease_seconds or settings.EMAIL_CLAIM_LEASE_SECONDS
+        lease_cutoff = func.now() - timedelta(seconds=lease_seconds)
+        expired = and_(
+            EmailQueue.status == "processing",
+            EmailQueue.claimed_at < lease_cutoff
+        )
+        
+        # Rows that used up their attempts fail instead of being retried
+        failed = db.execute(
+            update(EmailQueue)
+            .where(expired, EmailQueue.attempts >= EmailQueue.max_attempts)
+            .values(
+                status="failed",
+                processed_at=func.now(),
+                claimed_at=None,
+                error_message="Claim lease expired"
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        
+        released = db.execute(
+            update(EmailQueue)
+            .where(expired)
+            .values(status="pending", claimed_at=None)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        
+        if failed or released:
+            logger.warning(f"⏰ Expired email claims: {released} returned to queue, {failed} marked failed")
+        return released + failed
+    
     @staticmethod
     def mark_email_processing(db: Session, email_id: UUID) -> EmailQueue:
         """Mark an email as currently being processed"""
@@ -241,6 +304,7 @@ class EmailQueueService:
         if email:
             email.status = "processing"
             email.attempts += 1
+            email.claimed_at = datetime.utcnow()
             db.commit()
             db.refresh(email)
         return email
@@ -252,6 +316,7 @@ class EmailQueueService:
         if email:
             email.status = "sent"
             email.processed_at = datetime.utcnow()
+            email.claimed_at = None
             email.error_message = None
             db.commit()
             db.refresh(email)
@@ -263,6 +328,7 @@ class EmailQueueService:
         email = db.query(EmailQueue).filter(EmailQueue.id == email_id).first()
         if email:
             email.error_message = error_message
+            email.claimed_at = None
             
             if email.attempts >= email.max_attempts:
                 email.status = "failed"
@@ -277,6 +343,103 @@ class EmailQueueService:
             db.refresh(email)
         return email
     
+    @staticmethod
+    def _latency_stages() -> Dict[str, Any]:
+        """Alert pipeline stage → seconds it took (NULL when a timestamp is missing)"""
+        stages = {
+            'probe_to_commit': (EmailQueue.probe_completed_at, EmailQueue.status_committed_at),
+            'commit_to_enqueue': (EmailQueue.status_committed_at, EmailQueue.created_at),
+            'enqueue_to_claim': (EmailQueue.created_at, EmailQueue.first_claimed_at),
+            'claim_to_accept': (EmailQueue.first_claimed_at, EmailQueue.processed_at),
+            'total': (EmailQueue.probe_completed_at, EmailQueue.processed_at),
+        }
+        return {stage: func.extract("epoch", end - start) for stage, (start, end) in stages.items()}
+    
+    @staticmethod
+    def mark_emails_sent(db: Session, email_ids: List[UUID], digest_id: UUID = None) -> List[float]:
+        """
+        Mark many emails as sent with a single UPDATE
+        
+        Each email's stage latencies (probe → status commit → enqueue → claim →
+        accepted by the provider) are observed in ALERT_LATENCY_SECONDS.
+        
+        Args:
+            digest_id: Lead email id when the rows were delivered as one digest
+        
+        Returns:
+            Enqueue-to-send latency in seconds of each updated email
+        """
+        if not email_ids:
+            return []
+        
+        stages = EmailQueueService._latency_stages()
+        rows = db.execute(
+            update(EmailQueue)
+            .where(EmailQueue.id.in_(email_ids))
+            .values(
+                status="sent",
+                processed_at=func.now(),
+                error_message=None,
+                claimed_at=None,
+                digest_id=digest_id
+            )
+            .returning(
+                func.extract("epoch", EmailQueue.processed_at - EmailQueue.created_at).label("enqueue_to_send"),
+                *(seconds.label(stage) for stage, seconds in stages.items())
+            )
+            .execution_options(synchronize_session=False)
+        ).mappings().all()
+        db.commit()
+        
+        for row in rows:
+            for stage in stages:
+                if row[stage] is not None:
+                    ALERT_LATENCY_SECONDS.labels(stage).observe(max(float(row[stage]), 0.0))
+        return [float(row['enqueue_to_send']) for row in rows]
+    
+    @staticmethod
+    def mark_emails_failed(db: Session, failures: Dict[UUID, str]) -> int:
+        """
+        Mark many emails as failed, one UPDATE per distinct error message
+        
+        Same rules as mark_email_failed: rows out of attempts become "failed",
+        the rest go back to "pending" with exponential backoff (max 1 hour).
+        The dispatcher is woken when the earliest retry is due.
+        """
+        if not failures:
+            return 0
+        
+        ids_by_error: Dict[str, List[UUID]] = {}
+        for email_id, error_message in failures.items():
+            ids_by_error.setdefault(error_message, []).append(email_id)
+        
+        out_of_attempts = EmailQueue.attempts >= EmailQueue.max_attempts
+        retry_delay = func.least(60 * func.power(2, EmailQueue.attempts), 3600) * literal_column("interval '1 second'")
+        
+        retry_seconds = []
+        for error_message, email_ids in ids_by_error.items():
+            retry_seconds += db.scalars(
+                update(EmailQueue)
+                .where(EmailQueue.id.in_(email_ids))
+                .values(
+                    error_message=error_message,
+                    claimed_at=None,
+                    status=case((out_of_attempts, "failed"), else_="pending"),
+                    processed_at=case((out_of_attempts, func.now()), else_=EmailQueue.processed_at),
+                    scheduled_at=case((out_of_attempts, EmailQueue.scheduled_at), else_=func.now() + retry_delay)
+                )
+                .returning(case(
+                    (EmailQueue.status == "pending", func.extract("epoch", EmailQueue.scheduled_at - func.now()))
+                )),
+                execution_options={"synchronize_session": False}
+            ).all()
+        db.commit()
+        
+        retries = [float(seconds) for seconds in retry_seconds if seconds is not None]
+        if retries:
+            EmailQueueService.wake_dispatcher(countdown=min(retries))
+        return len(retry_seconds)
+    
     @staticmethod
     def cleanup_old_emails(db: Session, days: int = 7) -> int:
         """Clean up old email queue entries"""
@@ -0,0 +1,110 @@
+import asyncio
+import httpx
+import logging
+import re
+import time
+from typing import Dict, Optional
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+_MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+class GoogleCertCache:
+    """
+    Cache of Google's ID token signing certs ({kid: PEM cert})
+    
+    Honors the Cache-Control max-age of the certs response. Once an entry is
+    within refresh_margin of expiring, callers keep getting the cached certs
+    while a single background task fetches new ones; only an empty or expired
+    cache makes a caller wait for the network.
+    """
+    
+    def __init__(self, certs_url: str, default_max_age: int, refresh_margin: float = 0.1, min_refetch_interval: int = 60):
+        self.certs_url = certs_url
+        self.default_max_age = default_max_age
+        self.refresh_margin = refresh_margin
+        self.min_refetch_interval = min_refetch_interval
+        self._certs: Dict[str, str] = {}
+        self._fetched_at = 0.0
+        self._expires_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    def _get_lock(self) -> asyncio.Lock:
+        # Created lazily so it binds to the running event loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=10.0)
+        return self._client
+    
+    def _max_age(self, cache_control: Optional[str]) -> int:
+        if cache_control:
+            match = _MAX_AGE_PATTERN.search(cache_control)
+            if match:
+                return int(match.group(1))
+        return self.default_max_age
+    
+    async def _fetch(self) -> Dict[str, str]:
+        async with self._get_lock():
+            # Another caller may have refreshed while we waited for the lock
+            now = time.monotonic()
+            if self._certs and now < self._expires_at and now - self._fetched_at < self.min_refetch_interval:
+                return self._certs
+            
+            response = await self._get_client().get(self.certs_url)
+            response.raise_for_status()
+            
+            max_age = self._max_age(response.headers.get("cache-control"))
+            now = time.monotonic()
+            self._certs = response.json()
+            self._fetched_at = now
+            self._expires_at = now + max_age
+            logger.info(f"Fetched {len(self._certs)} Google signing certs (max-age {max_age}s)")
+            return self._certs
+    
+    async def _background_refresh(self) -> None:
+        try:
+            await self._fetch()
+        except Exception as e:
+            logger.warning(f"Background refresh of Google certs failed: {str(e)}")
+    
+    def schedule_refresh(self) -> None:
+        """Start a background refresh unless one is already running"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.get_running_loop().create_task(self._background_refresh())
+    
+    async def get_certs(self, kid: Optional[str] = None) -> Dict[str, str]:
+        """Return cached certs, fetching only when empty, expired or missing kid"""
+        now = time.monotonic()
+        
+        if not self._certs or now >= self._expires_at:
+            return await self._fetch()
+        
+        # Key rotation: an unknown kid forces a (rate limited) refetch
+        if kid is not None and kid not in self._certs:
+            return await self._fetch()
+        
+        lifetime = self._expires_at - self._fetched_at
+        if now >= self._expires_at - lifetime * self.refresh_margin:
+            self.schedule_refresh()
+        
+        return self._certs
+    
+    async def close(self) -> None:
+        if self._refresh_task is not None and not self._refresh_task.done():
+            self._refresh_task.cancel()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+google_cert_cache = GoogleCertCache(
+    certs_url=settings.GOOGLE_CERTS_URL,
+    default_max_age=settings.GOOGLE_CERTS_DEFAULT_MAX_AGE
+)
@@ -1,14 +1,16 @@
 import httpx
 import logging
-from google.oauth2 import id_token
-from google.auth.transport import requests
-from sqlalchemy.orm import Session
+from google.auth import jwt as google_jwt
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from typing import Optional, Dict, Any
 from fastapi import HTTPException, status
 
 from ..models.user import User
 from ..config import settings
 from ..utils.security import create_access_token
+from ..utils.user_cache import user_cache
+from .google_cert_cache import google_cert_cache
 
 logger = logging.getLogger(__name__)
 
@@ -28,11 +30,13 @@ class GoogleOAuthService:
             
             logger.info(f"Verifying Google token with client ID: {settings.GOOGLE_CLIENT_ID[:20]}...")
             
-            # Verify the token with Google
-            idinfo = id_token.verify_oauth2_token(
-                token, 
-                requests.Request(), 
-                settings.GOOGLE_CLIENT_ID
+            # Verify the token locally against cached Google signing certs
+            header = google_jwt.decode_header(token)
+            certs = await google_cert_cache.get_certs(header.get('kid'))
+            idinfo = google_jwt.decode(
+                token,
+                certs=certs,
+                audience=settings.GOOGLE_CLIENT_ID
             )
             
             # Check if the token is from the correct issuer
@@ -69,7 +73,7 @@ class GoogleOAuthService:
             return None
     
     @staticmethod
-    def find_or_create_google_user(db: Session, google_user_info: Dict[str, Any]) -> User:
+    async def find_or_create_google_user(db: AsyncSession, google_user_info: Dict[str, Any]) -> User:
         """Find existing user or create new one from Google info"""
         google_id = google_user_info.get('sub')  # 'sub' is the Google user ID
         email = google_user_info.get('email')
@@ -83,19 +87,20 @@ class GoogleOAuthService:
             )
         
         # Try to find by Google ID first
-        user = db.query(User).filter(User.google_id == google_id).first()
+        user = (await db.execute(select(User).where(User.google_id == google_id))).scalars().first()
         
         # If not found by Google ID, try to find by email
         if not user:
-            user = db.query(User).filter(User.email == email).first()
+            user = (await db.execute(select(User).where(User.email == email))).scalars().first()
             if user:
                 # Link existing email account to Google
                 user.google_id = google_id
                 user.provider = "google"
                 user.avatar_url = picture
                 user.name = name
-                db.commit()
-                db.refresh(user)
+                await db.commit()
+                await db.refresh(user)
+                user_cache.invalidate(user.id)
         
         # Create new user if not found
         if not user:
@@ -109,8 +114,8 @@ class GoogleOAuthService:
                 hashed_password=None  # No password for OAuth users
             )
             db.add(user)
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
         
         return user
     
@@ -125,7 +130,7 @@ class GoogleOAuthService:
         return create_access_token(token_data)
     
     @staticmethod
-    async def authenticate_with_google(db: Session, google_token: str) -> Dict[str, Any]:
+    async def authenticate_with_google(db: AsyncSession, google_token: str) -> Dict[str, Any]:
         """Complete Google OAuth authentication flow"""
         try:
             # Verify the Google token
@@ -138,7 +143,7 @@ class GoogleOAuthService:
                 )
             
             # Find or create user
-            user = GoogleOAuthService.find_or_create_google_user(db, google_user_info)
+            user = await GoogleOAuthService.find_or_create_google_user(db, google_user_info)
             
             # Create JWT token
             access_token = GoogleOAuthService.create_access_token_for_google_user(user)
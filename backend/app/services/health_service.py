@@ -1,98 +1,189 @@
+import functools
 import requests
 import time
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from sqlalchemy.orm import Session
-from typing import Dict, Any
+from sqlalchemy import select, update, func
+from typing import Dict, Any, Union, List, Tuple, Optional
 from uuid import UUID
 
 from ..models.job import Job
 from ..models.log import HealthLog
+from ..models.log_span import HealthLogSpan
 from ..models.user import User
 from .email_queue_service import EmailQueueService
+from .webhook_service import WebhookService
+from .check_history_service import CheckHistoryService
+from .circuit_breaker_service import CircuitBreakerService, PROBE, TCP_PROBE, SKIP
+from ..utils.metrics import (
+    CHECKS_TOTAL, PROBE_SECONDS, PROBE_BODY_BYTES_TOTAL, SHARED_CHECKS_TOTAL, CONFIRMATION_CHECKS_TOTAL
+)
+from ..utils.urls import normalize_url
+from ..probes.scheduler import HostScheduler, host_key
+from ..probes.assertions import AssertionSet, assertions_key
+from ..probes.http import new_probe_session, start_timings, finish_timings, fetch, iter_body, bytes_read
+from ..config import settings
 
 logger = logging.getLogger(__name__)
 
 class HealthService:
     
     @staticmethod
-    def check_url_health(url: str, timeout: int = 10) -> Dict[str, Any]:
+    def check_url_health(
+        url: str,
+        timeout: int = 10,
+        body_limit: int = 0,
+        assertions: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
         """
         Perform health check on a URL and return results
         
+        The response is streamed: by default the probe stops once the headers
+        are in, and redirects are followed up to PROBE_MAX_REDIRECTS without
+        downloading their bodies.
+        
+        Args:
+            url: URL to probe
+            timeout: Seconds allowed per connect/read (and for the whole body read)
+            body_limit: Read up to this many body bytes (capped at
+                PROBE_MAX_BODY_BYTES) and return them as 'body'; 0 reads none
+            assertions: Content assertions (contains / regex / json) a 2xx
+                response must also pass; evaluated on the streamed body, reading
+                at most PROBE_MAX_BODY_BYTES
+        
         Returns:
             Dict containing:
             - is_healthy: bool
             - status_code: int | None
             - response_time: float (milliseconds)
             - error_message: str | None
+            - timings: Dict of phase (dns, connect, tls, ttfb, transfer) → milliseconds
+            - bytes_read: int (body bytes received)
+            - body: bytes (only when body_limit is set)
+            - assertions: List of {'type', 'passed', 'detail'} (only with assertions)
         """
         start_time = time.time()
+        timings = start_timings()
+        body_limit = min(body_limit, settings.PROBE_MAX_BODY_BYTES)
+        session = new_probe_session()
+        response = None
         
         try:
-            session = requests.Session()
-            session.headers.update({'User-Agent': 'pingDaemon/1.0 Health Checker'})
+            response = fetch(session, url, timeout, settings.PROBE_MAX_REDIRECTS)
+            body = b"".join(iter_body(response, body_limit, start_time + timeout)) if body_limit > 0 else None
+            is_healthy = 200 <= response.status_code < 300
+            error_message = None if is_healthy else f"HTTP {response.status_code}"
             
-            response = session.get(
-                url,
-                timeout=timeout,
-                allow_redirects=True
-            )
+            # Content assertions only matter once the status is acceptable
+            assertion_results = None
+            if assertions and is_healthy:
+                assertion_results = HealthService._evaluate_assertions(response, assertions, body, start_time + timeout)
+                failed = [outcome for outcome in assertion_results if not outcome['passed']]
+                if failed:
+                    is_healthy = False
+                    error_message = f"Assertion failed: {failed[0]['detail']}"
             
-            response_time = (time.time() - start_time) * 1000
-            is_healthy = 200 <= response.status_code < 300
+            response_time = HealthService._elapsed_ms(start_time, timings)
             
-            return {
+            result = {
                 'is_healthy': is_healthy,
                 'status_code': response.status_code,
                 'response_time': round(response_time, 2),
-                'error_message': None if is_healthy else f"HTTP {response.status_code}"
+                'error_message': error_message,
+                'timings': finish_timings(timings, time.time() - start_time, response),
+                'bytes_read': bytes_read(response)
             }
+            if body is not None:
+                result['body'] = body
+            if assertion_results is not None:
+                result['assertions'] = assertion_results
+            return result
             
         except requests.exceptions.Timeout:
-            response_time = (time.time() - start_time) * 1000
+            response_time = HealthService._elapsed_ms(start_time, timings)
             logger.warning(f"Health check timeout for {url} after {timeout}s")
             return {
                 'is_healthy': False,
                 'status_code': None,
                 'response_time': round(response_time, 2),
-                'error_message': f"Request timeout after {timeout}s"
+                'error_message': f"Request timeout after {timeout}s",
+                'timings': finish_timings(timings, time.time() - start_time),
+                'bytes_read': bytes_read(response)
             }
             
         except requests.exceptions.ConnectionError as e:
-            response_time = (time.time() - start_time) * 1000
+            response_time = HealthService._elapsed_ms(start_time, timings)
             logger.warning(f"Health check connection failed for {url}: {str(e)}")
             return {
                 'is_healthy': False,
                 'status_code': None,
                 'response_time': round(response_time, 2),
-                'error_message': "Connection failed"
+                'error_message': "Connection failed",
+                'timings': finish_timings(timings, time.time() - start_time),
+                'bytes_read': bytes_read(response)
+            }
+            
+        except requests.exceptions.TooManyRedirects:
+            response_time = HealthService._elapsed_ms(start_time, timings)
+            return {
+                'is_healthy': False,
+                'status_code': None,
+                'response_time': round(response_time, 2),
+                'error_message': f"Too many redirects (more than {settings.PROBE_MAX_REDIRECTS})",
+                'timings': finish_timings(timings, time.time() - start_time),
+                'bytes_read': 0
             }
             
         except requests.exceptions.RequestException as e:
-            response_time = (time.time() - start_time) * 1000
+            response_time = HealthService._elapsed_ms(start_time, timings)
             return {
                 'is_healthy': False,
                 'status_code': None,
                 'response_time': round(response_time, 2),
-                'error_message': f"Request error: {str(e)}"
+                'error_message': f"Request error: {str(e)}",
+                'timings': finish_timings(timings, time.time() - start_time),
+                'bytes_read': bytes_read(response)
             }
+        
+        finally:
+            # Drops the connection rather than draining an unread body
+            if response is not None:
+                response.close()
+            session.close()
     
     @staticmethod
-    def log_health_check(db: Session, job_id: UUID, check_result: Dict[str, Any]) -> HealthLog:
-        """Log health check result to database"""
-        health_log = HealthLog(
-            job_id=job_id,
-            status_code=check_result['status_code'],
-            response_time=check_result['response_time'],
-            is_healthy=check_result['is_healthy'],
-            error_message=check_result['error_message']
-        )
-        
-        db.add(health_log)
-        db.commit()
-        db.refresh(health_log)
-        return health_log
+    def _evaluate_assertions(
+        response: requests.Response,
+        assertions: List[Dict[str, Any]],
+        body: Optional[bytes],
+        deadline: float
+    ) -> List[Dict[str, Any]]:
+        """Feed the body to the assertions chunk by chunk, stopping once they are decided"""
+        assertion_set = AssertionSet(assertions)
+        chunks = [body] if body is not None else iter_body(response, settings.PROBE_MAX_BODY_BYTES, deadline)
+        for chunk in chunks:
+            if assertion_set.feed(chunk):
+                break
+        return assertion_set.finish()
+    
+    @staticmethod
+    def _elapsed_ms(start_time: float, timings: Dict[str, float]) -> float:
+        """Probe wall-clock time, without DNS resolution unless PROBE_LATENCY_INCLUDES_DNS"""
+        elapsed = time.time() - start_time
+        if not settings.PROBE_LATENCY_INCLUDES_DNS:
+            elapsed -= timings.get('dns', 0.0)
+        return max(elapsed, 0.0) * 1000
+    
+    @staticmethod
+    def log_health_check(
+        db: Session,
+        job_id: UUID,
+        check_result: Dict[str, Any],
+        interval_minutes: Optional[int] = None
+    ) -> Union[HealthLog, HealthLogSpan]:
+        """Log health check result to database (as a full row or as part of a span)"""
+        return CheckHistoryService.record_check(db, job_id, check_result, interval_minutes)
     
     @staticmethod
     def check_failure_threshold(db: Session, job: Job) -> bool:
@@ -102,17 +193,15 @@ class HealthService:
         Returns:
             bool: True if threshold exceeded, False otherwise
         """
-        # Get recent health logs for this job (limit to threshold + 1)
-        recent_logs = db.query(HealthLog).filter(
-            HealthLog.job_id == job.id
-        ).order_by(HealthLog.checked_at.desc()).limit(job.failure_threshold).all()
+        # Get outcomes of the most recent checks for this job (limit to threshold)
+        recent_outcomes = CheckHistoryService.get_recent_outcomes(db, job.id, job.failure_threshold)
         
-        # If we don't have enough logs, threshold not exceeded
-        if len(recent_logs) < job.failure_threshold:
+        # If we don't have enough checks, threshold not exceeded
+        if len(recent_outcomes) < job.failure_threshold:
             return False
         
-        # Check if all recent logs are failures
-        all_failures = all(not log.is_healthy for log in recent_logs)
+        # Check if all recent checks are failures
+        all_failures = all(not is_healthy for is_healthy in recent_outcomes)
         
         return all_failures
     
@@ -121,6 +210,7 @@ class HealthService:
         """Update job current status based on health check"""
         # Store previous status for status change detection
         job.previous_status = job.current_status
+        job.last_checked_at = datetime.now(timezone.utc)
         
         if is_healthy:
             job.current_status = "healthy"
@@ -128,8 +218,11 @@ class HealthService:
             # Check if we've exceeded failure threshold
             if HealthService.check_failure_threshold(db, job):
                 job.current_status = "unhealthy"
+            elif settings.CONFIRMATION_BACKOFF_SECONDS:
+                # Keep the current status while confirmation re-checks gather evidence
+                pass
             else:
-                # Still mark as unhealthy immediately for simplicity
+                # Without confirmations, mark as unhealthy immediately
                 job.current_status = "unhealthy"
         
         db.commit()
@@ -137,10 +230,102 @@ class HealthService:
         return job
     
     @staticmethod
-    def perform_health_check(db: Session, job: Job) -> Dict[str, Any]:
+    def get_failure_streak(db: Session, job: Job) -> int:
+        """Number of consecutive failed checks, newest first (at most failure_threshold)"""
+        streak = 0
+        for is_healthy in CheckHistoryService.get_recent_outcomes(db, job.id, job.failure_threshold):
+            if is_healthy:
+                break
+            streak += 1
+        return streak
+    
+    @staticmethod
+    def schedule_confirmation(db: Session, job: Job, is_healthy: bool) -> Optional[Dict[str, Any]]:
+        """
+        Schedule a quick re-check after a failure that hasn't reached the threshold
+        
+        The n-th consecutive failure is re-checked CONFIRMATION_BACKOFF_SECONDS[n-1]
+        seconds later, so reaching the threshold takes the sum of the offsets
+        instead of threshold × interval. Healthy jobs and jobs already at the
+        threshold schedule nothing, so steady-state load is unchanged. Every
+        check replaces a pending confirmation (confirmation_due_at), and the
+        re-check runs through check_due_confirmations, which claims it.
+        
+        Returns:
+            Scheduling info, or None if no confirmation is needed
+        """
+        job.confirmation_due_at = None
+        offsets = settings.CONFIRMATION_BACKOFF_SECONDS
+        
+        streak = 0 if is_healthy or not offsets else HealthService.get_failure_streak(db, job)
+        if streak == 0 or streak >= job.failure_threshold:
+            db.commit()
+            return None
+        
+        delay = offsets[min(streak, len(offsets)) - 1]
+        if delay >= job.interval * 60:
+            # The regular check comes first anyway
+            db.commit()
+            return None
+        
+        due_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+        job.confirmation_due_at = due_at
+        db.commit()
+        
+        from .scheduler_service import SchedulerService
+        scheduled = SchedulerService.schedule_confirmation_check(delay, due_at)
+        if scheduled['success']:
+            CONFIRMATION_CHECKS_TOTAL.inc()
+            logger.info(f"🔁 Confirmation check {streak}/{job.failure_threshold - 1} for job {job.id} in {delay}s")
+        else:
+            logger.warning(f"⚠️ Failed to schedule confirmation check for job {job.id}: {scheduled['error']}")
+        return scheduled
+    
+    @staticmethod
+    def claim_due_confirmations(db: Session) -> List[Job]:
+        """
+        Claim the enabled jobs whose confirmation re-check is due
+        
+        Clears confirmation_due_at with UPDATE ... WHERE id IN (SELECT ... FOR
+        UPDATE SKIP LOCKED), so overlapping runs never re-check a job twice.
+        Confirmations due within the next second are included too; their own
+        runs would then find nothing left.
+        """
+        due_ids = select(Job.id).where(
+            Job.is_enabled == True,
+            Job.confirmation_due_at <= func.now() + timedelta(seconds=1)
+        ).with_for_update(skip_locked=True)
+        
+        claimed_ids = db.scalars(
+            update(Job)
+            .where(Job.id.in_(due_ids.scalar_subquery()))
+            .values(confirmation_due_at=None)
+            .returning(Job.id),
+            execution_options={"synchronize_session": False}
+        ).all()
+        db.commit()
+        
+        if not claimed_ids:
+            return []
+        return db.query(Job).filter(Job.id.in_(claimed_ids)).all()
+    
+    @staticmethod
+    def perform_health_check(
+        db: Session,
+        job: Job,
+        check_result: Optional[Dict[str, Any]] = None,
+        probe_completed_at: Optional[datetime] = None
+    ) -> Dict[str, Any]:
         """
         Perform complete health check workflow for a job with simplified email logic
         
+        Args:
+            db: Database session
+            job: Job to check
+            check_result: Result of a probe already made for this job's URL
+                (shared with other jobs); the URL is probed when omitted
+            probe_completed_at: When that shared probe finished
+        
         Returns:
             Dict containing check results and status updates
         """
@@ -155,94 +340,89 @@ class HealthService:
         # Store current status before update
         previous_status = job.current_status
         
-        # Perform health check
-        check_result = HealthService.check_url_health(job.url)
+        # Perform health check (unless a shared probe already did)
+        if check_result is None:
+            check_result, probe_completed_at = HealthService.probe_url(job.url, job.assertions)
+        probe_completed_at = probe_completed_at or datetime.now(timezone.utc)
+        CHECKS_TOTAL.labels("healthy" if check_result['is_healthy'] else "unhealthy").inc()
         
         # Log the result
-        health_log = HealthService.log_health_check(db, job.id, check_result)
+        health_log = HealthService.log_health_check(db, job.id, check_result, job.interval)
         
         # Update job status (this also sets previous_status in the job)
         updated_job = HealthService.update_job_status(db, job, check_result['is_healthy'])
+        status_committed_at = datetime.now(timezone.utc)
+        
+        # Re-check soon while a failure is still below the threshold
+        try:
+            confirmation = HealthService.schedule_confirmation(db, updated_job, check_result['is_healthy'])
+        except Exception as e:
+            db.rollback()
+            logger.error(f"💥 Exception scheduling confirmation for job {job.id}: {str(e)}")
+            confirmation = {'error': str(e)}
         
         # Check for status change and queue email
         email_queued = None
+        webhooks_queued = None
         status_changed = previous_status != updated_job.current_status
         
         if status_changed:
             logger.info(f"🔄 STATUS CHANGE: {previous_status} → {updated_job.current_status} for job {job.id}")
             
-            # Check if this is an initial status change and if we've already sent an activation email
+            # Initial changes (unknown → ...) share one activation dedup key per monitor,
+            # so the queue's unique index also prevents duplicate activation emails
             is_initial_change = previous_status == "unknown"
-            if is_initial_change:
-                # Check if we've already sent an initial activation email by looking for existing emails
-                from ..models.email_queue import EmailQueue
-                existing_activation_email = db.query(EmailQueue).filter(
-                    EmailQueue.job_id == job.id,
-                    EmailQueue.subject.like(f"Monitor%{job.url}%"),
-                    EmailQueue.status.in_(["pending", "processing", "sent"])
-                ).first()
-                
-                if existing_activation_email:
-                    logger.info(f"⏭️ INITIAL EMAIL ALREADY EXISTS: Skipping duplicate email for job {job.id} (existing: {existing_activation_email.id})")
-                    email_queued = {'skipped': f'Initial email already exists: {existing_activation_email.id}'}
-                else:
-                    # This is the first initial email for this monitor
-                    try:
-                        # Get job owner
-                        user = db.query(User).filter(User.id == job.user_id).first()
-                        if user:
-                            # Queue email for initial status change
-                            email_queue = EmailQueueService.queue_status_change_alert(
-                                db=db,
-                                job=updated_job,
-                                user=user,
-                                previous_status=previous_status,
-                                current_status=updated_job.current_status,
-                                error_message=check_result.get('error_message')
-                            )
-                            
-                            email_queued = {
-                                'method': 'unified_format',
-                                'email_queue_id': email_queue.id,
-                                'status_change': f"{previous_status} → {updated_job.current_status}"
-                            }
-                            
-                            logger.info(f"📧 Monitor activation email queued for {user.email}: {previous_status} → {updated_job.current_status}")
-                        else:
-                            logger.error(f"❌ No user found for job {job.id}")
-                            email_queued = {'error': f'User not found: {job.user_id}'}
-                    except Exception as e:
-                        logger.error(f"💥 Exception queuing email for job {job.id}: {str(e)}")
-                        email_queued = {'error': str(e)}
-            else:
-                # This is a regular status change (not initial)
-                try:
-                    # Get job owner
-                    user = db.query(User).filter(User.id == job.user_id).first()
-                    if user:
-                        # Queue email for status change
-                        email_queue = EmailQueueService.queue_status_change_alert(
-                            db=db,
-                            job=updated_job,
-                            user=user,
-                            previous_status=previous_status,
-                            current_status=updated_job.current_status,
-                            error_message=check_result.get('error_message')
-                        )
-                        
+            try:
+                # Get job owner
+                user = db.query(User).filter(User.id == job.user_id).first()
+                if user:
+                    # Queue email for status change (insert-or-ignore on dedup key)
+                    email_queue_id = EmailQueueService.queue_status_change_alert(
+                        db=db,
+                        job=updated_job,
+                        user=user,
+                        previous_status=previous_status,
+                        current_status=updated_job.current_status,
+                        error_message=check_result.get('error_message'),
+                        probe_completed_at=probe_completed_at,
+                        status_committed_at=status_committed_at
+                    )
+                    
+                    if email_queue_id is None:
+                        logger.info(f"⏭️ ALERT ALREADY QUEUED: Skipping duplicate email for job {job.id}")
+                        email_queued = {'skipped': 'Equivalent alert already queued'}
+                    else:
                         email_queued = {
                             'method': 'unified_format',
-                            'email_queue_id': email_queue.id,
+                            'email_queue_id': email_queue_id,
                             'status_change': f"{previous_status} → {updated_job.current_status}"
                         }
                         
-                        logger.info(f"📧 Status change email queued for {user.email}: {previous_status} → {updated_job.current_status}")
-                    else:
-                        logger.error(f"❌ No user found for job {job.id}")
-                        email_queued = {'error': f'User not found: {job.user_id}'}
-                except Exception as e:
-                    logger.error(f"💥 Exception queuing email for job {job.id}: {str(e)}")
-                    email_queued = {'error': str(e)}
+                        if is_initial_change:
+                            logger.info(f"📧 Monitor activation email queued for {user.email}: {previous_status} → {updated_job.current_status}")
+                        else:
+                            logger.info(f"📧 Status change email queued for {user.email}: {previous_status} → {updated_job.current_status}")
+                else:
+                    logger.error(f"❌ No user found for job {job.id}")
+                    email_queued = {'error': f'User not found: {job.user_id}'}
+            except Exception as e:
+                db.rollback()
+                logger.error(f"💥 Exception queuing email for job {job.id}: {str(e)}")
+                email_queued = {'error': str(e)}
+            
+            # Fan out to the owner's webhooks (delivered by the webhook dispatcher)
+            try:
+                webhooks_queued = WebhookService.queue_status_change(
+                    db=db,
+                    job=updated_job,
+                    previous_status=previous_status,
+                    current_status=updated_job.current_status,
+                    error_message=check_result.get('error_message')
+                )
+            except Exception as e:
+                db.rollback()
+                logger.error(f"💥 Exception queuing webhooks for job {job.id}: {str(e)}")
+                webhooks_queued = {'error': str(e)}
 
         should_alert = (
             not check_result['is_healthy'] and 
@@ -259,5 +439,118 @@ class HealthService:
             'health_log_id': health_log.id,
             'skipped': False,
             'email_queued': email_queued,
+            'webhooks_queued': webhooks_queued,
+            'confirmation': confirmation,
             'status_changed': status_changed
-        }
\ No newline at end of file
+        }
+    
+    @staticmethod
+    def probe_url(url: str, assertions: Optional[List[Dict[str, Any]]] = None) -> Tuple[Dict[str, Any], datetime]:
+        """Probe a URL once and record the probe latency; returns the result and when it finished"""
+        check_result = HealthService.check_url_health(url, assertions=assertions)
+        PROBE_SECONDS.observe(check_result['response_time'] / 1000)
+        PROBE_BODY_BYTES_TOTAL.inc(check_result['bytes_read'])
+        return check_result, datetime.now(timezone.utc)
+    
+    @staticmethod
+    def group_by_probe_target(jobs: List[Job]) -> Dict[Tuple[str, str], List[Job]]:
+        """Group jobs whose URLs normalize to the same probe target and that assert the same content"""
+        targets: Dict[Tuple[str, str], List[Job]] = {}
+        for job in jobs:
+            targets.setdefault((normalize_url(job.url), assertions_key(job.assertions)), []).append(job)
+        return targets
+    
+    @staticmethod
+    def check_jobs(db: Session, jobs: List[Job]) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Check a batch of jobs with one probe per distinct target
+        
+        Jobs monitoring the same normalized URL with the same content
+        assertions share a single probe; its result is then run through each
+        job's own logging, threshold and alert pipeline, so per-job behaviour
+        is the same as probing each. Probes run concurrently under the
+        per-host limits of HostScheduler; the database work stays on this
+        thread's session. Targets with an open circuit (CircuitBreakerService)
+        get a TCP probe or are skipped for the tick.
+        
+        Returns:
+            Tuple of (per-job results, number of probes sent)
+        """
+        enabled_jobs = [job for job in jobs if job.is_enabled]
+        targets = list(HealthService.group_by_probe_target(enabled_jobs).items())
+        
+        # Targets that stay unreachable get cheaper, less frequent probes
+        now = datetime.now(timezone.utc)
+        circuits = CircuitBreakerService.load(db, {target for (target, _), _ in targets})
+        plans = [
+            CircuitBreakerService.plan(circuits.get(target), min(job.interval for job in target_jobs), now)
+            for (target, _), target_jobs in targets
+        ]
+        
+        tasks = []
+        for ((target, _), target_jobs), plan in zip(targets, plans):
+            full_probe = functools.partial(HealthService.probe_url, target, target_jobs[0].assertions)
+            if plan == TCP_PROBE:
+                full_probe = functools.partial(CircuitBreakerService.probe_open_target, target, full_probe)
+            if plan != SKIP:
+                tasks.append((host_key(target), full_probe))
+        probes = iter(HostScheduler().run(tasks))
+        
+        results = []
+        probed = []
+        for ((target, _), target_jobs), plan in zip(targets, plans):
+            if plan == SKIP:
+                # Not probed this tick: the jobs keep their (down) status, but the
+                # sweep handled them, so they don't show up as overdue in the check lag
+                circuit = circuits[target]
+                for job in target_jobs:
+                    job.last_checked_at = now
+                results.extend({
+                    'job_id': str(job.id),
+                    'job_url': job.url,
+                    'success': True,
+                    'skipped': True,
+                    'reason': f"Circuit open, next probe at {circuit.next_probe_at.isoformat()}",
+                    'current_status': job.current_status
+                } for job in target_jobs)
+                continue
+            probed.append((target, target_jobs, next(probes)))
+        
+        # Update circuits once per target before fanning out (commits the skipped jobs too)
+        recorded = set()
+        for target, _, probe in probed:
+            if target in recorded or probe.exception() is not None:
+                continue
+            recorded.add(target)
+            CircuitBreakerService.record(db, target, circuits.get(target), probe.result()[0], now)
+        db.commit()
+        
+        for _, target_jobs, probe in probed:
+            shared_probe = len(target_jobs) > 1
+            if shared_probe:
+                SHARED_CHECKS_TOTAL.inc(len(target_jobs) - 1)
+            
+            for job in target_jobs:
+                try:
+                    check_result, probe_completed_at = probe.result()
+                    result = HealthService.perform_health_check(
+                        db, job, check_result=check_result, probe_completed_at=probe_completed_at
+                    )
+                    
+                    results.append({
+                        'job_id': str(job.id),
+                        'job_url': job.url,
+                        'success': True,
+                        'shared_probe': shared_probe,
+                        **result
+                    })
+                except Exception as e:
+                    db.rollback()
+                    results.append({
+                        'job_id': str(job.id),
+                        'job_url': job.url if job else 'unknown',
+                        'success': False,
+                        'error': str(e)
+                    })
+        
+        return results, len(probed)
\ No newline at end of file
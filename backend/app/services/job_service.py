@@ -1,4 +1,6 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, func
+from fastapi.concurrency import run_in_threadpool
 from fastapi import HTTPException, status
 from typing import List, Optional
 from uuid import UUID
@@ -13,7 +15,7 @@ logger = logging.getLogger(__name__)
 class JobService:
     
     @staticmethod
-    def create_job(db: Session, job_data: JobCreate, user: User) -> Job:
+    async def create_job(db: AsyncSession, job_data: JobCreate, user: User) -> Job:
         """Create a new monitoring job for a user"""
         # Validate interval values
         allowed_intervals = [5, 10, 15, 30, 60]
@@ -36,20 +38,21 @@ class JobService:
             interval=job_data.interval,
             is_enabled=job_data.is_enabled,
             failure_threshold=job_data.failure_threshold,
+            assertions=[assertion.dict() for assertion in job_data.assertions] or None,
             user_id=user.id,
             current_status="unknown",    # Initial status for new monitors
             previous_status="unknown"    # Initial previous status
         )
         
         db.add(db_job)
-        db.commit()
-        db.refresh(db_job)
+        await db.commit()
+        await db.refresh(db_job)
         
         # Schedule immediate health check for new monitor if enabled
         if db_job.is_enabled:
             try:
                 from ..services.scheduler_service import SchedulerService
-                result = SchedulerService.schedule_immediate_check(db_job.id)
+                result = await run_in_threadpool(SchedulerService.schedule_immediate_check, db_job.id)
                 if result.get('success'):
                     logger.info(f"✅ NEW MONITOR CREATED: {db_job.url} - Immediate health check scheduled (task: {result.get('task_id')})")
                 else:
@@ -62,19 +65,25 @@ class JobService:
         return db_job
     
     @staticmethod
-    def get_user_jobs(db: Session, user: User, skip: int = 0, limit: int = 100) -> List[Job]:
+    async def get_user_jobs(db: AsyncSession, user: User, skip: int = 0, limit: int = 100) -> List[Job]:
         """Get all jobs for a user with pagination"""
-        return db.query(Job).filter(
-            Job.user_id == user.id
-        ).offset(skip).limit(limit).all()
+        result = await db.execute(
+            select(Job).where(
+                Job.user_id == user.id
+            ).offset(skip).limit(limit)
+        )
+        return result.scalars().all()
     
     @staticmethod
-    def get_job_by_id(db: Session, job_id: UUID, user: User) -> Optional[Job]:
+    async def get_job_by_id(db: AsyncSession, job_id: UUID, user: User) -> Optional[Job]:
         """Get a specific job by ID (only if it belongs to the user)"""
-        job = db.query(Job).filter(
-            Job.id == job_id,
-            Job.user_id == user.id
-        ).first()
+        result = await db.execute(
+            select(Job).where(
+                Job.id == job_id,
+                Job.user_id == user.id
+            )
+        )
+        job = result.scalars().first()
         
         if not job:
             raise HTTPException(
@@ -84,9 +93,9 @@ class JobService:
         return job
     
     @staticmethod
-    def update_job(db: Session, job_id: UUID, job_data: JobUpdate, user: User) -> Job:
+    async def update_job(db: AsyncSession, job_id: UUID, job_data: JobUpdate, user: User) -> Job:
         """Update an existing job WITHOUT resetting status"""
-        job = JobService.get_job_by_id(db, job_id, user)
+        job = await JobService.get_job_by_id(db, job_id, user)
         
         # Validate interval if provided
         if job_data.interval is not None:
@@ -118,51 +127,69 @@ class JobService:
             else:
                 setattr(job, field, value)
         
-        db.commit()
-        db.refresh(job)
+        await db.commit()
+        await db.refresh(job)
         return job
     
     @staticmethod
-    def delete_job(db: Session, job_id: UUID, user: User) -> bool:
+    async def delete_job(db: AsyncSession, job_id: UUID, user: User) -> bool:
         """Delete a job and all related records with proper error handling"""
         from ..models.log import HealthLog
+        from ..models.log_span import HealthLogSpan
         from ..models.alert import Alert
         from ..models.email_queue import EmailQueue
+        from ..models.webhook import WebhookDelivery
         
         try:
             # Verify job exists and user owns it
-            job = JobService.get_job_by_id(db, job_id, user)
+            job = await JobService.get_job_by_id(db, job_id, user)
             job_url = job.url  # Store for logging
             
             # Get counts for logging
-            email_count = db.query(EmailQueue).filter(EmailQueue.job_id == job_id).count()
-            log_count = db.query(HealthLog).filter(HealthLog.job_id == job_id).count()
-            alert_count = db.query(Alert).filter(Alert.job_id == job_id).count()
+            email_count = await db.scalar(select(func.count()).select_from(EmailQueue).where(EmailQueue.job_id == job_id))
+            log_count = await db.scalar(select(func.count()).select_from(HealthLog).where(HealthLog.job_id == job_id))
+            alert_count = await db.scalar(select(func.count()).select_from(Alert).where(Alert.job_id == job_id))
             
             print(f"Deleting job {job_id} ({job_url}) with {email_count} emails, {log_count} logs, {alert_count} alerts")
             
             # Delete related records in proper order
             # 1. Delete email queue entries
-            deleted_emails = db.query(EmailQueue).filter(EmailQueue.job_id == job_id).delete(synchronize_session=False)
+            deleted_emails = (await db.execute(
+                delete(EmailQueue).where(EmailQueue.job_id == job_id).execution_options(synchronize_session=False)
+            )).rowcount
+            
+            # Pending webhook deliveries (dead letters keep their job_id for inspection)
+            await db.execute(
+                delete(WebhookDelivery).where(WebhookDelivery.job_id == job_id).execution_options(synchronize_session=False)
+            )
             
             # 2. Delete health logs
-            deleted_logs = db.query(HealthLog).filter(HealthLog.job_id == job_id).delete(synchronize_session=False)
+            deleted_logs = (await db.execute(
+                delete(HealthLog).where(HealthLog.job_id == job_id).execution_options(synchronize_session=False)
+            )).rowcount
+            
+            # 3. Delete collapsed health log spans
+            deleted_spans = (await db.execute(
+                delete(HealthLogSpan).where(HealthLogSpan.job_id == job_id).execution_options(synchronize_session=False)
+            )).rowcount
             
-            # 3. Delete alerts
-            deleted_alerts = db.query(Alert).filter(Alert.job_id == job_id).delete(synchronize_session=False)
+            # 4. Delete alerts
+            deleted_alerts = (await db.execute(
+                delete(Alert).where(Alert.job_id == job_id).execution_options(synchronize_session=False)
+            )).rowcount
             
-            # 4. Finally delete the job itself
-            db.delete(job)
+            # 5. Finally delete the job itself
+            await db.delete(job)
             
             # Commit all changes
-            db.commit()
+            await db.commit()
             
-            print(f"Successfully deleted job {job_id}. Removed: {deleted_emails} emails, {deleted_logs} logs, {deleted_alerts} alerts")
+            print(f"Successfully deleted job {job_id}. Removed: {deleted_emails} emails, {deleted_logs} logs, {deleted_spans} log spans, {deleted_alerts} alerts")
             return True
             
         except Exception as e:
             # Rollback on any error
-            db.rollback()
+            await db.rollback()
             print(f"Failed to delete job {job_id}: {str(e)}")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -170,11 +197,11 @@ class JobService:
             )
     
     @staticmethod
-    def toggle_job_status(db: Session, job_id: UUID, user: User) -> Job:
+    async def toggle_job_status(db: AsyncSession, job_id: UUID, user: User) -> Job:
         """Toggle job enabled/disabled status"""
-        job = JobService.get_job_by_id(db, job_id, user)
+        job = await JobService.get_job_by_id(db, job_id, user)
         
         job.is_enabled = not job.is_enabled
-        db.commit()
-        db.refresh(job)
+        await db.commit()
+        await db.refresh(job)
         return job
\ No newline at end of file
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import time
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from prometheus_client import CollectorRegistry
+from prometheus_client.core import GaugeMetricFamily
+from typing import Dict, Tuple, Any, Optional
+
+from ..models.email_queue import EmailQueue
+from ..config import settings
+from ..models.webhook import WebhookDelivery
+from ..utils.metrics import render_latest
+from .sweep_service import SweepService
+
+logger = logging.getLogger(__name__)
+
+class _SnapshotCollector:
+    """Exposes values read from the database for one scrape"""
+    
+    def __init__(self, queue_depths: Dict[Tuple[str, str], int], check_lag: Dict[int, Dict[str, Any]]):
+        self.queue_depths = queue_depths
+        self.check_lag = check_lag
+    
+    def collect(self):
+        depth = GaugeMetricFamily(
+            "pingdaemon_queue_depth",
+            "Rows waiting or in flight in the outbound notification queues",
+            labels=["queue", "status"]
+        )
+        for (queue, status), count in sorted(self.queue_depths.items()):
+            depth.add_metric([queue, status], count)
+        yield depth
+        
+        lag = GaugeMetricFamily(
+            "pingdaemon_check_lag_seconds",
+            "Time since enabled jobs were last checked minus their interval (positive = overdue)",
+            labels=["interval", "stat"]
+        )
+        overdue = GaugeMetricFamily(
+            "pingdaemon_jobs_overdue",
+            "Enabled jobs whose last check is older than their interval",
+            labels=["interval"]
+        )
+        for interval, stats in sorted(self.check_lag.items()):
+            lag.add_metric([str(interval), "max"], stats['max_seconds'])
+            lag.add_metric([str(interval), "avg"], stats['avg_seconds'])
+            overdue.add_metric([str(interval)], stats['overdue'])
+        yield lag
+        yield overdue
+
+class MetricsService:
+    """
+    Prometheus exposition for the API: process metrics plus database snapshots
+    
+    The snapshot is reused for METRICS_SNAPSHOT_TTL_SECONDS, so frequent or
+    concurrent scrapes (several Prometheus replicas) cost one set of queries.
+    """
+    
+    _snapshot: Optional[_SnapshotCollector] = None
+    _snapshot_expires_at: float = 0.0
+    _snapshot_lock: Optional[asyncio.Lock] = None
+    
+    @staticmethod
+    async def get_queue_depths(db: AsyncSession) -> Dict[Tuple[str, str], int]:
+        """Pending/processing row counts of the email and webhook queues"""
+        depths = {}
+        for queue, model in (("email", EmailQueue), ("webhook", WebhookDelivery)):
+            rows = (await db.execute(
+                select(model.status, func.count(model.id))
+                .where(model.status.in_(["pending", "processing"]))
+                .group_by(model.status)
+            )).all()
+            depths.update({(queue, status): 0 for status in ("pending", "processing")})
+            depths.update({(queue, status): count for status, count in rows})
+        return depths
+    
+    @staticmethod
+    async def get_snapshot(db: AsyncSession) -> _SnapshotCollector:
+        """Database snapshot, re-read once it is older than METRICS_SNAPSHOT_TTL_SECONDS"""
+        if MetricsService._snapshot_lock is None:
+            MetricsService._snapshot_lock = asyncio.Lock()
+        
+        async with MetricsService._snapshot_lock:
+            if MetricsService._snapshot is None or time.monotonic() >= MetricsService._snapshot_expires_at:
+                MetricsService._snapshot = _SnapshotCollector(
+                    await MetricsService.get_queue_depths(db),
+                    await SweepService.get_check_lag(db)
+                )
+                MetricsService._snapshot_expires_at = time.monotonic() + settings.METRICS_SNAPSHOT_TTL_SECONDS
+            return MetricsService._snapshot
+    
+    @staticmethod
+    async def render(db: AsyncSession) -> bytes:
+        """Process (or multiprocess) metrics followed by the database snapshot"""
+        snapshot = CollectorRegistry()
+        snapshot.register(await MetricsService.get_snapshot(db))
+        return render_latest() + render_latest(snapshot)
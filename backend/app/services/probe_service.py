@@ -0,0 +1,100 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
+from typing import Dict, Any, Callable, Hashable, List, Optional
+from uuid import UUID
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.job import Job
+from .health_service import HealthService
+from ..probes.assertions import assertions_key
+
+logger = logging.getLogger(__name__)
+
+# Dedicated, bounded pool so on-demand probes can't exhaust the default threadpool
+_probe_executor = ThreadPoolExecutor(
+    max_workers=settings.PROBE_MAX_WORKERS,
+    thread_name_prefix="probe"
+)
+
+# Probes currently running, keyed by what they check
+_in_flight: Dict[Hashable, asyncio.Future] = {}
+
+class ProbeService:
+    """Runs on-demand health checks for API routes without blocking the event loop"""
+    
+    @staticmethod
+    async def _run_coalesced(key: Hashable, func: Callable, *args) -> Any:
+        """
+        Run func(*args) on the probe pool, sharing one in-flight call per key
+        
+        Concurrent callers with the same key await the same future. Each caller
+        waits at most PROBE_REQUEST_BUDGET_SECONDS, including time queued for a
+        pool slot; the probe itself keeps running for the other waiters.
+        """
+        future = _in_flight.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(_probe_executor, functools.partial(func, *args))
+            _in_flight[key] = future
+            
+            def _release(done: asyncio.Future) -> None:
+                if _in_flight.get(key) is done:
+                    del _in_flight[key]
+            
+            future.add_done_callback(_release)
+        else:
+            logger.debug(f"Coalescing probe request for {key}")
+        
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(future),
+                timeout=settings.PROBE_REQUEST_BUDGET_SECONDS
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Probe {key} exceeded {settings.PROBE_REQUEST_BUDGET_SECONDS}s request budget")
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="Health check did not complete in time"
+            )
+    
+    @staticmethod
+    def _perform_health_check_sync(job_id: UUID) -> Dict[str, Any]:
+        """Run the full health check workflow with its own session (probe pool thread)"""
+        db = SessionLocal()
+        try:
+            job = db.query(Job).filter(Job.id == job_id).first()
+            if job is None:
+                # Deleted after the route looked it up
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Job not found"
+                )
+            return HealthService.perform_health_check(db, job)
+        finally:
+            db.close()
+    
+    @staticmethod
+    async def check_job_now(job_id: UUID) -> Dict[str, Any]:
+        """Check a job immediately, logging the result and updating its status"""
+        return await ProbeService._run_coalesced(
+            ("check-now", job_id),
+            ProbeService._perform_health_check_sync,
+            job_id
+        )
+    
+    @staticmethod
+    async def test_url(url: str, assertions: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Probe a URL (optionally with content assertions) without recording anything"""
+        timeout = min(settings.PROBE_TIMEOUT_SECONDS, settings.PROBE_REQUEST_BUDGET_SECONDS)
+        return await ProbeService._run_coalesced(
+            ("test-url", url, assertions_key(assertions)),
+            HealthService.check_url_health,
+            url,
+            timeout,
+            0,
+            assertions
+        )
@@ -1,5 +1,5 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, and_, desc
 from datetime import datetime, timedelta
 from typing import List, Dict
 from collections import defaultdict
@@ -7,18 +7,30 @@ from collections import defaultdict
 from ..models.job import Job
 from ..models.log import HealthLog
 from ..models.user import User
-from ..schemas.reports import UptimeHistoryItem, ResponseTimeItem, IncidentItem, PerformanceMetrics, ReportsData
+from .check_history_service import CheckHistoryService
+from ..probes.http import PHASES
+from ..schemas.reports import UptimeHistoryItem, ResponseTimeItem, PhaseTimingItem, IncidentItem, PerformanceMetrics, ReportsData
 
 class ReportsService:
     
     @staticmethod
-    def get_uptime_history(db: Session, user: User, days: int = 7) -> List[UptimeHistoryItem]:
+    def _next_hour() -> datetime:
+        """
+        Start of the next UTC hour
+        
+        Rolling windows end here so their bounds are whole hours, which never
+        cut through a health log span.
+        """
+        return datetime.utcnow().replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    
+    @staticmethod
+    async def get_uptime_history(db: AsyncSession, user: User, days: int = 7) -> List[UptimeHistoryItem]:
         """Get uptime history for the last N days"""
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
         
         # Get user's jobs
-        user_jobs = db.query(Job).filter(Job.user_id == user.id).all()
+        user_jobs = (await db.execute(select(Job).where(Job.user_id == user.id))).scalars().all()
         if not user_jobs:
             return []
         
@@ -32,17 +44,22 @@ class ReportsService:
             date_end = date_start + timedelta(days=1)
             
             # Get all health checks for this date
-            health_checks = db.query(HealthLog).filter(
-                and_(
-                    HealthLog.job_id.in_(job_ids),
-                    HealthLog.checked_at >= date_start,
-                    HealthLog.checked_at < date_end
+            health_checks = (await db.execute(
+                select(HealthLog).where(
+                    and_(
+                        HealthLog.job_id.in_(job_ids),
+                        HealthLog.checked_at >= date_start,
+                        HealthLog.checked_at < date_end
+                    )
                 )
-            ).all()
+            )).scalars().all()
             
-            if health_checks:
-                healthy_count = sum(1 for check in health_checks if check.is_healthy)
-                total_count = len(health_checks)
+            # Add checks collapsed into spans (RLE storage mode)
+            span_stats = await CheckHistoryService.get_span_stats(db, job_ids, date_start, date_end)
+            
+            if health_checks or span_stats['total']:
+                healthy_count = sum(1 for check in health_checks if check.is_healthy) + span_stats['healthy']
+                total_count = len(health_checks) + span_stats['total']
                 uptime_percentage = round((healthy_count / total_count) * 100, 1)
             else:
                 uptime_percentage = 0.0  # No data means no monitoring yet
@@ -55,13 +72,13 @@ class ReportsService:
         return results
     
     @staticmethod
-    def get_response_time_history(db: Session, user: User, hours: int = 24) -> List[ResponseTimeItem]:
+    async def get_response_time_history(db: AsyncSession, user: User, hours: int = 24) -> List[ResponseTimeItem]:
         """Get response time trends for the last N hours"""
-        end_time = datetime.utcnow()
+        end_time = ReportsService._next_hour()
         start_time = end_time - timedelta(hours=hours)
         
         # Get user's jobs
-        user_jobs = db.query(Job).filter(Job.user_id == user.id).all()
+        user_jobs = (await db.execute(select(Job).where(Job.user_id == user.id))).scalars().all()
         if not user_jobs:
             return []
         
@@ -75,15 +92,25 @@ class ReportsService:
             interval_start = start_time + timedelta(hours=i * 4)
             interval_end = interval_start + timedelta(hours=4)
             
-            # Get average response time for this interval
-            avg_response = db.query(func.avg(HealthLog.response_time)).filter(
-                and_(
-                    HealthLog.job_id.in_(job_ids),
-                    HealthLog.checked_at >= interval_start,
-                    HealthLog.checked_at < interval_end,
-                    HealthLog.response_time.isnot(None)
+            # Get average response time for this interval across rows and spans
+            response_sum, response_count = (await db.execute(
+                select(
+                    func.sum(HealthLog.response_time),
+                    func.count(HealthLog.response_time)
+                ).where(
+                    and_(
+                        HealthLog.job_id.in_(job_ids),
+                        HealthLog.checked_at >= interval_start,
+                        HealthLog.checked_at < interval_end,
+                        HealthLog.response_time.isnot(None)
+                    )
                 )
-            ).scalar()
+            )).one()
+            
+            span_stats = await CheckHistoryService.get_span_stats(db, job_ids, interval_start, interval_end)
+            total_sum = (response_sum or 0.0) + span_stats['response_time_sum']
+            total_count = (response_count or 0) + span_stats['response_time_count']
+            avg_response = total_sum / total_count if total_count else None
             
             response_time = round(avg_response, 0) if avg_response else 0.0
             
@@ -95,7 +122,55 @@ class ReportsService:
         return results
     
     @staticmethod
-    def get_incidents_by_day(db: Session, user: User) -> List[IncidentItem]:
+    async def get_phase_timing_history(db: AsyncSession, user: User, hours: int = 24) -> List[PhaseTimingItem]:
+        """Average time per probe phase (dns, connect, tls, ttfb, transfer) over the last N hours"""
+        # Get user's jobs
+        user_jobs = (await db.execute(select(Job.id).where(Job.user_id == user.id))).scalars().all()
+        if not user_jobs:
+            return []
+        
+        job_ids = list(user_jobs)
+        
+        # Six intervals of whole hours, like the response time history
+        interval_count = 6
+        interval = timedelta(hours=max(hours // interval_count, 1))
+        start_time = ReportsService._next_hour() - interval * interval_count
+        results = []
+        
+        for i in range(interval_count):
+            interval_start = start_time + i * interval
+            interval_end = interval_start + interval
+            
+            # Per-phase sums and counts from full rows (array elements are 1-based)
+            row = (await db.execute(
+                select(*[
+                    aggregate(HealthLog.phase_timings[index])
+                    for index in range(1, len(PHASES) + 1)
+                    for aggregate in (func.sum, func.count)
+                ]).where(
+                    and_(
+                        HealthLog.job_id.in_(job_ids),
+                        HealthLog.checked_at >= interval_start,
+                        HealthLog.checked_at < interval_end,
+                        HealthLog.phase_timings.isnot(None)
+                    )
+                )
+            )).one()
+            
+            span_stats = await CheckHistoryService.get_span_stats(db, job_ids, interval_start, interval_end)
+            
+            averages = {}
+            for index, phase in enumerate(PHASES):
+                phase_sum = (row[2 * index] or 0) + span_stats['phase_timing_sums'][index]
+                phase_count = (row[2 * index + 1] or 0) + span_stats['phase_timing_count']
+                averages[phase] = round(phase_sum / phase_count, 1) if phase_count else None
+            
+            results.append(PhaseTimingItem(time=interval_start.strftime("%H:%M"), **averages))
+        
+        return results
+    
+    @staticmethod
+    async def get_incidents_by_day(db: AsyncSession, user: User) -> List[IncidentItem]:
         """Get incidents count for each day of the current week"""
         # Get start of current week (Monday)
         today = datetime.utcnow()
@@ -104,7 +179,7 @@ class ReportsService:
         week_start = week_start.replace(hour=0, minute=0, second=0, microsecond=0)
         
         # Get user's jobs
-        user_jobs = db.query(Job).filter(Job.user_id == user.id).all()
+        user_jobs = (await db.execute(select(Job).where(Job.user_id == user.id))).scalars().all()
         if not user_jobs:
             return [IncidentItem(day=day, incidents=0) for day in ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']]
         
@@ -118,24 +193,29 @@ class ReportsService:
             day_start = week_start + timedelta(days=i)
             day_end = day_start + timedelta(days=1)
             
-            incident_count = db.query(HealthLog).filter(
-                and_(
-                    HealthLog.job_id.in_(job_ids),
-                    HealthLog.checked_at >= day_start,
-                    HealthLog.checked_at < day_end,
-                    HealthLog.is_healthy == False
+            incident_count = await db.scalar(
+                select(func.count()).select_from(HealthLog).where(
+                    and_(
+                        HealthLog.job_id.in_(job_ids),
+                        HealthLog.checked_at >= day_start,
+                        HealthLog.checked_at < day_end,
+                        HealthLog.is_healthy == False
+                    )
                 )
-            ).count()
+            )
+            
+            # Add failed checks collapsed into spans (RLE storage mode)
+            incident_count += (await CheckHistoryService.get_span_stats(db, job_ids, day_start, day_end))['unhealthy']
             
             results.append(IncidentItem(day=day_name, incidents=incident_count))
         
         return results
     
     @staticmethod
-    def get_performance_metrics(db: Session, user: User) -> PerformanceMetrics:
+    async def get_performance_metrics(db: AsyncSession, user: User) -> PerformanceMetrics:
         """Get overall performance metrics"""
         # Get user's jobs
-        user_jobs = db.query(Job).filter(Job.user_id == user.id).all()
+        user_jobs = (await db.execute(select(Job).where(Job.user_id == user.id))).scalars().all()
         if not user_jobs:
             return PerformanceMetrics(
                 avgUptime="0.0%",
@@ -147,18 +227,22 @@ class ReportsService:
         job_ids = [job.id for job in user_jobs]
         
         # Calculate metrics for the last 30 days
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=30)
+        start_date = ReportsService._next_hour() - timedelta(days=30)
         
         # Get all health checks in the period
-        health_checks = db.query(HealthLog).filter(
-            and_(
-                HealthLog.job_id.in_(job_ids),
-                HealthLog.checked_at >= start_date
+        health_checks = (await db.execute(
+            select(HealthLog).where(
+                and_(
+                    HealthLog.job_id.in_(job_ids),
+                    HealthLog.checked_at >= start_date
+                )
             )
-        ).all()
+        )).scalars().all()
+        
+        # Checks collapsed into spans (RLE storage mode)
+        span_stats = await CheckHistoryService.get_span_stats(db, job_ids, start_date)
         
-        if not health_checks:
+        if not health_checks and not span_stats['total']:
             return PerformanceMetrics(
                 avgUptime="0.0%",
                 avgResponseTime="0ms",
@@ -167,16 +251,18 @@ class ReportsService:
             )
         
         # Calculate uptime percentage
-        healthy_count = sum(1 for check in health_checks if check.is_healthy)
-        total_checks = len(health_checks)
+        healthy_count = sum(1 for check in health_checks if check.is_healthy) + span_stats['healthy']
+        total_checks = len(health_checks) + span_stats['total']
         avg_uptime = round((healthy_count / total_checks) * 100, 1)
         
         # Calculate average response time
         response_times = [check.response_time for check in health_checks if check.response_time is not None]
-        avg_response_time = round(sum(response_times) / len(response_times), 0) if response_times else 0
+        response_sum = sum(response_times) + span_stats['response_time_sum']
+        response_count = len(response_times) + span_stats['response_time_count']
+        avg_response_time = round(response_sum / response_count, 0) if response_count else 0
         
         # Count incidents (failures)
-        incident_count = sum(1 for check in health_checks if not check.is_healthy)
+        incident_count = sum(1 for check in health_checks if not check.is_healthy) + span_stats['unhealthy']
         
         return PerformanceMetrics(
             avgUptime=f"{avg_uptime}%",
@@ -186,11 +272,12 @@ class ReportsService:
         )
     
     @staticmethod
-    def get_all_reports_data(db: Session, user: User) -> ReportsData:
+    async def get_all_reports_data(db: AsyncSession, user: User) -> ReportsData:
         """Get all reports data in one response"""
         return ReportsData(
-            uptimeHistory=ReportsService.get_uptime_history(db, user),
-            responseTimeHistory=ReportsService.get_response_time_history(db, user),
-            incidentsByDay=ReportsService.get_incidents_by_day(db, user),
-            metrics=ReportsService.get_performance_metrics(db, user)
+            uptimeHistory=await ReportsService.get_uptime_history(db, user),
+            responseTimeHistory=await ReportsService.get_response_time_history(db, user),
+            phaseTimingHistory=await ReportsService.get_phase_timing_history(db, user),
+            incidentsByDay=await ReportsService.get_incidents_by_day(db, user),
+            metrics=await ReportsService.get_performance_metrics(db, user)
         )
\ No newline at end of file
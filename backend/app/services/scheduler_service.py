@@ -3,7 +3,7 @@ from typing import Dict, Any, Optional
 from uuid import UUID
 from datetime import datetime, timedelta
 
-from ..workers.checker import check_single_job
+from ..workers.checker import check_single_job, check_due_confirmations
 
 
 class SchedulerService:
@@ -80,6 +80,38 @@ class SchedulerService:
                 'message': 'Failed to schedule delayed health check'
             }
     
+    @staticmethod
+    def schedule_confirmation_check(delay_seconds: int, due_at: datetime) -> Dict[str, Any]:
+        """
+        Schedule a run of the confirmation re-checks due by due_at
+        
+        The run picks up every confirmation due by then, so jobs failing
+        together are re-checked together; runs that find nothing due do nothing.
+        
+        Args:
+            delay_seconds: Number of seconds to delay the run
+            due_at: When the confirmation that asked for the run is due
+            
+        Returns:
+            Dict containing task information
+        """
+        try:
+            task = check_due_confirmations.apply_async(countdown=delay_seconds)
+            
+            return {
+                'success': True,
+                'task_id': task.id,
+                'eta': due_at.isoformat(),
+                'delay_seconds': delay_seconds
+            }
+            
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'message': 'Failed to schedule confirmation check'
+            }
+    
     @staticmethod
     def get_task_status(task_id: str) -> Dict[str, Any]:
         """
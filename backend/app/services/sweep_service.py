@@ -0,0 +1,150 @@
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, func
+from typing import Dict, Any, Iterator
+
+from ..database import engine
+from ..models.job import Job
+from ..models.sweep_run import SweepRun
+from ..utils.metrics import (
+    SWEEP_DRIFT_SECONDS, SWEEP_DURATION_SECONDS, SWEEPS_TOTAL, SWEEP_JOBS_PER_SECOND,
+    SWEEP_PROBE_DEDUP_RATIO
+)
+
+logger = logging.getLogger(__name__)
+
+# First key of the two-int advisory lock; the second is the interval in minutes
+SWEEP_LOCK_CLASS = 7301
+
+class SweepService:
+    """
+    Bookkeeping for the periodic check sweeps (check_jobs_by_interval)
+
+    Each sweep holds a Postgres advisory lock for its interval, so a tick that
+    arrives while the previous sweep of the same interval is still running is
+    coalesced into it instead of checking the same jobs twice. Every tick is
+    recorded in sweep_runs with its drift, duration and throughput.
+    """
+
+    @staticmethod
+    @contextmanager
+    def sweep_lock(interval_minutes: int) -> Iterator[bool]:
+        """
+        Try to take the sweep lock of an interval; yields whether it was acquired
+
+        Uses a dedicated autocommit connection: a session-level advisory lock
+        must stay on one connection, and sessions hand theirs back on commit.
+        """
+        connection = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        acquired = False
+        try:
+            acquired = connection.execute(
+                select(func.pg_try_advisory_lock(SWEEP_LOCK_CLASS, interval_minutes))
+            ).scalar()
+            yield acquired
+        finally:
+            if acquired:
+                connection.execute(select(func.pg_advisory_unlock(SWEEP_LOCK_CLASS, interval_minutes)))
+            connection.close()
+
+    @staticmethod
+    def record_run(
+        db: Session,
+        interval_minutes: int,
+        status: str,
+        scheduled_at: datetime,
+        started_at: datetime,
+        finished_at: datetime,
+        jobs_checked: int = 0,
+        probes_sent: int = 0
+    ) -> SweepRun:
+        """Store a sweep tick and update the sweep metrics"""
+        drift = max((started_at - scheduled_at).total_seconds(), 0.0)
+        duration = (finished_at - started_at).total_seconds()
+        jobs_per_second = jobs_checked / duration if duration > 0 and jobs_checked else None
+        overran = duration > interval_minutes * 60
+
+        label = str(interval_minutes)
+        SWEEPS_TOTAL.labels(label, status).inc()
+        SWEEP_DRIFT_SECONDS.labels(label).observe(drift)
+        if status != "coalesced":
+            SWEEP_DURATION_SECONDS.labels(label).observe(duration)
+            SWEEP_JOBS_PER_SECOND.labels(label).set(jobs_per_second or 0)
+            SWEEP_PROBE_DEDUP_RATIO.labels(label).set(1 - probes_sent / jobs_checked if jobs_checked else 0)
+
+        if status == "coalesced":
+            logger.warning(f"⏭️ {interval_minutes}-minute sweep coalesced: the previous sweep is still running")
+        if overran:
+            logger.warning(f"🐢 {interval_minutes}-minute sweep overran: {duration:.1f}s for {jobs_checked} jobs")
+        if drift > interval_minutes * 60 / 2:
+            logger.warning(f"⏰ {interval_minutes}-minute sweep started {drift:.1f}s after it was scheduled")
+
+        sweep_run = SweepRun(
+            interval_minutes=interval_minutes,
+            status=status,
+            scheduled_at=scheduled_at,
+            started_at=started_at,
+            finished_at=finished_at,
+            drift_seconds=drift,
+            duration_seconds=duration,
+            jobs_checked=jobs_checked,
+            probes_sent=probes_sent,
+            jobs_per_second=jobs_per_second,
+            overran=overran
+        )
+        db.add(sweep_run)
+        db.commit()
+        return sweep_run
+
+    @staticmethod
+    def cleanup_old_runs(db: Session, days: int = 7) -> int:
+        """Delete sweep records older than `days`"""
+        deleted = db.execute(
+            delete(SweepRun)
+            .where(SweepRun.created_at < datetime.utcnow() - timedelta(days=days))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        logger.info(f"Cleaned up {deleted} old sweep runs")
+        return deleted
+
+    @staticmethod
+    async def get_check_lag(db: AsyncSession) -> Dict[int, Dict[str, Any]]:
+        """
+        How far behind schedule enabled jobs are, per interval
+
+        Lag is the time since a job's last check minus its interval (positive
+        means the job is overdue). Jobs that were never checked are counted
+        from their creation.
+
+        Returns:
+            Dict of interval → {'max_seconds', 'avg_seconds', 'overdue', 'jobs'}
+        """
+        lag = (
+            func.extract("epoch", func.now() - func.coalesce(Job.last_checked_at, Job.created_at))
+            - Job.interval * 60
+        )
+        rows = (await db.execute(
+            select(
+                Job.interval,
+                func.max(lag),
+                func.avg(lag),
+                func.count(Job.id).filter(lag > 0),
+                func.count(Job.id)
+            )
+            .where(Job.is_enabled == True)
+            .group_by(Job.interval)
+        )).all()
+
+        return {
+            interval: {
+                'max_seconds': float(max_lag),
+                'avg_seconds': float(avg_lag),
+                'overdue': overdue,
+                'jobs': jobs
+            }
+            for interval, max_lag, avg_lag, overdue, jobs in rows
+        }
@@ -0,0 +1,340 @@
+import logging
+import random
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete, insert, func, literal
+from sqlalchemy.dialects.postgresql import insert as pg_insert, JSONB
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Dict, Any, Optional, Tuple
+from uuid import UUID
+
+from ..models.webhook import Webhook, WebhookDelivery, WebhookDeadLetter
+from ..models.job import Job
+from ..models.user import User
+from ..schemas.webhook import WebhookCreate
+from ..webhooks.payloads import build_status_change_event, STATUS_CHANGED_EVENT
+from .email_queue_service import EmailQueueService
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+class WebhookService:
+    """
+    Webhook endpoints and their delivery queue
+
+    Status changes fan out to one WebhookDelivery per active endpoint of the
+    job's owner. The dispatcher claims due deliveries, retries failures with
+    jittered exponential backoff and moves deliveries that run out of
+    attempts (or are rejected with a 4xx) to WebhookDeadLetter.
+    """
+
+    @staticmethod
+    def queue_status_change(
+        db: Session,
+        job: Job,
+        previous_status: str,
+        current_status: str,
+        error_message: str = None
+    ) -> int:
+        """
+        Queue a status change for every active webhook of the job's owner
+
+        One INSERT ... SELECT over the owner's webhooks; the dedup key is the
+        email alert's, so a repeated transition is not delivered twice.
+
+        Returns:
+            Number of deliveries queued
+        """
+        event = build_status_change_event(
+            job_id=str(job.id),
+            job_url=job.url,
+            previous_status=previous_status,
+            current_status=current_status,
+            error_message=error_message,
+            detected_at=datetime.utcnow().isoformat() + "Z"
+        )
+        dedup_key = EmailQueueService.get_dedup_key(job, previous_status, current_status)
+
+        # ids come from the database: a Python-side default is evaluated once for the whole SELECT
+        active_webhooks = select(
+            func.gen_random_uuid(),
+            Webhook.id,
+            literal(job.id),
+            literal(STATUS_CHANGED_EVENT),
+            literal(event, type_=JSONB),
+            literal(dedup_key),
+            literal(settings.WEBHOOK_MAX_ATTEMPTS)
+        ).where(Webhook.user_id == job.user_id, Webhook.is_active == True)
+
+        queued = db.execute(
+            pg_insert(WebhookDelivery)
+            .from_select(
+                ["id", "webhook_id", "job_id", "event", "payload", "dedup_key", "max_attempts"],
+                active_webhooks
+            )
+            .on_conflict_do_nothing(index_elements=[WebhookDelivery.webhook_id, WebhookDelivery.dedup_key])
+        ).rowcount
+        db.commit()
+
+        if queued:
+            logger.info(f"🪝 Webhooks queued: {previous_status} → {current_status} for job {job.id} ({queued} endpoints)")
+            WebhookService.wake_dispatcher()
+        return queued
+
+    @staticmethod
+    def wake_dispatcher(countdown: float = 0) -> None:
+        """Trigger a delivery run instead of waiting for the poll"""
+        try:
+            from ..workers.webhooks import process_webhook_deliveries
+            process_webhook_deliveries.apply_async(args=(settings.WEBHOOK_BATCH_SIZE,), countdown=countdown)
+        except Exception as e:
+            # The periodic poll will still pick the delivery up
+            logger.warning(f"⚠️ Failed to wake webhook dispatcher: {str(e)}")
+
+    @staticmethod
+    def claim_due_deliveries(db: Session, limit: int) -> List[Tuple[WebhookDelivery, Webhook]]:
+        """Atomically claim due deliveries (same SKIP LOCKED pattern as the email queue)"""
+        claimable_ids = select(WebhookDelivery.id).where(
+            WebhookDelivery.status == "pending",
+            WebhookDelivery.next_attempt_at <= func.now()
+        ).order_by(WebhookDelivery.next_attempt_at).limit(limit).with_for_update(skip_locked=True)
+
+        claimed = db.scalars(
+            update(WebhookDelivery)
+            .where(WebhookDelivery.id.in_(claimable_ids.scalar_subquery()))
+            .values(
+                status="processing",
+                attempts=WebhookDelivery.attempts + 1,
+                claimed_at=func.now()
+            )
+            .returning(WebhookDelivery),
+            execution_options={"synchronize_session": False}
+        ).all()
+        if not claimed:
+            db.commit()
+            return []
+
+        webhooks = {
+            webhook.id: webhook
+            for webhook in db.scalars(select(Webhook).where(Webhook.id.in_({d.webhook_id for d in claimed})))
+        }
+        for row in list(claimed) + list(webhooks.values()):
+            db.expunge(row)
+        db.commit()
+
+        return [(delivery, webhooks[delivery.webhook_id]) for delivery in claimed]
+
+    @staticmethod
+    def release_expired_claims(db: Session) -> int:
+        """Return deliveries stuck in "processing" by a crashed worker to the queue"""
+        lease_cutoff = func.now() - timedelta(seconds=settings.WEBHOOK_CLAIM_LEASE_SECONDS)
+        released = db.execute(
+            update(WebhookDelivery)
+            .where(WebhookDelivery.status == "processing", WebhookDelivery.claimed_at < lease_cutoff)
+            .values(status="pending", claimed_at=None, next_attempt_at=func.now())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        if released:
+            logger.warning(f"♻️ Released {released} expired webhook claims")
+        return released
+
+    @staticmethod
+    def retry_delay(attempts: int) -> float:
+        """Exponential backoff with equal jitter"""
+        delay = min(settings.WEBHOOK_RETRY_MAX_SECONDS, settings.WEBHOOK_RETRY_BASE_SECONDS * (2 ** (attempts - 1)))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    @staticmethod
+    def mark_delivered(db: Session, results: Dict[UUID, Optional[int]]) -> int:
+        """Mark deliveries as sent; results maps delivery id to response status"""
+        if not results:
+            return 0
+
+        ids_by_status: Dict[Optional[int], List[UUID]] = {}
+        for delivery_id, response_status in results.items():
+            ids_by_status.setdefault(response_status, []).append(delivery_id)
+
+        updated = 0
+        for response_status, delivery_ids in ids_by_status.items():
+            updated += db.execute(
+                update(WebhookDelivery)
+                .where(WebhookDelivery.id.in_(delivery_ids))
+                .values(
+                    status="sent",
+                    delivered_at=func.now(),
+                    claimed_at=None,
+                    last_error=None,
+                    response_status=response_status
+                )
+                .execution_options(synchronize_session=False)
+            ).rowcount
+        db.commit()
+        return updated
+
+    @staticmethod
+    def schedule_retries(db: Session, failures: List[Tuple[WebhookDelivery, Dict[str, Any]]]) -> Optional[float]:
+        """
+        Put failed deliveries back in the queue with their backoff
+
+        Returns:
+            The shortest retry delay scheduled (to wake the dispatcher), or None
+        """
+        shortest = None
+        for delivery, result in failures:
+            delay = WebhookService.retry_delay(delivery.attempts)
+            shortest = delay if shortest is None else min(shortest, delay)
+            db.execute(
+                update(WebhookDelivery)
+                .where(WebhookDelivery.id == delivery.id)
+                .values(
+                    status="pending",
+                    claimed_at=None,
+                    last_error=result['error'],
+                    response_status=result.get('status_code'),
+                    next_attempt_at=func.now() + timedelta(seconds=delay)
+                )
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+        return shortest
+
+    @staticmethod
+    def dead_letter(db: Session, failures: List[Tuple[WebhookDelivery, Dict[str, Any]]]) -> int:
+        """Move deliveries to the dead-letter table"""
+        if not failures:
+            return 0
+
+        db.execute(insert(WebhookDeadLetter), [
+            {
+                'webhook_id': delivery.webhook_id,
+                'job_id': delivery.job_id,
+                'event': delivery.event,
+                'payload': delivery.payload,
+                'attempts': delivery.attempts,
+                'last_error': result['error'],
+                'response_status': result.get('status_code'),
+                'created_at': delivery.created_at
+            }
+            for delivery, result in failures
+        ])
+        db.execute(
+            delete(WebhookDelivery)
+            .where(WebhookDelivery.id.in_([delivery.id for delivery, _ in failures]))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+        logger.error(f"☠️ Dead-lettered {len(failures)} webhook deliveries")
+        return len(failures)
+
+    @staticmethod
+    def cleanup_old_deliveries(db: Session, days: int = 7) -> int:
+        """Delete delivered rows older than `days` (dead letters are kept)"""
+        deleted = db.execute(
+            delete(WebhookDelivery)
+            .where(
+                WebhookDelivery.status == "sent",
+                WebhookDelivery.created_at < datetime.utcnow() - timedelta(days=days)
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        logger.info(f"Cleaned up {deleted} old webhook deliveries")
+        return deleted
+
+    # Endpoint management (API)
+
+    @staticmethod
+    async def get_user_webhooks(db: AsyncSession, user: User) -> List[Webhook]:
+        result = await db.execute(
+            select(Webhook).where(Webhook.user_id == user.id).order_by(Webhook.created_at)
+        )
+        return result.scalars().all()
+
+    @staticmethod
+    async def create_webhook(db: AsyncSession, webhook_data: WebhookCreate, user: User) -> Webhook:
+        webhook = Webhook(
+            url=str(webhook_data.url),
+            kind=webhook_data.kind,
+            secret=webhook_data.secret,
+            is_active=webhook_data.is_active,
+            user_id=user.id
+        )
+        db.add(webhook)
+        await db.commit()
+        await db.refresh(webhook)
+        return webhook
+
+    @staticmethod
+    async def _get_user_webhook(db: AsyncSession, webhook_id: UUID, user: User) -> Webhook:
+        webhook = (await db.execute(
+            select(Webhook).where(Webhook.id == webhook_id, Webhook.user_id == user.id)
+        )).scalar_one_or_none()
+        if not webhook:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Webhook not found"
+            )
+        return webhook
+
+    @staticmethod
+    async def delete_webhook(db: AsyncSession, webhook_id: UUID, user: User) -> bool:
+        webhook = await WebhookService._get_user_webhook(db, webhook_id, user)
+        await db.execute(
+            delete(WebhookDeadLetter).where(WebhookDeadLetter.webhook_id == webhook.id)
+            .execution_options(synchronize_session=False)
+        )
+        await db.execute(
+            delete(WebhookDelivery).where(WebhookDelivery.webhook_id == webhook.id)
+            .execution_options(synchronize_session=False)
+        )
+        await db.delete(webhook)
+        await db.commit()
+        return True
+
+    @staticmethod
+    async def get_dead_letters(db: AsyncSession, user: User, limit: int = 50) -> List[WebhookDeadLetter]:
+        result = await db.execute(
+            select(WebhookDeadLetter)
+            .join(Webhook, Webhook.id == WebhookDeadLetter.webhook_id)
+            .where(Webhook.user_id == user.id)
+            .order_by(WebhookDeadLetter.dead_at.desc())
+            .limit(limit)
+        )
+        return result.scalars().all()
+
+    @staticmethod
+    async def redrive_dead_letter(db: AsyncSession, dead_letter_id: UUID, user: User) -> UUID:
+        """Queue a dead-lettered event again with a fresh set of attempts"""
+        dead_letter = (await db.execute(
+            select(WebhookDeadLetter)
+            .join(Webhook, Webhook.id == WebhookDeadLetter.webhook_id)
+            .where(WebhookDeadLetter.id == dead_letter_id, Webhook.user_id == user.id)
+        )).scalar_one_or_none()
+        if not dead_letter:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Dead letter not found"
+            )
+
+        # job_id has no FK on dead letters; drop it if the monitor is gone
+        job_exists = dead_letter.job_id is not None and (await db.execute(
+            select(Job.id).where(Job.id == dead_letter.job_id)
+        )).scalar_one_or_none() is not None
+
+        delivery = WebhookDelivery(
+            webhook_id=dead_letter.webhook_id,
+            job_id=dead_letter.job_id if job_exists else None,
+            event=dead_letter.event,
+            payload=dead_letter.payload,
+            max_attempts=settings.WEBHOOK_MAX_ATTEMPTS
+        )
+        db.add(delivery)
+        await db.delete(dead_letter)
+        await db.commit()
+
+        await run_in_threadpool(WebhookService.wake_dispatcher)
+        return delivery.id
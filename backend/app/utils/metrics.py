@@ -0,0 +1,202 @@
+# Prometheus metrics shared by the API and the Celery workers
+import os
+import time
+from typing import Optional
+
+from prometheus_client import (
+    Counter,
+    Gauge,
+    Histogram,
+    CollectorRegistry,
+    REGISTRY,
+    CONTENT_TYPE_LATEST,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# With PROMETHEUS_MULTIPROC_DIR set (prefork workers, multi-process uvicorn),
+# every process writes its samples to mmap files there and the exporter
+# aggregates them at scrape time
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+if MULTIPROCESS:
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "pingdaemon_http_request_duration_seconds",
+    "API request latency by route template",
+    ["method", "route", "status"]
+)
+CHECKS_TOTAL = Counter(
+    "pingdaemon_checks_total",
+    "Health checks performed (rate() gives checks per second)",
+    ["result"]
+)
+PROBE_SECONDS = Histogram(
+    "pingdaemon_probe_duration_seconds",
+    "Health check probe latency",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 15, 30)
+)
+PROBE_BODY_BYTES_TOTAL = Counter(
+    "pingdaemon_probe_body_bytes_total",
+    "Response body bytes read by probes (headers-only probes read none)"
+)
+SHARED_CHECKS_TOTAL = Counter(
+    "pingdaemon_shared_checks_total",
+    "Job checks answered by a probe shared with another job of the same URL "
+    "(divide by checks_total for the dedup ratio)"
+)
+CONFIRMATION_CHECKS_TOTAL = Counter(
+    "pingdaemon_confirmation_checks_total",
+    "Confirmation re-checks scheduled after a failure below the threshold"
+)
+CIRCUIT_TRANSITIONS_TOTAL = Counter(
+    "pingdaemon_circuit_transitions_total",
+    "Probe target circuit breakers opening and closing",
+    ["state"]
+)
+CIRCUIT_SKIPPED_PROBES_TOTAL = Counter(
+    "pingdaemon_circuit_skipped_probes_total",
+    "Sweep probes skipped because the target's circuit is open and backing off"
+)
+DB_QUERY_SECONDS = Histogram(
+    "pingdaemon_db_query_duration_seconds",
+    "Database statement execution time",
+    ["engine"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+DB_POOL_WAIT_SECONDS = Histogram(
+    "pingdaemon_db_pool_checkout_seconds",
+    "Time to check a connection out of the pool (including connects)",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1, 5, 30)
+)
+TASK_SECONDS = Histogram(
+    "pingdaemon_task_duration_seconds",
+    "Celery task runtime",
+    ["task", "state"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 120, 300)
+)
+SWEEP_DRIFT_SECONDS = Histogram(
+    "pingdaemon_sweep_drift_seconds",
+    "Delay between a check sweep being scheduled and starting",
+    ["interval"],
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800)
+)
+SWEEP_DURATION_SECONDS = Histogram(
+    "pingdaemon_sweep_duration_seconds",
+    "Check sweep runtime",
+    ["interval"],
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 900, 1800, 3600)
+)
+SWEEPS_TOTAL = Counter(
+    "pingdaemon_sweeps_total",
+    "Check sweeps by outcome (coalesced = overlapped a running sweep)",
+    ["interval", "status"]
+)
+SWEEP_JOBS_PER_SECOND = Gauge(
+    "pingdaemon_sweep_jobs_per_second",
+    "Throughput of the most recent check sweep",
+    ["interval"],
+    multiprocess_mode="mostrecent"
+)
+SWEEP_PROBE_DEDUP_RATIO = Gauge(
+    "pingdaemon_sweep_probe_dedup_ratio",
+    "Share of the most recent sweep's job checks that reused another job's probe",
+    ["interval"],
+    multiprocess_mode="mostrecent"
+)
+ALERT_LATENCY_SECONDS = Histogram(
+    "pingdaemon_alert_latency_seconds",
+    "Alert email latency per pipeline stage, observed when the provider accepts the email",
+    ["stage"],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+)
+USER_CACHE_LOOKUPS_TOTAL = Counter(
+    "pingdaemon_user_cache_lookups_total",
+    "Authenticated-user cache lookups (a hit saves the user query)",
+    ["result"]
+)
+USER_CACHE_REMOVALS_TOTAL = Counter(
+    "pingdaemon_user_cache_removals_total",
+    "Authenticated-user cache entries dropped by LRU eviction or user changes",
+    ["reason"]
+)
+USER_CACHE_ENTRIES = Gauge(
+    "pingdaemon_user_cache_entries",
+    "Users cached by the API processes",
+    multiprocess_mode="livesum"
+)
+
+def get_registry() -> CollectorRegistry:
+    """Registry to expose: this process, or all processes in multiprocess mode"""
+    if not MULTIPROCESS:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+def render_latest(registry: Optional[CollectorRegistry] = None) -> bytes:
+    return generate_latest(registry or get_registry())
+
+def timed_pool_class(pool_class: type, engine_label: str) -> type:
+    """Pool subclass that records how long each checkout waits"""
+
+    class TimedPool(pool_class):
+        def _do_get(self):
+            started_at = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                DB_POOL_WAIT_SECONDS.labels(engine_label).observe(time.perf_counter() - started_at)
+
+    TimedPool.__name__ = f"Timed{pool_class.__name__}"
+    return TimedPool
+
+def instrument_engine(engine: Engine, engine_label: str) -> None:
+    """Time every statement executed on a (sync) engine"""
+    query_seconds = DB_QUERY_SECONDS.labels(engine_label)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        query_seconds.observe(time.perf_counter() - conn.info["query_started_at"].pop())
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency per route template
+
+    Uses the matched route's path (/jobs/{job_id}) rather than the raw URL so
+    label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_SECONDS.labels(scope["method"], route, str(status["code"])).observe(
+                time.perf_counter() - started_at
+            )
@@ -0,0 +1,34 @@
+# URL helpers for grouping monitors by probe target
+from urllib.parse import urlsplit, urlunsplit
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of a monitored URL, used as the probe target key
+
+    Lowercases the scheme and host, drops a trailing dot on the host, the
+    default port and the fragment (never sent to the server), and turns an
+    empty path into "/". Path and query are left untouched since both are
+    significant to the server.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    if ":" in host:
+        host = f"[{host}]"
+
+    try:
+        port = parts.port
+    except ValueError:
+        # Invalid port: leave the URL alone and let the probe report the error
+        return url
+
+    netloc = host
+    if port and port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{port}"
+    if parts.username is not None:
+        userinfo = parts.username if parts.password is None else f"{parts.username}:{parts.password}"
+        netloc = f"{userinfo}@{netloc}"
+
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
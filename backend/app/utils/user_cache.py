@@ -0,0 +1,108 @@
+# Bounded TTL/LRU cache of authenticated users
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple, Dict, Any
+from uuid import UUID
+
+from ..models.user import User
+from ..config import settings
+from .metrics import USER_CACHE_LOOKUPS_TOTAL, USER_CACHE_REMOVALS_TOTAL, USER_CACHE_ENTRIES
+
+CacheKey = Tuple[UUID, Optional[int]]
+
+class UserCache:
+    """
+    Cache of User snapshots keyed by (user id, token exp)
+    
+    Entries live until the earlier of the TTL and the token's expiry, and the
+    least recently used entry is evicted once max_size is reached. The cache is
+    per process, so changes made by other processes show up after at most one TTL.
+    Lookups, removals and size are exported on /metrics.
+    """
+    
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[CacheKey, Tuple[float, User]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    @staticmethod
+    def _snapshot(user: User) -> User:
+        """Copy column values into a transient User not bound to any session"""
+        return User(**{column.name: getattr(user, column.name) for column in User.__table__.columns})
+    
+    def get(self, user_id: UUID, exp: Optional[int]) -> Optional[User]:
+        key = (user_id, exp)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                    USER_CACHE_ENTRIES.set(len(self._entries))
+                self.misses += 1
+                USER_CACHE_LOOKUPS_TOTAL.labels(result="miss").inc()
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            USER_CACHE_LOOKUPS_TOTAL.labels(result="hit").inc()
+            return entry[1]
+    
+    def set(self, user: User, exp: Optional[int]) -> None:
+        if self.max_size <= 0 or self.ttl_seconds <= 0:
+            return
+        
+        ttl = self.ttl_seconds
+        if exp is not None:
+            ttl = min(ttl, exp - time.time())
+            if ttl <= 0:
+                return
+        
+        key = (user.id, exp)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, self._snapshot(user))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+                USER_CACHE_REMOVALS_TOTAL.labels(reason="evicted").inc()
+            USER_CACHE_ENTRIES.set(len(self._entries))
+    
+    def invalidate(self, user_id: UUID) -> None:
+        """Drop every cached entry for a user (any token)"""
+        with self._lock:
+            stale_keys = [key for key in self._entries if key[0] == user_id]
+            for key in stale_keys:
+                del self._entries[key]
+            self.invalidations += len(stale_keys)
+            USER_CACHE_REMOVALS_TOTAL.labels(reason="invalidated").inc(len(stale_keys))
+            USER_CACHE_ENTRIES.set(len(self._entries))
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            USER_CACHE_ENTRIES.set(0)
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+user_cache = UserCache(
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS
+)
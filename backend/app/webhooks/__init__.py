@@ -0,0 +1 @@
+# Webhook notification channel
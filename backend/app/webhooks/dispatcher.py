@@ -0,0 +1,92 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import time
+from typing import Dict, Any, List, Optional
+
+import httpx
+
+from .payloads import format_payload
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Endpoint responses worth retrying; any other 4xx goes straight to the dead-letter table
+RETRYABLE_STATUS_CODES = {408, 425, 429}
+
+class WebhookDispatcher:
+    """
+    Async webhook sender
+
+    Sends deliveries concurrently over one pooled client, with at most
+    WEBHOOK_MAX_CONCURRENCY requests in flight overall and at most
+    WEBHOOK_PER_ENDPOINT_CONCURRENCY per endpoint URL, so one slow receiver
+    can't take every connection.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        per_endpoint_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None
+    ):
+        self.max_concurrency = max_concurrency or settings.WEBHOOK_MAX_CONCURRENCY
+        self.per_endpoint_concurrency = per_endpoint_concurrency or settings.WEBHOOK_PER_ENDPOINT_CONCURRENCY
+        self.timeout = timeout or settings.WEBHOOK_TIMEOUT_SECONDS
+        self._endpoint_limits: Dict[str, asyncio.Semaphore] = {}
+
+    @staticmethod
+    def sign(secret: str, body: bytes) -> str:
+        return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+    async def _deliver(
+        self,
+        client: httpx.AsyncClient,
+        overall_limit: asyncio.Semaphore,
+        delivery: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        body = json.dumps(format_payload(delivery['kind'], delivery['payload'])).encode()
+        headers = {"Content-Type": "application/json", "User-Agent": "PingDaemon-Webhooks/1.0"}
+        if delivery.get('secret'):
+            headers["X-PingDaemon-Signature"] = self.sign(delivery['secret'], body)
+
+        endpoint_limit = self._endpoint_limits.setdefault(
+            delivery['url'], asyncio.Semaphore(self.per_endpoint_concurrency)
+        )
+        async with endpoint_limit, overall_limit:
+            started_at = time.perf_counter()
+            try:
+                response = await client.post(delivery['url'], content=body, headers=headers)
+            except httpx.HTTPError as e:
+                error_msg = str(e) if str(e) else type(e).__name__
+                return {'success': False, 'retryable': True, 'status_code': None, 'error': error_msg}
+            duration = time.perf_counter() - started_at
+
+        if 200 <= response.status_code < 300:
+            return {'success': True, 'status_code': response.status_code, 'duration': duration}
+
+        return {
+            'success': False,
+            'retryable': response.status_code >= 500 or response.status_code in RETRYABLE_STATUS_CODES,
+            'status_code': response.status_code,
+            'error': f"HTTP {response.status_code}: {response.text[:500]}"
+        }
+
+    async def deliver_many(self, deliveries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Send deliveries (dicts with url, kind, secret, payload)
+
+        Returns one result per delivery in input order, with success,
+        status_code and, for failures, error and whether it is retryable.
+        """
+        if not deliveries:
+            return []
+
+        overall_limit = asyncio.Semaphore(self.max_concurrency)
+        limits = httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits) as client:
+            return await asyncio.gather(*(
+                self._deliver(client, overall_limit, delivery) for delivery in deliveries
+            ))
@@ -0,0 +1,54 @@
+# Webhook payload formats built from stored event data
+from typing import Dict, Any
+
+from ..email.templates import get_status_change_variant
+from ..config import settings
+
+STATUS_CHANGED_EVENT = "monitor.status_changed"
+
+def build_status_change_event(
+    job_id: str,
+    job_url: str,
+    previous_status: str,
+    current_status: str,
+    error_message: str,
+    detected_at: str
+) -> Dict[str, Any]:
+    """Event data stored on each delivery (format independent)"""
+    return {
+        'event': STATUS_CHANGED_EVENT,
+        'job_id': job_id,
+        'url': job_url,
+        'previous_status': previous_status,
+        'current_status': current_status,
+        'error_message': error_message,
+        'detected_at': detected_at
+    }
+
+def _slack_payload(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Slack incoming-webhook message (also accepted by Mattermost and Discord's /slack endpoint)"""
+    variant = get_status_change_variant(event['previous_status'], event['current_status'])
+    fields = [
+        {'title': 'Previous Status', 'value': event['previous_status'].title(), 'short': True},
+        {'title': 'Current Status', 'value': event['current_status'].title(), 'short': True},
+    ]
+    if event.get('error_message'):
+        fields.append({'title': 'Error Details', 'value': event['error_message'], 'short': False})
+
+    return {
+        'text': f"{variant['status_icon']} {variant['status_text']}: {event['url']}",
+        'attachments': [{
+            'color': variant['status_color'],
+            'title': event['url'],
+            'title_link': event['url'],
+            'text': variant['intro_text'],
+            'fields': fields,
+            'footer': f"PingDaemon • detected at {event['detected_at']} • {settings.FRONTEND_URL}/monitors"
+        }]
+    }
+
+def format_payload(kind: str, event: Dict[str, Any]) -> Dict[str, Any]:
+    """Body sent to a webhook of the given kind"""
+    if kind == "slack":
+        return _slack_payload(event)
+    return event
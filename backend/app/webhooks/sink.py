@@ -0,0 +1,75 @@
+"""
+Local webhook receiver for testing and benchmarking the dispatcher
+
+    python -m app.webhooks.sink --port 9009 --latency-ms 50 --fail-rate 0.1
+
+Point a webhook at http://localhost:9009/ and the sink logs each payload
+and prints throughput once a second. --fail-rate answers that share of
+requests with a 503 to exercise retries and dead-lettering.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_stats = {'received': 0, 'failed': 0}
+_stats_lock = threading.Lock()
+
+class _SinkHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    fail_rate = 0.0
+    verbose = False
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.latency:
+            time.sleep(self.latency)
+
+        failed = random.random() < self.fail_rate
+        with _stats_lock:
+            _stats['received'] += 1
+            _stats['failed'] += int(failed)
+
+        if self.verbose:
+            print(json.dumps({'path': self.path, 'failed': failed, 'body': json.loads(body or b"null")}))
+
+        self.send_response(503 if failed else 200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(b'{"ok": false}' if failed else b'{"ok": true}')
+
+    def log_message(self, format, *args):
+        pass
+
+def _report():
+    last = 0
+    while True:
+        time.sleep(1)
+        with _stats_lock:
+            received, failed = _stats['received'], _stats['failed']
+        if received != last:
+            print(f"📥 {received} received ({received - last}/s), {failed} answered 503")
+            last = received
+
+def main():
+    parser = argparse.ArgumentParser(description="Local webhook sink")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9009)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--fail-rate", type=float, default=0)
+    parser.add_argument("--verbose", action="store_true", help="Print every payload")
+    args = parser.parse_args()
+
+    _SinkHandler.latency = args.latency_ms / 1000
+    _SinkHandler.fail_rate = args.fail_rate
+    _SinkHandler.verbose = args.verbose
+
+    threading.Thread(target=_report, daemon=True).start()
+    server = ThreadingHTTPServer((args.host, args.port), _SinkHandler)
+    print(f"🪝 Webhook sink listening on http://{args.host}:{args.port}/")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
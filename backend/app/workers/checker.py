@@ -1,12 +1,16 @@
 from ..celery_worker import celery_app
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
-from datetime import datetime, timedelta
-from typing import Dict, Any
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional
 from ..database import SessionLocal
 from ..models.job import Job
 from ..services.health_service import HealthService
 from ..services.alert_service import AlertService
+from ..services.sweep_service import SweepService
+from ..probes.dns_cache import dns_cache
+from ..probes.scheduler import host_key
+from ..config import settings
 
 
 @celery_app.task(bind=True)
@@ -68,27 +72,12 @@ def check_all_active_jobs() -> Dict[str, Any]:
         # Get all enabled jobs
         active_jobs = db.query(Job).filter(Job.is_enabled == True).all()
         
-        results = []
-        for job in active_jobs:
-            try:
-                result = HealthService.perform_health_check(db, job)
-                
-                results.append({
-                    'job_id': str(job.id),
-                    'job_url': job.url,
-                    'success': True,
-                    **result
-                })
-            except Exception as e:
-                results.append({
-                    'job_id': str(job.id),
-                    'job_url': job.url if job else 'unknown',
-                    'success': False,
-                    'error': str(e)
-                })
+        # Jobs sharing a URL are probed once
+        results, probes_sent = HealthService.check_jobs(db, active_jobs)
         
         return {
             'total_jobs': len(active_jobs),
+            'probes_sent': probes_sent,
             'checked_at': datetime.utcnow().isoformat(),
             'results': results,
             'success': True
@@ -106,12 +95,13 @@ def check_all_active_jobs() -> Dict[str, Any]:
 
 
 @celery_app.task
-def check_jobs_by_interval(interval_minutes: int) -> Dict[str, Any]:
+def check_due_confirmations() -> Dict[str, Any]:
     """
-    Check jobs that should be checked based on their interval
+    Run the confirmation re-checks that are due
     
-    Args:
-        interval_minutes: Check jobs with this specific interval
+    Due jobs are claimed and checked like a sweep (HealthService.check_jobs),
+    so jobs sharing a target share one probe, and host limits and open
+    circuits apply to confirmations too.
     
     Returns:
         Dict containing results of checks
@@ -119,49 +109,118 @@ def check_jobs_by_interval(interval_minutes: int) -> Dict[str, Any]:
     db: Session = SessionLocal()
     
     try:
-        # Get jobs with specific interval that are enabled
-        jobs_to_check = db.query(Job).filter(
-            and_(
-                Job.is_enabled == True,
-                Job.interval == interval_minutes
-            )
-        ).all()
-        
-        results = []
-        for job in jobs_to_check:
-            try:
-                result = HealthService.perform_health_check(db, job)
-                
-                results.append({
-                    'job_id': str(job.id),
-                    'job_url': job.url,
-                    'success': True,
-                    **result
-                })
-                
-            except Exception as e:
-                results.append({
-                    'job_id': str(job.id),
-                    'job_url': job.url if job else 'unknown',
-                    'success': False,
-                    'error': str(e)
-                })
+        due_jobs = HealthService.claim_due_confirmations(db)
+        results, probes_sent = HealthService.check_jobs(db, due_jobs) if due_jobs else ([], 0)
         
         return {
-            'interval_minutes': interval_minutes,
-            'total_jobs_checked': len(results),
+            'total_jobs': len(due_jobs),
+            'probes_sent': probes_sent,
             'checked_at': datetime.utcnow().isoformat(),
             'results': results,
             'success': True
         }
         
     except Exception as e:
+        db.rollback()
         return {
-            'interval_minutes': interval_minutes,
             'error': str(e),
             'success': False,
             'checked_at': datetime.utcnow().isoformat()
         }
     
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def _published_at(request) -> Optional[datetime]:
+    """When the task message was published (header added in celery_worker)"""
+    published_at = getattr(request, 'published_at', None) or (getattr(request, 'headers', None) or {}).get('published_at')
+    return datetime.fromtimestamp(published_at, timezone.utc) if published_at else None
+
+
+@celery_app.task(bind=True)
+def check_jobs_by_interval(self, interval_minutes: int) -> Dict[str, Any]:
+    """
+    Check jobs that should be checked based on their interval
+    
+    A tick that arrives while the previous sweep of the same interval is
+    still running is coalesced (skipped) rather than checking the same jobs
+    twice; every tick is recorded as a SweepRun.
+    
+    Args:
+        interval_minutes: Check jobs with this specific interval
+    
+    Returns:
+        Dict containing results of checks
+    """
+    started_at = datetime.now(timezone.utc)
+    scheduled_at = _published_at(self.request) or started_at
+    
+    with SweepService.sweep_lock(interval_minutes) as acquired:
+        db: Session = SessionLocal()
+        
+        try:
+            if not acquired:
+                SweepService.record_run(
+                    db, interval_minutes, "coalesced", scheduled_at, started_at, datetime.now(timezone.utc)
+                )
+                return {
+                    'interval_minutes': interval_minutes,
+                    'total_jobs_checked': 0,
+                    'coalesced': True,
+                    'checked_at': datetime.utcnow().isoformat(),
+                    'success': True
+                }
+            
+            # Get jobs with specific interval that are enabled
+            jobs_to_check = db.query(Job).filter(
+                and_(
+                    Job.is_enabled == True,
+                    Job.interval == interval_minutes
+                )
+            ).all()
+            
+            # Resolve the sweep's hosts in parallel up front, so probes start on a
+            # warm cache instead of each spending a host slot on its own lookup
+            dns_prefetched = dns_cache.prefetch(
+                (host_key(job.url) for job in jobs_to_check), timeout=settings.DNS_TIMEOUT_SECONDS
+            )
+            
+            # One probe per distinct normalized URL, fanned out to each job
+            results, probes_sent = HealthService.check_jobs(db, jobs_to_check)
+            
+            sweep_run = SweepService.record_run(
+                db, interval_minutes, "completed", scheduled_at, started_at,
+                datetime.now(timezone.utc), jobs_checked=len(results), probes_sent=probes_sent
+            )
+            
+            return {
+                'interval_minutes': interval_minutes,
+                'total_jobs_checked': len(results),
+                'dns_prefetched': dns_prefetched,
+                'probes_sent': probes_sent,
+                'checked_at': datetime.utcnow().isoformat(),
+                'drift_seconds': sweep_run.drift_seconds,
+                'duration_seconds': sweep_run.duration_seconds,
+                'overran': sweep_run.overran,
+                'results': results,
+                'success': True
+            }
+            
+        except Exception as e:
+            db.rollback()
+            try:
+                SweepService.record_run(
+                    db, interval_minutes, "failed", scheduled_at, started_at, datetime.now(timezone.utc)
+                )
+            except Exception:
+                db.rollback()
+            return {
+                'interval_minutes': interval_minutes,
+                'error': str(e),
+                'success': False,
+                'checked_at': datetime.utcnow().isoformat()
+            }
+        
+        finally:
+            db.close()
@@ -6,6 +6,9 @@ from typing import Dict, Any
 from ..celery_worker import celery_app
 from ..database import SessionLocal
 from ..services.data_retention_service import DataRetentionService
+from ..services.webhook_service import WebhookService
+from ..services.sweep_service import SweepService
+from ..services.circuit_breaker_service import CircuitBreakerService
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +39,15 @@ def cleanup_old_data() -> Dict[str, Any]:
         # Clean up old email queue (keep 7 days)  
         email_result = DataRetentionService.cleanup_old_email_queue(db, days_to_keep=7)
         
+        # Clean up delivered webhooks (keep 7 days; dead letters are kept)
+        deleted_webhook_deliveries = WebhookService.cleanup_old_deliveries(db, days=7)
+        
+        # Clean up check sweep records (keep 7 days)
+        deleted_sweep_runs = SweepService.cleanup_old_runs(db, days=7)
+        
+        # Drop circuits of targets no longer probed (keep 7 days)
+        deleted_circuits = CircuitBreakerService.cleanup_stale(db, days=7)
+        
         # Get stats after cleanup
         stats_after = DataRetentionService.get_database_stats(db)
         
@@ -44,9 +56,12 @@ def cleanup_old_data() -> Dict[str, Any]:
             'timestamp': datetime.utcnow().isoformat(),
             'health_logs_cleanup': health_result,
             'email_queue_cleanup': email_result,
+            'webhook_deliveries_deleted': deleted_webhook_deliveries,
+            'sweep_runs_deleted': deleted_sweep_runs,
+            'probe_circuits_deleted': deleted_circuits,
             'stats_before': stats_before,
             'stats_after': stats_after,
-            'total_deleted': health_result.get('deleted_count', 0) + email_result.get('deleted_count', 0)
+            'total_deleted': health_result.get('deleted_count', 0) + email_result.get('deleted_count', 0) + deleted_webhook_deliveries + deleted_sweep_runs + deleted_circuits
         }
         
         logger.info(f"Data cleanup completed. Total records deleted: {result['total_deleted']}")
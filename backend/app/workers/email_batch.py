@@ -1,9 +1,17 @@
+import hashlib
+import json
 import logging
+from celery.signals import worker_process_shutdown
 from datetime import datetime
+from typing import List, Dict, Any, Tuple
+from uuid import UUID
 from sqlalchemy.orm import Session
 from ..database import get_db
-from ..email.resend_client import ResendClient
+from ..email.transports import send_messages, close_transports
+from ..email.templates import render_email, STATUS_CHANGE_TEMPLATE, STATUS_DIGEST_TEMPLATE
+from ..models.email_queue import EmailQueue
 from ..services.email_queue_service import EmailQueueService
+from ..config import settings
 from ..celery_worker import celery_app
 
 
@@ -16,63 +24,77 @@ def process_email_batch(self, batch_size: int = 2):
     """
     Process a batch of queued emails with rate limiting
     
+    Rows are claimed atomically, so several of these tasks can run at once
+    without sending the same email twice.
+    
     Args:
-        batch_size: Number of emails to process in this batch (default: 2 for Resend rate limit)
+        batch_size: Number of emails to process in this batch (sends are paced by
+            RESEND_RATE_LIMIT_PER_SECOND, not by the batch size)
     """
     db = next(get_db())
     
     try:
-        # Get pending emails for batch processing
-        pending_emails = EmailQueueService.get_pending_emails(db, limit=batch_size)
+        # Return rows stuck in "processing" by a crashed worker to the queue
+        EmailQueueService.release_expired_claims(db)
+        
+        # Claim pending emails for this worker (already marked processing)
+        pending_emails = EmailQueueService.claim_pending_emails(db, limit=batch_size)
         
         if not pending_emails:
             logger.debug("No pending emails to process")
             return {"processed": 0, "success": True}
         
-        successful_sends = 0
-        failed_sends = 0
-        resend_client = ResendClient()
+        # Merge each user's status changes into one digest; users at their cap wait a window
+        deliveries, deferred_ids = _group_deliveries(db, pending_emails)
+        EmailQueueService.defer_emails(db, deferred_ids, settings.ALERT_DIGEST_WINDOW_SECONDS)
+        
+        # Render template references; identical params are rendered once per batch
+        messages, render_failures = _build_messages(deliveries)
+        
+        # Send concurrently through the process's long-lived transport (pooled, rate limited, retried)
+        sendable = [group for group in deliveries if group[0].id not in render_failures]
+        send_results = send_messages(messages)
+        
+        single_ids = []
+        digests = []
+        failures = {
+            email.id: render_failures[group[0].id]
+            for group in deliveries if group[0].id in render_failures
+            for email in group
+        }
+        for group, send_result in zip(sendable, send_results):
+            if not send_result['success']:
+                failures.update({email.id: send_result['error'] for email in group})
+                logger.error(f"❌ Failed to send email {group[0].id}: {send_result['error']}")
+            elif len(group) > 1:
+                digests.append(group)
+            else:
+                single_ids.append(group[0].id)
+        
+        # Write status updates in bulk (one UPDATE per digest)
+        latencies = EmailQueueService.mark_emails_sent(db, single_ids)
+        for group in digests:
+            latencies += EmailQueueService.mark_emails_sent(db, [email.id for email in group], digest_id=group[0].id)
+        EmailQueueService.mark_emails_failed(db, failures)
         
-        for email in pending_emails:
-            try:
-                # Mark email as processing
-                EmailQueueService.mark_email_processing(db, email.id)
-                
-                # Prepare email parameters for Resend with CLEAN SENDER ADDRESS
-                params = {
-                    "from": "PingDaemon <noreply@ping-daemon.me>",  # UPDATED: Clean, professional sender
-                    "to": [email.recipient_email],
-                    "subject": email.subject,
-                    "html": email.html_content,
-                    "text": email.text_content,
-                }
-                
-                # Send email using Resend client
-                result = resend_client._send_email_direct(params)
-                
-                if result['success']:
-                    EmailQueueService.mark_email_sent(db, email.id)
-                    successful_sends += 1
-                    logger.info(f"✅ Successfully sent email {email.id} to {email.recipient_email} from PingDaemon")
-                else:
-                    EmailQueueService.mark_email_failed(db, email.id, result['error'])
-                    failed_sends += 1
-                    logger.error(f"❌ Failed to send email {email.id}: {result['error']}")
-                
-            except Exception as e:
-                EmailQueueService.mark_email_failed(db, email.id, str(e))
-                failed_sends += 1
-                logger.error(f"💥 Exception processing email {email.id}: {str(e)}")
+        successful_sends = len(single_ids) + sum(len(group) for group in digests)
+        failed_sends = len(failures)
         
         result = {
             "processed": len(pending_emails),
             "successful": successful_sends,
             "failed": failed_sends,
+            "deferred": len(deferred_ids),
+            "digests": len(digests),
+            "enqueue_to_send_seconds": {
+                "avg": round(sum(latencies) / len(latencies), 3) if latencies else None,
+                "max": round(max(latencies), 3) if latencies else None
+            },
             "success": True,
             "timestamp": datetime.utcnow().isoformat()
         }
         
-        logger.info(f"📊 Batch processing complete: {successful_sends} sent, {failed_sends} failed")
+        logger.info(f"📊 Batch processing complete: {successful_sends} sent, {failed_sends} failed, enqueue-to-send avg {result['enqueue_to_send_seconds']['avg']}s")
         return result
         
     except Exception as e:
@@ -83,38 +105,110 @@ def process_email_batch(self, batch_size: int = 2):
     finally:
         db.close()
 
-# Helper method to add to ResendClient for direct email sending
-def _add_direct_send_method_to_resend_client():
-    """Add a direct send method to ResendClient for batch processing"""
-    import resend
+def _group_deliveries(db: Session, emails: List[EmailQueue]) -> Tuple[List[List[EmailQueue]], List[UUID]]:
+    """
+    Group claimed emails into deliveries (one provider message each)
+    
+    A user's status change alerts become one delivery, sent as a digest when
+    there are several. Users who already got ALERT_DIGEST_MAX_PER_WINDOW
+    emails in the window are left out and their ids returned for deferral.
+    """
+    if settings.ALERT_DIGEST_WINDOW_SECONDS <= 0:
+        return [[email] for email in emails], []
+    
+    deliveries = []
+    alerts_by_user: Dict[UUID, List[EmailQueue]] = {}
+    for email in emails:
+        if email.template_id != STATUS_CHANGE_TEMPLATE:
+            deliveries.append([email])
+        elif email.user_id in alerts_by_user:
+            alerts_by_user[email.user_id].append(email)
+        else:
+            alerts_by_user[email.user_id] = [email]
+            deliveries.append(alerts_by_user[email.user_id])
+    
+    if settings.ALERT_DIGEST_MAX_PER_WINDOW <= 0 or not alerts_by_user:
+        return deliveries, []
+    
+    recent_sends = EmailQueueService.count_recent_sends(db, list(alerts_by_user))
+    capped = {
+        id(group): group for user_id, group in alerts_by_user.items()
+        if recent_sends.get(user_id, 0) >= settings.ALERT_DIGEST_MAX_PER_WINDOW
+    }
+    deferred_ids = [email.id for group in capped.values() for email in group]
+    if deferred_ids:
+        logger.info(f"⏸️ Deferring {len(deferred_ids)} alerts for {len(capped)} users at their email cap")
+    
+    return [group for group in deliveries if id(group) not in capped], deferred_ids
+
+def _build_messages(deliveries: List[List[EmailQueue]]) -> Tuple[List[Dict[str, Any]], Dict[UUID, str]]:
+    """
+    Build provider messages for grouped deliveries
     
-    def _send_email_direct(self, params):
-        """Send email directly without additional formatting"""
+    Returns the messages (in delivery order, skipping unrenderable ones) and a
+    map of lead email id to error for deliveries that could not be rendered.
+    """
+    rendered_cache = {}
+    messages = []
+    failures = {}
+    sent_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S UTC")
+    
+    for group in deliveries:
+        email = group[0]
         try:
-            email = resend.Emails.send(params)
-            logger.info(f"📧 Email sent successfully via Resend from {params.get('from', 'PingDaemon')}")
-            return {
-                'success': True,
-                'message_id': email.get('id'),
-                'status': 'sent'
-            }
+            if len(group) > 1:
+                subject, html_content, text_content = render_email(
+                    STATUS_DIGEST_TEMPLATE,
+                    {'alerts': [alert.template_params for alert in group], 'sent_at': sent_at}
+                )
+            elif email.template_id:
+                cache_key = (email.template_id, json.dumps(email.template_params, sort_keys=True, default=str))
+                if cache_key not in rendered_cache:
+                    rendered_cache[cache_key] = render_email(email.template_id, email.template_params or {})
+                subject, html_content, text_content = rendered_cache[cache_key]
+            else:
+                # Rows queued before template references carry their rendered body
+                subject, html_content, text_content = email.subject, email.html_content, email.text_content
         except Exception as e:
-            error_msg = str(e) if str(e) else f"{type(e).__name__}: Unknown error"
-            logger.error(f"💥 Exception sending email via Resend: {error_msg}")
-            logger.error(f"Exception type: {type(e).__name__}")
-            logger.error(f"Email params: {params}")
-            if hasattr(e, 'response'):
-                logger.error(f"Response status: {getattr(e.response, 'status_code', 'N/A')}")
-                logger.error(f"Response text: {getattr(e.response, 'text', 'N/A')}")
-            return {
-                'success': False,
-                'error': error_msg,
-                'error_type': type(e).__name__,
-                'status': 'failed'
-            }
+            failures[email.id] = f"Template render failed: {str(e)}"
+            logger.error(f"❌ Failed to render email {email.id}: {str(e)}")
+            continue
+        
+        messages.append({
+            "from": "PingDaemon <noreply@ping-daemon.me>",  # UPDATED: Clean, professional sender
+            "to": [email.recipient_email],
+            "subject": subject,
+            "html": html_content,
+            "text": text_content,
+            # Same key on every attempt, so the provider drops a resend of an accepted message
+            "idempotency_key": _idempotency_key(group),
+        })
+    
+    return messages, failures
+
+def _idempotency_key(group: List[EmailQueue]) -> str:
+    """Alert dedup key (or row id) of a delivery; digests hash their members' keys"""
+    if len(group) == 1:
+        return group[0].dedup_key or str(group[0].id)
+    members = sorted(str(email.id) for email in group)
+    return f"digest:{hashlib.sha256(','.join(members).encode()).hexdigest()}"
+
+@celery_app.task
+def dispatch_email_batches(batch_size: int = 2, dispatchers: int = None):
+    """
+    Fan out one process_email_batch task per dispatcher
+    
+    Args:
+        batch_size: Number of emails each dispatcher claims
+        dispatchers: Number of parallel batch tasks (default: EMAIL_DISPATCHERS)
+    """
+    dispatchers = dispatchers or settings.EMAIL_DISPATCHERS
+    for _ in range(dispatchers):
+        process_email_batch.delay(batch_size)
     
-    # Add method to ResendClient class
-    ResendClient._send_email_direct = _send_email_direct
+    return {"dispatched": dispatchers, "batch_size": batch_size}
 
-# Add the method when module is imported
-_add_direct_send_method_to_resend_client()
\ No newline at end of file
+@worker_process_shutdown.connect
+def _close_email_transports(**kwargs):
+    """Close pooled transport connections when a worker child exits"""
+    close_transports()
@@ -0,0 +1,48 @@
+import glob
+import logging
+import os
+import time
+
+from celery.signals import celeryd_init, worker_ready, task_prerun, task_postrun, worker_process_shutdown
+from prometheus_client import start_http_server, multiprocess
+
+from ..utils.metrics import MULTIPROCESS, TASK_SECONDS, get_registry
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Start times of tasks running in this process, by task id
+_task_started_at = {}
+
+@celeryd_init.connect
+def _reset_multiprocess_dir(**kwargs):
+    """Drop samples left by a previous worker run before children fork"""
+    if not MULTIPROCESS:
+        return
+    for path in glob.glob(os.path.join(os.environ["PROMETHEUS_MULTIPROC_DIR"], "*.db")):
+        os.remove(path)
+
+@worker_ready.connect
+def _start_metrics_exporter(**kwargs):
+    """Serve /metrics from the main worker process, aggregating prefork children"""
+    if settings.WORKER_METRICS_PORT <= 0:
+        return
+    if not MULTIPROCESS:
+        logger.warning("⚠️ PROMETHEUS_MULTIPROC_DIR not set, worker metrics only cover the main process")
+    start_http_server(settings.WORKER_METRICS_PORT, registry=get_registry())
+    logger.info(f"📈 Worker metrics on :{settings.WORKER_METRICS_PORT}/metrics")
+
+@task_prerun.connect
+def _task_started(task_id=None, **kwargs):
+    _task_started_at[task_id] = time.perf_counter()
+
+@task_postrun.connect
+def _task_finished(task_id=None, task=None, state=None, **kwargs):
+    started_at = _task_started_at.pop(task_id, None)
+    if started_at is not None:
+        TASK_SECONDS.labels(task.name, state or "UNKNOWN").observe(time.perf_counter() - started_at)
+
+@worker_process_shutdown.connect
+def _mark_process_dead(pid=None, **kwargs):
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid or os.getpid())
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+from datetime import datetime
+
+from ..database import get_db
+from ..services.webhook_service import WebhookService
+from ..webhooks.dispatcher import WebhookDispatcher
+from ..config import settings
+from ..celery_worker import celery_app
+
+logger = logging.getLogger(__name__)
+
+@celery_app.task(bind=True, max_retries=3)
+def process_webhook_deliveries(self, batch_size: int = 100):
+    """
+    Deliver due webhook notifications
+    
+    Claims due deliveries, sends them concurrently (bounded per endpoint),
+    then marks successes, reschedules retryable failures with backoff and
+    dead-letters the rest.
+    
+    Args:
+        batch_size: Number of deliveries to claim in this run
+    """
+    db = next(get_db())
+    
+    try:
+        WebhookService.release_expired_claims(db)
+        
+        claimed = WebhookService.claim_due_deliveries(db, limit=batch_size)
+        if not claimed:
+            logger.debug("No webhook deliveries due")
+            return {"processed": 0, "success": True}
+        
+        requests = [
+            {'url': webhook.url, 'kind': webhook.kind, 'secret': webhook.secret, 'payload': delivery.payload}
+            for delivery, webhook in claimed
+        ]
+        results = asyncio.run(WebhookDispatcher().deliver_many(requests))
+        
+        delivered = {}
+        retries = []
+        dead = []
+        for (delivery, webhook), result in zip(claimed, results):
+            if result['success']:
+                delivered[delivery.id] = result['status_code']
+            elif result['retryable'] and delivery.attempts < delivery.max_attempts:
+                retries.append((delivery, result))
+            else:
+                dead.append((delivery, result))
+                logger.error(f"❌ Webhook delivery {delivery.id} to {webhook.url} failed permanently: {result['error']}")
+        
+        WebhookService.mark_delivered(db, delivered)
+        next_retry = WebhookService.schedule_retries(db, retries)
+        WebhookService.dead_letter(db, dead)
+        
+        # Run again when the earliest retry is due rather than at the next poll
+        if next_retry is not None and next_retry < settings.WEBHOOK_POLL_INTERVAL_SECONDS:
+            WebhookService.wake_dispatcher(countdown=next_retry)
+        
+        # A full batch means more may be due right now
+        if len(claimed) == batch_size:
+            WebhookService.wake_dispatcher()
+        
+        result = {
+            "processed": len(claimed),
+            "delivered": len(delivered),
+            "retrying": len(retries),
+            "dead_lettered": len(dead),
+            "success": True,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        logger.info(f"🪝 Webhook run complete: {len(delivered)} delivered, {len(retries)} retrying, {len(dead)} dead-lettered")
+        return result
+        
+    except Exception as e:
+        logger.error(f"🚨 Error processing webhook deliveries: {str(e)}")
+        db.rollback()
+        raise self.retry(countdown=30, exc=Exception(f"Webhook processing failed: {str(e)}"))
+    
+    finally:
+        db.close()
@@ -0,0 +1,138 @@
+import asyncio
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, User, Job
+
+# Tests that need PostgreSQL (SKIP LOCKED, ON CONFLICT, partial indexes) run against
+# TEST_DATABASE_URL and are skipped without it. The database is wiped between tests.
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+@pytest.fixture(scope="session")
+def pg_engine():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(pg_engine):
+    factory = sessionmaker(bind=pg_engine, autoflush=False)
+    sessions = []
+    
+    def open_session():
+        sessions.append(factory())
+        return sessions[-1]
+    
+    yield open_session
+    # A failed test may leave a transaction open, which would block the TRUNCATE
+    for session in sessions:
+        session.close()
+    tables = ", ".join(table.name for table in Base.metadata.sorted_tables)
+    with pg_engine.begin() as conn:
+        conn.execute(text(f"TRUNCATE {tables} CASCADE"))
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def make_user(db):
+    def make(**fields):
+        user = User(email=fields.pop("email", f"{uuid4().hex}@example.com"), **fields)
+        db.add(user)
+        db.commit()
+        return user
+    return make
+
+
+@pytest.fixture
+def make_job(db, make_user):
+    def make(url="https://example.com/", **fields):
+        owner = fields.pop("owner", None) or make_user()
+        job = Job(url=url, interval=fields.pop("interval", 5), user_id=owner.id, **fields)
+        db.add(job)
+        db.commit()
+        return job
+    return make
+
+
+@pytest.fixture
+def http_server():
+    """
+    Start a local HTTP server; call it with {path: (status, headers, body)}
+    
+    Returns the base URL. Requested paths are appended to `http_server.requests`.
+    """
+    servers = []
+    requests_seen = []
+    
+    def start(routes):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                requests_seen.append(self.path)
+                status, headers, body = routes.get(self.path, (404, {}, b"not found"))
+                body = body() if callable(body) else body
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                if isinstance(body, bytes):
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                else:
+                    # Iterable of chunks, streamed without a length
+                    self.send_header("Connection", "close")
+                    self.end_headers()
+                    try:
+                        for chunk in body:
+                            self.wfile.write(chunk)
+                            self.wfile.flush()
+                    except (BrokenPipeError, ConnectionResetError):
+                        pass
+            
+            def log_message(self, *args):
+                pass
+        
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+    
+    start.requests = requests_seen
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def run_async(pg_engine):
+    """Run `fn(async_session, *args)` on the test database and return its result"""
+    def run(fn, *args):
+        async def main():
+            engine = create_async_engine(pg_engine.url.set(drivername="postgresql+asyncpg"))
+            try:
+                async with AsyncSession(engine, expire_on_commit=False) as session:
+                    return await fn(session, *args)
+            finally:
+                await engine.dispose()
+        return asyncio.run(main())
+    return run
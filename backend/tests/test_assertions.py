@@ -0,0 +1,82 @@
+import pytest
+
+from app.config import settings
+from app.probes.assertions import AssertionSet, ContainsMatcher, RegexMatcher
+
+
+def feed_all(matcher, chunks):
+    for chunk in chunks:
+        if not matcher.decided:
+            matcher.feed(chunk)
+    return matcher.finish()
+
+
+def splits(body):
+    """The body cut once at every position, plus one byte at a time"""
+    for cut in range(len(body) + 1):
+        yield [body[:cut], body[cut:]]
+    yield [body[i:i + 1] for i in range(len(body))]
+
+
+@pytest.fixture
+def small_window(monkeypatch):
+    monkeypatch.setattr(settings, "PROBE_REGEX_WINDOW_BYTES", 8)
+
+
+@pytest.mark.parametrize("needle", ["status: ok", "ü", "a"])
+def test_contains_finds_needle_wherever_the_chunks_split(needle):
+    body = f"<html>all systems {needle} today</html>".encode()
+    for chunks in splits(body):
+        assert feed_all(ContainsMatcher(needle), chunks) is None, chunks
+
+
+def test_contains_reports_missing_needle_without_buffering():
+    matcher = ContainsMatcher("healthy")
+    detail = feed_all(matcher, [b"heal", b"th-y and down"] * 50)
+    
+    assert detail == "Body does not contain 'healthy'"
+    assert len(matcher.tail) == len("healthy") - 1
+
+
+def test_regex_finds_match_across_boundaries(small_window):
+    body = b"xxxxxxxxxx v=1.42 xxxxxxxxxx"  # match within the 8-byte window
+    for chunks in splits(body):
+        assert feed_all(RegexMatcher(r"v=\d+\.\d+"), chunks) is None, chunks
+
+
+def test_regex_tail_stays_bounded(small_window):
+    matcher = RegexMatcher("never")
+    feed_all(matcher, [b"0123456789"] * 100)
+    
+    assert len(matcher.tail) == settings.PROBE_REGEX_WINDOW_BYTES + 1
+
+
+@pytest.mark.parametrize("pattern, body, matches", [
+    # ^ is the start of the body, not of a carried-over window
+    (rb"^<html", b"<html><body>ok</body></html>", True),
+    (rb"^ok", b"0123456789ok and more", False),
+    # $ is the end of the body, not of a chunk
+    (rb"ok$", b"0123456789 all ok", True),
+    (rb"ok$", b"ok then more body follows", False),
+    (rb"ok$", b"ok\nthen more body follows", False),
+    # \b needs the byte before the window
+    (rb"\bready\b", b"0123456789already", False),
+    (rb"\bready\b", b"0123456789 ready!", True),
+    # a greedy match is not cut short at a chunk boundary
+    (rb"id=\d{4}\b", b"0123 id=12345", False),
+])
+def test_regex_anchors_mean_the_whole_body(small_window, pattern, body, matches):
+    for chunks in splits(body):
+        detail = feed_all(RegexMatcher(pattern.decode()), chunks)
+        assert (detail is None) == matches, chunks
+
+
+def test_assertion_set_stops_once_every_keyword_matched():
+    assertions = AssertionSet([
+        {'type': 'contains', 'value': 'ok'},
+        {'type': 'regex', 'value': r'v\d'},
+    ])
+    
+    assert assertions.feed(b"status o") is False
+    assert assertions.feed(b"k, v2 and more") is True
+    assert [result['passed'] for result in assertions.finish()] == [True, True]
@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+
+from app.config import settings
+from app.models import HealthLog, HealthLogSpan
+from app.services.check_history_service import CheckHistoryService
+
+
+def check(response_time=100.0, is_healthy=True, status_code=200, error_message=None, timings=None):
+    return {
+        'is_healthy': is_healthy,
+        'status_code': status_code,
+        'error_message': error_message,
+        'response_time': response_time,
+        'timings': timings
+    }
+
+
+@pytest.fixture
+def rle(monkeypatch):
+    monkeypatch.setattr(settings, "HEALTH_LOG_STORAGE_MODE", "rle")
+    monkeypatch.setattr(settings, "RLE_MAX_SPAN_CHECKS", 288)
+    monkeypatch.setattr(settings, "RLE_LATENCY_ANOMALY_FACTOR", 3.0)
+
+
+def test_repeated_checks_collapse_into_one_aggregate_span(db, make_job, rle):
+    job = make_job()
+    latencies = [100.0, 120.0, 80.0, 110.0]
+    for latency in latencies:
+        CheckHistoryService.record_check(db, job.id, check(latency, timings={'dns': 1.0, 'connect': 2.0}))
+    
+    assert db.query(HealthLog).count() == 1
+    span = db.query(HealthLogSpan).one()
+    assert span.check_count == 3
+    assert span.response_time_count == 3
+    assert span.response_time_sum == pytest.approx(310.0)
+    assert span.phase_timing_count == 3
+    assert span.phase_timing_sums[:2] == [3.0, 6.0]
+
+
+def test_spans_use_the_database_clock(db, make_job, rle):
+    job = make_job()
+    CheckHistoryService.record_check(db, job.id, check())
+    CheckHistoryService.record_check(db, job.id, check())
+    
+    row = db.query(HealthLog).one()
+    span = db.query(HealthLogSpan).one()
+    assert span.first_checked_at >= row.checked_at
+    assert span.first_checked_at == span.last_checked_at
+
+
+def test_status_change_and_anomaly_get_full_rows(db, make_job, rle):
+    job = make_job()
+    for result in (check(), check(), check(900.0), check(is_healthy=False, status_code=503, error_message="HTTP 503")):
+        CheckHistoryService.record_check(db, job.id, result)
+    
+    assert db.query(HealthLog).count() == 3
+    assert db.query(HealthLogSpan).count() == 1
+    assert CheckHistoryService.get_recent_outcomes(db, job.id, 10) == [False, True, True, True]
+
+
+def backdate_run(db, minutes):
+    """Move the stored row and span back so the next check comes ``minutes`` after the span's last check"""
+    then = datetime.now(timezone.utc) - timedelta(minutes=minutes)
+    db.execute(update(HealthLog).values(checked_at=then - timedelta(minutes=5)))
+    db.execute(update(HealthLogSpan).values(first_checked_at=then, last_checked_at=then))
+    db.commit()
+
+
+def span_counts(db):
+    spans = db.query(HealthLogSpan).order_by(HealthLogSpan.first_checked_at).all()
+    return [(span.check_count, span.is_open) for span in spans]
+
+
+def test_span_closes_at_the_utc_hour(db, make_job, rle):
+    job = make_job()
+    for _ in range(3):
+        CheckHistoryService.record_check(db, job.id, check())
+    backdate_run(db, 60)
+    
+    CheckHistoryService.record_check(db, job.id, check())
+    
+    assert span_counts(db) == [(2, False), (1, True)]
+
+
+def test_span_closes_after_a_missed_check(db, make_job, rle, monkeypatch):
+    monkeypatch.setattr(CheckHistoryService, "_utc_hour", staticmethod(lambda value: None))
+    job = make_job()
+    for _ in range(2):
+        CheckHistoryService.record_check(db, job.id, check(), interval_minutes=5)
+    backdate_run(db, 7)
+    
+    # Within 1.5 intervals the run continues, after that a new span starts
+    CheckHistoryService.record_check(db, job.id, check(), interval_minutes=5)
+    assert span_counts(db) == [(2, True)]
+    backdate_run(db, 8)
+    CheckHistoryService.record_check(db, job.id, check(), interval_minutes=5)
+    assert span_counts(db) == [(2, False), (1, True)]
+
+
+def test_span_closes_when_the_interval_changes(db, make_job, rle):
+    job = make_job()
+    for interval in (5, 5, 1, 1):
+        CheckHistoryService.record_check(db, job.id, check(), interval_minutes=interval)
+    
+    spans = db.query(HealthLogSpan).order_by(HealthLogSpan.first_checked_at).all()
+    assert [(span.check_count, span.interval_minutes) for span in spans] == [(1, 5), (2, 1)]
+
+
+def test_span_stats_count_spans_by_their_first_check(db, make_job, run_async):
+    job = make_job()
+    hour = datetime(2024, 3, 1, 10, 0, tzinfo=timezone.utc)
+    for offset, count in ((0, 11), (60, 12)):
+        first = hour + timedelta(minutes=offset)
+        db.add(HealthLogSpan(
+            job_id=job.id, is_healthy=True, status_code=200, check_count=count,
+            first_checked_at=first, last_checked_at=first + timedelta(minutes=55),
+            response_time_count=count, response_time_sum=100.0 * count, is_open=False
+        ))
+    db.commit()
+    
+    first_hour = run_async(CheckHistoryService.get_span_stats, [job.id], hour, hour + timedelta(hours=1))
+    both = run_async(CheckHistoryService.get_span_stats, [job.id], hour)
+    
+    assert (first_hour['total'], first_hour['response_time_sum']) == (11, 1100.0)
+    assert (both['total'], both['healthy'], both['response_time_count']) == (23, 23, 23)
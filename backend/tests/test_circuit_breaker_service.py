@@ -0,0 +1,157 @@
+import socket
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.config import settings
+from app.models import ProbeCircuit, Job
+from app.probes import tcp
+from app.probes.tcp import tcp_connect
+from app.services.circuit_breaker_service import CircuitBreakerService, PROBE, TCP_PROBE, SKIP
+from app.services.health_service import HealthService
+
+NOW = datetime(2024, 3, 1, 12, 0, tzinfo=timezone.utc)
+UNREACHABLE = {'is_healthy': False, 'status_code': None, 'error_message': 'Connection refused'}
+HTTP_ERROR = {'is_healthy': False, 'status_code': 503, 'error_message': 'HTTP 503'}
+
+
+@pytest.fixture(autouse=True)
+def circuit_settings(monkeypatch):
+    monkeypatch.setattr(settings, "CIRCUIT_FAILURE_THRESHOLD", 3)
+    monkeypatch.setattr(settings, "CIRCUIT_MIN_FAILING_SECONDS", 600)
+    monkeypatch.setattr(settings, "CIRCUIT_BASE_BACKOFF_SECONDS", 300)
+    monkeypatch.setattr(settings, "CIRCUIT_MAX_BACKOFF_SECONDS", 1000)
+    monkeypatch.setattr(settings, "CIRCUIT_MAX_RECOVERY_DELAY_SECONDS", 1800)
+
+
+def open_circuit(next_probe_in, last_probed_ago=0):
+    return ProbeCircuit(
+        target="https://down.example/", state="open", consecutive_failures=5,
+        first_failure_at=NOW - timedelta(hours=2), last_probed_at=NOW - timedelta(seconds=last_probed_ago),
+        next_probe_at=NOW + timedelta(seconds=next_probe_in), backoff_seconds=600
+    )
+
+
+def record_failures(count, start=NOW, step=timedelta(minutes=5)):
+    db = MagicMock()
+    circuit = None
+    for i in range(count):
+        circuit = CircuitBreakerService.record(db, "https://down.example/", circuit, UNREACHABLE, start + i * step)
+    return circuit
+
+
+def test_plan_probes_targets_without_an_open_circuit():
+    assert CircuitBreakerService.plan(None, 5, NOW) == PROBE
+    closed = ProbeCircuit(state="closed", consecutive_failures=2)
+    assert CircuitBreakerService.plan(closed, 5, NOW) == PROBE
+
+
+def test_plan_skips_while_backing_off():
+    assert CircuitBreakerService.plan(open_circuit(next_probe_in=400), 5, NOW) == SKIP
+
+
+def test_plan_probes_over_tcp_once_backoff_elapsed():
+    assert CircuitBreakerService.plan(open_circuit(next_probe_in=-1), 5, NOW) == TCP_PROBE
+
+
+def test_plan_never_skips_past_the_recovery_bound():
+    # Still backing off, but skipping would leave the target unprobed for 25 + 10 minutes
+    circuit = open_circuit(next_probe_in=400, last_probed_ago=25 * 60)
+    assert CircuitBreakerService.plan(circuit, 10, NOW) == TCP_PROBE
+
+
+def test_circuit_opens_after_threshold_and_min_failing_time():
+    # Three failures over ten minutes meet both conditions at the third
+    assert record_failures(2).state == "closed"
+    circuit = record_failures(3)
+    assert circuit.state == "open"
+    assert circuit.opened_at == NOW + timedelta(minutes=10)
+    assert circuit.next_probe_at == circuit.opened_at + timedelta(seconds=300)
+
+
+def test_circuit_stays_closed_until_failing_long_enough():
+    circuit = record_failures(6, step=timedelta(minutes=1))
+    assert circuit.state == "closed" and circuit.consecutive_failures == 6
+    circuit = record_failures(11, step=timedelta(minutes=1))
+    assert circuit.state == "open"
+
+
+def test_backoff_doubles_up_to_the_cap():
+    db = MagicMock()
+    circuit = record_failures(3)
+    backoffs = []
+    now = circuit.opened_at
+    for _ in range(4):
+        now = circuit.next_probe_at
+        circuit = CircuitBreakerService.record(db, circuit.target, circuit, UNREACHABLE, now)
+        backoffs.append(circuit.backoff_seconds)
+    assert backoffs == [600, 1000, 1000, 1000]
+    assert circuit.next_probe_at == now + timedelta(seconds=1000)
+
+
+def test_any_response_closes_the_circuit():
+    db = MagicMock()
+    circuit = record_failures(3)
+    assert CircuitBreakerService.record(db, circuit.target, circuit, HTTP_ERROR, NOW) is None
+    db.delete.assert_called_once_with(circuit)
+
+
+def test_tcp_probe_needs_an_accepted_connection(monkeypatch):
+    listener = socket.create_server(("127.0.0.1", 0))
+    port = listener.getsockname()[1]
+    
+    assert tcp_connect(f"http://127.0.0.1:{port}/", timeout=1)['is_healthy']
+    
+    # A name without addresses must not close the circuit
+    monkeypatch.setattr(tcp.dns_cache, "resolve", lambda host: ([], 0.0))
+    unresolved = tcp_connect("http://down.example/", timeout=1)
+    assert not unresolved['is_healthy']
+    assert unresolved['error_message'] == "TCP connect failed: No addresses resolved"
+    listener.close()
+
+
+def test_concurrent_first_failure_keeps_the_other_sweeps_row(session_factory):
+    ours, theirs = session_factory(), session_factory()
+    target = "https://down.example/"
+    assert CircuitBreakerService.load(ours, [target]) == {}
+    
+    CircuitBreakerService.record(theirs, target, None, UNREACHABLE, NOW)
+    theirs.commit()
+    
+    assert CircuitBreakerService.record(ours, target, None, UNREACHABLE, NOW) is None
+    ours.commit()
+    assert ours.get(ProbeCircuit, target).consecutive_failures == 1
+
+
+def test_update_of_a_circuit_closed_concurrently_is_dropped(session_factory):
+    ours, theirs = session_factory(), session_factory()
+    target = "https://down.example/"
+    CircuitBreakerService.record(theirs, target, None, UNREACHABLE, NOW)
+    theirs.commit()
+    circuit = CircuitBreakerService.load(ours, [target])[target]
+    
+    CircuitBreakerService.record(theirs, target, theirs.get(ProbeCircuit, target), HTTP_ERROR, NOW)
+    theirs.commit()
+    
+    assert CircuitBreakerService.record(ours, target, circuit, UNREACHABLE, NOW) is None
+    ours.commit()
+    assert ours.get(ProbeCircuit, target) is None
+
+
+def test_skipped_jobs_are_stamped_as_checked(db, make_job):
+    job = make_job(url="https://down.example/", current_status="unhealthy")
+    db.add(ProbeCircuit(
+        target="https://down.example/", state="open", consecutive_failures=5,
+        first_failure_at=datetime.now(timezone.utc) - timedelta(hours=2),
+        last_probed_at=datetime.now(timezone.utc),
+        next_probe_at=datetime.now(timezone.utc) + timedelta(seconds=600), backoff_seconds=600
+    ))
+    db.commit()
+    
+    results, probes_sent = HealthService.check_jobs(db, [job])
+    
+    assert probes_sent == 0
+    assert results[0]['skipped'] and results[0]['current_status'] == "unhealthy"
+    db.expire_all()
+    assert db.get(Job, job.id).last_checked_at is not None
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.config import settings
+from app.models import Job, HealthLog
+from app.services.health_service import HealthService
+from app.services.scheduler_service import SchedulerService
+from app.workers import checker
+
+
+@pytest.fixture
+def scheduled(monkeypatch):
+    """Confirmation runs requested from the scheduler, as (delay, due_at)"""
+    calls = []
+    monkeypatch.setattr(settings, "CONFIRMATION_BACKOFF_SECONDS", [20, 40])
+    monkeypatch.setattr(
+        SchedulerService, "schedule_confirmation_check",
+        staticmethod(lambda delay, due_at: calls.append((delay, due_at)) or {'success': True})
+    )
+    return calls
+
+
+def due(seconds_from_now):
+    return datetime.now(timezone.utc) + timedelta(seconds=seconds_from_now)
+
+
+def test_due_confirmations_are_claimed_once(db, make_job):
+    due_job = make_job(confirmation_due_at=due(-5))
+    make_job(confirmation_due_at=due(60))
+    make_job(confirmation_due_at=due(-5), is_enabled=False)
+    make_job()
+    
+    assert [job.id for job in HealthService.claim_due_confirmations(db)] == [due_job.id]
+    assert HealthService.claim_due_confirmations(db) == []
+    db.refresh(due_job)
+    assert due_job.confirmation_due_at is None
+
+
+def test_confirmations_share_one_probe_per_target(db, session_factory, make_job, http_server, scheduled, monkeypatch):
+    base = http_server({"/": (500, {}, b"down")})
+    jobs = [
+        make_job(url=url, current_status="healthy", failure_threshold=3, confirmation_due_at=due(-1))
+        for url in (f"{base}/", f"{base}", f"{base}/#status")
+    ]
+    monkeypatch.setattr(checker, "SessionLocal", session_factory)
+    
+    result = checker.check_due_confirmations()
+    
+    assert result['success'] and result['total_jobs'] == 3
+    assert result['probes_sent'] == 1
+    assert http_server.requests == ["/"]
+    assert db.query(HealthLog).count() == 3
+    # Still below the threshold: each job asks for its next confirmation
+    assert [delay for delay, _ in scheduled] == [20, 20, 20]
+    db.expire_all()
+    assert all(db.get(Job, job.id).current_status == "healthy" for job in jobs)
+    assert all(db.get(Job, job.id).confirmation_due_at is not None for job in jobs)
+
+
+def test_confirmations_stop_at_the_threshold(db, make_job, http_server, scheduled):
+    base = http_server({"/": (500, {}, b"down")})
+    job = make_job(url=f"{base}/", current_status="healthy", failure_threshold=3)
+    
+    for _ in range(3):
+        HealthService.check_jobs(db, [job])
+    
+    assert [delay for delay, _ in scheduled] == [20, 40]
+    assert job.current_status == "unhealthy"
+    assert job.confirmation_due_at is None
+
+
+def test_no_confirmations_when_not_configured(db, make_job, http_server, scheduled, monkeypatch):
+    monkeypatch.setattr(settings, "CONFIRMATION_BACKOFF_SECONDS", [])
+    base = http_server({"/": (500, {}, b"down")})
+    job = make_job(url=f"{base}/", current_status="healthy", failure_threshold=3)
+    
+    HealthService.check_jobs(db, [job])
+    
+    assert scheduled == []
+    assert job.confirmation_due_at is None
@@ -0,0 +1,145 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from app.config import settings
+from app.probes import dns_cache as dns_cache_module
+from app.probes.dns_cache import DnsCache
+
+
+class FakeResolver:
+    """Stands in for DnsCache._lookup: answers[host] is (addresses, ttl) or an exception"""
+    
+    def __init__(self, answers, delay=0.0):
+        self.answers = answers
+        self.delay = delay
+        self.lookups = []
+        self._lock = threading.Lock()
+    
+    def __call__(self, host):
+        with self._lock:
+            self.lookups.append(host)
+        time.sleep(self.delay)
+        answer = self.answers[host]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(dns_cache_module.time, "monotonic", clock)
+    return clock
+
+
+def make_cache(answers, delay=0.0):
+    cache = DnsCache()
+    cache._lookup = FakeResolver(answers, delay)
+    return cache
+
+
+def test_answers_are_cached_for_their_clamped_ttl(clock, monkeypatch):
+    monkeypatch.setattr(settings, "DNS_CACHE_MAX_TTL_SECONDS", 300)
+    cache = make_cache({"example.com": (["93.184.216.34"], 86400)})
+    
+    assert cache.resolve("example.com")[0] == ["93.184.216.34"]
+    clock.now += 299
+    assert cache.resolve("example.com") == (["93.184.216.34"], 0.0)
+    clock.now += 2
+    cache.resolve("example.com")
+    
+    assert cache._lookup.lookups == ["example.com", "example.com"]
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 2
+
+
+def test_short_ttl_is_raised_to_the_minimum(clock, monkeypatch):
+    monkeypatch.setattr(settings, "DNS_CACHE_MIN_TTL_SECONDS", 5)
+    cache = make_cache({"example.com": (["10.0.0.1"], 0)})
+    
+    cache.resolve("example.com")
+    clock.now += 4
+    cache.resolve("example.com")
+    
+    assert len(cache._lookup.lookups) == 1
+
+
+def test_nonexistent_name_is_cached_as_a_failure(clock, monkeypatch):
+    monkeypatch.setattr(settings, "DNS_NEGATIVE_TTL_SECONDS", 30)
+    cache = make_cache({"typo.example": socket.gaierror(socket.EAI_NONAME, "Name or service not known")})
+    
+    for _ in range(3):
+        with pytest.raises(socket.gaierror):
+            cache.resolve("typo.example")
+    clock.now += 31
+    with pytest.raises(socket.gaierror):
+        cache.resolve("typo.example")
+    
+    assert len(cache._lookup.lookups) == 2
+    assert cache.stats()['negative_hits'] == 2
+
+
+def test_transient_failure_is_not_cached(clock):
+    cache = make_cache({"flaky.example": socket.gaierror(socket.EAI_AGAIN, "Temporary failure")})
+    
+    for _ in range(2):
+        with pytest.raises(socket.gaierror):
+            cache.resolve("flaky.example")
+    
+    assert len(cache._lookup.lookups) == 2
+    assert cache.stats()['entries'] == 0
+
+
+def test_ip_addresses_skip_the_cache():
+    cache = make_cache({})
+    
+    assert cache.resolve("127.0.0.1") == (["127.0.0.1"], 0.0)
+    assert cache.resolve("::1") == (["::1"], 0.0)
+    assert cache.prefetch(["10.1.2.3"]) == 0
+    assert cache._lookup.lookups == []
+
+
+def test_concurrent_lookups_of_a_host_share_one_query():
+    cache = make_cache({"example.com": (["10.0.0.1"], 60)}, delay=0.05)
+    
+    threads = [threading.Thread(target=cache.resolve, args=("example.com",)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert cache._lookup.lookups == ["example.com"]
+
+
+def test_prefetch_with_timeout_leaves_the_cache_warm():
+    cache = make_cache({host: (["10.0.0.1"], 60) for host in ("a.example", "b.example")}, delay=0.05)
+    
+    started = cache.prefetch(["a.example", "b.example", "a.example"], timeout=5)
+    
+    assert started == 2
+    assert cache.resolve("a.example")[1] == 0.0 and cache.resolve("b.example")[1] == 0.0
+    assert sorted(cache._lookup.lookups) == ["a.example", "b.example"]
+
+
+def test_prefetch_refreshes_only_missing_or_expiring_hosts(clock, monkeypatch):
+    monkeypatch.setattr(settings, "DNS_PREFETCH_WINDOW_SECONDS", 60)
+    cache = make_cache({
+        "fresh.example": (["10.0.0.1"], 300),
+        "expiring.example": (["10.0.0.2"], 30),
+        "new.example": (["10.0.0.3"], 300),
+    })
+    cache.resolve("fresh.example")
+    cache.resolve("expiring.example")
+    
+    assert cache.prefetch(["fresh.example", "expiring.example", "new.example"], timeout=5) == 2
+    assert sorted(cache._lookup.lookups[2:]) == ["expiring.example", "new.example"]
@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select, update
+
+from app.config import settings
+from app.models import EmailQueue
+from app.services.email_queue_service import EmailQueueService
+from app.workers import email_batch
+from app.workers.email_batch import process_email_batch
+
+
+@pytest.fixture
+def outbox(session_factory, monkeypatch):
+    """Run process_email_batch on the test database; sent messages are collected here"""
+    sent = []
+    
+    def send_messages(messages):
+        sent.extend(messages)
+        return [{'success': True, 'message_id': f"msg-{len(sent)}-{i}"} for i in range(len(messages))]
+    
+    monkeypatch.setattr(email_batch, "get_db", lambda: iter([session_factory()]))
+    monkeypatch.setattr(email_batch, "send_messages", send_messages)
+    monkeypatch.setattr(EmailQueueService, "wake_dispatcher", staticmethod(lambda countdown=0: None))
+    return sent
+
+
+@pytest.fixture
+def queue_alerts(db, make_job):
+    def queue(user, count, transition=("healthy", "unhealthy")):
+        ids = [
+            EmailQueueService.queue_status_change_alert(
+                db, make_job(owner=user, url=f"https://example.com/{i}"), user, *transition
+            )
+            for i in range(count)
+        ]
+        # Release the held ones as if the digest window had ended
+        db.execute(update(EmailQueue).values(scheduled_at=datetime.now(timezone.utc) - timedelta(seconds=1)))
+        db.commit()
+        return ids
+    return queue
+
+
+def statuses(db):
+    db.expire_all()
+    return {email.id: email for email in db.scalars(select(EmailQueue))}
+
+
+def test_follow_up_alerts_are_held_for_the_window(db, make_user, make_job, monkeypatch):
+    monkeypatch.setattr(EmailQueueService, "wake_dispatcher", staticmethod(lambda countdown=0: None))
+    user = make_user()
+    
+    first, second, third = (
+        EmailQueueService.queue_status_change_alert(db, make_job(owner=user), user, "healthy", "unhealthy")
+        for _ in range(3)
+    )
+    
+    emails = statuses(db)
+    now = datetime.now(timezone.utc)
+    assert emails[first].scheduled_at <= now
+    assert emails[second].scheduled_at > now + timedelta(seconds=settings.ALERT_DIGEST_WINDOW_SECONDS - 5)
+    assert emails[third].scheduled_at == emails[second].scheduled_at
+
+
+def test_a_users_burst_goes_out_as_one_digest(db, make_user, queue_alerts, outbox):
+    user = make_user()
+    other = make_user()
+    burst = queue_alerts(user, 3)
+    single = queue_alerts(other, 1)
+    
+    result = process_email_batch.run(10)
+    
+    assert result['successful'] == 4 and result['digests'] == 1
+    assert len(outbox) == 2
+    digest = next(message for message in outbox if message['to'] == [user.email])
+    assert digest['subject'] == "Monitor Summary: 3 down, 0 online"
+    assert all(f"https://example.com/{i}" in digest['text'] for i in range(3))
+    
+    emails = statuses(db)
+    digest_ids = {emails[email_id].digest_id for email_id in burst}
+    assert len(digest_ids) == 1 and digest_ids <= set(burst)
+    assert all(emails[email_id].status == "sent" for email_id in burst + single)
+    assert emails[single[0]].digest_id is None
+
+
+def test_users_at_their_cap_are_deferred_without_spending_an_attempt(db, make_user, queue_alerts, outbox, monkeypatch):
+    monkeypatch.setattr(settings, "ALERT_DIGEST_MAX_PER_WINDOW", 1)
+    user = make_user()
+    queue_alerts(user, 1)
+    process_email_batch.run(10)
+    
+    later = queue_alerts(user, 1, transition=("unhealthy", "healthy"))
+    result = process_email_batch.run(10)
+    
+    assert result['deferred'] == 1 and result['successful'] == 0
+    assert len(outbox) == 1
+    deferred = statuses(db)[later[0]]
+    assert deferred.status == "pending" and deferred.attempts == 0
+    assert deferred.scheduled_at > datetime.now(timezone.utc)
+
+
+def test_digests_disabled_sends_every_alert(db, make_user, queue_alerts, outbox, monkeypatch):
+    monkeypatch.setattr(settings, "ALERT_DIGEST_WINDOW_SECONDS", 0)
+    user = make_user()
+    queue_alerts(user, 3)
+    
+    result = process_email_batch.run(10)
+    
+    assert result['successful'] == 3 and result['digests'] == 0
+    assert len(outbox) == 3
@@ -0,0 +1,103 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select, update
+
+from app.models import EmailQueue
+from app.services.email_queue_service import EmailQueueService
+
+
+@pytest.fixture
+def queue_emails(db, make_user):
+    def queue(count, **fields):
+        user = make_user()
+        emails = [
+            EmailQueue(
+                recipient_email=user.email,
+                recipient_name=user.email,
+                subject=f"alert {i}",
+                text_content="body",
+                user_id=user.id,
+                status="pending",
+                scheduled_at=datetime.now(timezone.utc) - timedelta(seconds=count - i),
+                **fields
+            )
+            for i in range(count)
+        ]
+        db.add_all(emails)
+        db.commit()
+        return [email.id for email in emails]
+    return queue
+
+
+def test_claim_skips_rows_locked_by_another_dispatcher(session_factory, queue_emails):
+    ids = queue_emails(3)
+    
+    other = session_factory()
+    other.execute(select(EmailQueue).where(EmailQueue.id == ids[0]).with_for_update()).all()
+    try:
+        claimer = session_factory()
+        claimed = EmailQueueService.claim_pending_emails(claimer, limit=3)
+        claimer.close()
+    finally:
+        other.rollback()
+        other.close()
+    
+    assert [email.id for email in claimed] == ids[1:]
+    assert all(email.status == "processing" and email.attempts == 1 for email in claimed)
+    assert all(email.claimed_at is not None and email.first_claimed_at == email.claimed_at for email in claimed)
+
+
+def test_concurrent_claims_never_share_a_row(session_factory, queue_emails):
+    ids = queue_emails(40)
+    results = []
+    start = threading.Barrier(4)
+    
+    def claim():
+        session = session_factory()
+        start.wait()
+        try:
+            results.append([email.id for email in EmailQueueService.claim_pending_emails(session, limit=10)])
+        finally:
+            session.close()
+    
+    threads = [threading.Thread(target=claim) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    claimed = [email_id for batch in results for email_id in batch]
+    assert len(claimed) == len(set(claimed))
+    assert set(claimed) <= set(ids)
+
+
+def test_claim_leaves_future_and_exhausted_rows(db, queue_emails):
+    due = queue_emails(1)
+    later = queue_emails(1)
+    exhausted = queue_emails(1, attempts=3, max_attempts=3)
+    db.execute(
+        update(EmailQueue).where(EmailQueue.id.in_(later)).values(scheduled_at=datetime.now(timezone.utc) + timedelta(hours=1))
+    )
+    db.commit()
+    
+    claimed = EmailQueueService.claim_pending_emails(db, limit=10)
+    
+    assert [email.id for email in claimed] == due
+    assert not set(later + exhausted) & {email.id for email in claimed}
+
+
+def test_expired_leases_return_to_queue_or_fail(db, queue_emails):
+    retry, = queue_emails(1)
+    exhausted, = queue_emails(1, max_attempts=1)
+    EmailQueueService.claim_pending_emails(db, limit=10)
+    db.execute(
+        update(EmailQueue).values(claimed_at=datetime.now(timezone.utc) - timedelta(hours=1))
+    )
+    db.commit()
+    
+    assert EmailQueueService.release_expired_claims(db, lease_seconds=60) == 2
+    
+    statuses = dict(db.execute(select(EmailQueue.id, EmailQueue.status)).all())
+    assert statuses == {retry: "pending", exhausted: "failed"}
@@ -0,0 +1,251 @@
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import update
+
+from app.config import settings
+from app.models import EmailQueue
+from app.services import email_queue_service
+from app.services.email_queue_service import EmailQueueService
+from app.workers.email_batch import dispatch_email_batches
+
+
+@pytest.fixture
+def job():
+    return SimpleNamespace(id=uuid4())
+
+
+@pytest.fixture
+def local_tz():
+    """Switch the process time zone, restoring it afterwards"""
+    original = os.environ.get("TZ")
+    
+    def switch(name):
+        os.environ["TZ"] = name
+        time.tzset()
+    
+    yield switch
+    if original is None:
+        os.environ.pop("TZ", None)
+    else:
+        os.environ["TZ"] = original
+    time.tzset()
+
+
+def test_dedup_key_is_independent_of_process_timezone(job, local_tz):
+    keys = set()
+    for name in ("UTC", "America/New_York", "Asia/Kolkata"):
+        local_tz(name)
+        now = datetime(2024, 3, 1, 12, 7, tzinfo=timezone.utc)
+        keys.add(EmailQueueService.get_dedup_key(job, "healthy", "unhealthy", now))
+    assert len(keys) == 1
+
+
+def test_dedup_key_treats_naive_now_as_utc(job, local_tz):
+    local_tz("America/New_York")
+    aware = datetime(2024, 3, 1, 12, 7, tzinfo=timezone.utc)
+    assert (
+        EmailQueueService.get_dedup_key(job, "healthy", "unhealthy", aware.replace(tzinfo=None))
+        == EmailQueueService.get_dedup_key(job, "healthy", "unhealthy", aware)
+    )
+
+
+def test_dedup_key_changes_per_window(job):
+    window = timedelta(minutes=settings.EMAIL_DEDUP_WINDOW_MINUTES)
+    start = datetime(2024, 3, 1, tzinfo=timezone.utc)
+    first = EmailQueueService.get_dedup_key(job, "healthy", "unhealthy", start)
+    assert EmailQueueService.get_dedup_key(job, "healthy", "unhealthy", start + window - timedelta(seconds=1)) == first
+    assert EmailQueueService.get_dedup_key(job, "healthy", "unhealthy", start + window) != first
+    assert EmailQueueService.get_dedup_key(job, "unhealthy", "healthy", start) != first
+
+
+def test_first_status_uses_one_activation_key(job):
+    assert EmailQueueService.get_dedup_key(job, "unknown", "healthy") == f"{job.id}:activation"
+
+
+@pytest.fixture
+def no_wake(monkeypatch):
+    monkeypatch.setattr(EmailQueueService, "wake_dispatcher", staticmethod(lambda countdown=0: None))
+
+
+def test_duplicate_alert_is_dropped_on_conflict(db, make_user, make_job, no_wake):
+    user = make_user()
+    job = make_job(owner=user)
+    
+    first = EmailQueueService.queue_status_change_alert(db, job, user, "healthy", "unhealthy")
+    second = EmailQueueService.queue_status_change_alert(db, job, user, "healthy", "unhealthy")
+    
+    assert first is not None
+    assert second is None
+    assert db.query(EmailQueue).count() == 1
+
+
+def test_failed_alert_does_not_block_a_retry(db, make_user, make_job, no_wake):
+    user = make_user()
+    job = make_job(owner=user)
+    first = EmailQueueService.queue_status_change_alert(db, job, user, "healthy", "unhealthy")
+    db.execute(update(EmailQueue).where(EmailQueue.id == first).values(status="failed"))
+    db.commit()
+    
+    retry = EmailQueueService.queue_status_change_alert(db, job, user, "healthy", "unhealthy")
+    
+    assert retry not in (None, first)
+    assert db.query(EmailQueue).filter(EmailQueue.status == "pending").count() == 1
+
+
+def test_other_transitions_are_queued(db, make_user, make_job, no_wake):
+    user = make_user()
+    job = make_job(owner=user)
+    
+    down = EmailQueueService.queue_status_change_alert(db, job, user, "healthy", "unhealthy")
+    up = EmailQueueService.queue_status_change_alert(db, job, user, "unhealthy", "healthy")
+    
+    assert None not in (down, up) and down != up
+
+
+def alert_latency(stage, sample="count"):
+    return REGISTRY.get_sample_value(f"pingdaemon_alert_latency_seconds_{sample}", {'stage': stage}) or 0.0
+
+
+def test_sending_observes_each_stage_latency(db, make_user, make_job, no_wake):
+    user = make_user()
+    job = make_job(owner=user)
+    now = datetime.now(timezone.utc)
+    EmailQueueService.queue_status_change_alert(
+        db, job, user, "healthy", "unhealthy",
+        probe_completed_at=now - timedelta(seconds=3), status_committed_at=now - timedelta(seconds=2)
+    )
+    stages = ['probe_to_commit', 'commit_to_enqueue', 'enqueue_to_claim', 'claim_to_accept', 'total']
+    before = {stage: alert_latency(stage) for stage in stages}
+    total_before = alert_latency('total', 'sum')
+    
+    claimed = EmailQueueService.claim_pending_emails(db, limit=10)
+    latencies = EmailQueueService.mark_emails_sent(db, [email.id for email in claimed])
+    
+    assert len(latencies) == 1
+    assert {stage: alert_latency(stage) - before[stage] for stage in stages} == dict.fromkeys(stages, 1.0)
+    assert 3.0 <= alert_latency('total', 'sum') - total_before < 30
+
+
+def test_alerts_without_probe_timestamps_skip_those_stages(db, make_user, make_job, no_wake):
+    user = make_user()
+    job = make_job(owner=user)
+    EmailQueueService.queue_status_change_alert(db, job, user, "healthy", "unhealthy")
+    before = {stage: alert_latency(stage) for stage in ('probe_to_commit', 'total', 'enqueue_to_claim')}
+    
+    claimed = EmailQueueService.claim_pending_emails(db, limit=10)
+    EmailQueueService.mark_emails_sent(db, [email.id for email in claimed])
+    
+    assert alert_latency('probe_to_commit') == before['probe_to_commit']
+    assert alert_latency('total') == before['total']
+    assert alert_latency('enqueue_to_claim') == before['enqueue_to_claim'] + 1
+
+
+@pytest.fixture
+def wake_ups(monkeypatch):
+    """Countdowns of the dispatch tasks started by wake_dispatcher"""
+    started = []
+    monkeypatch.setattr(email_queue_service, "_pending_wakes", [])
+    monkeypatch.setattr(
+        dispatch_email_batches, "apply_async", lambda args, countdown: started.append(countdown)
+    )
+    return started
+
+
+def test_queued_alert_wakes_the_dispatcher(db, make_user, make_job, wake_ups):
+    user = make_user()
+    
+    EmailQueueService.queue_status_change_alert(db, make_job(owner=user), user, "healthy", "unhealthy")
+    
+    assert wake_ups == [settings.EMAIL_WAKE_DELAY_SECONDS]
+
+
+def test_alert_storm_wakes_the_dispatcher_once_per_window(db, make_user, make_job, wake_ups, monkeypatch):
+    monkeypatch.setattr(settings, "ALERT_DIGEST_WINDOW_SECONDS", 0)
+    user = make_user()
+    jobs = [make_job(owner=user, url=f"https://example.com/{i}") for i in range(20)]
+    
+    for job in jobs:
+        EmailQueueService.queue_status_change_alert(db, job, user, "healthy", "unhealthy")
+    assert len(wake_ups) == 1
+    
+    # The next window gets its own wake-up
+    monkeypatch.setattr(email_queue_service, "_pending_wakes", [])
+    EmailQueueService.queue_status_change_alert(db, jobs[0], user, "unhealthy", "healthy")
+    assert len(wake_ups) == 2
+
+
+def test_held_digest_wakes_the_dispatcher_when_its_window_ends(db, make_user, make_job, wake_ups):
+    user = make_user()
+    
+    for i in range(5):
+        EmailQueueService.queue_status_change_alert(db, make_job(owner=user), user, "healthy", "unhealthy")
+    
+    # One wake-up for the first alert, one for the digest holding the other four
+    assert len(wake_ups) == 2
+    window = settings.ALERT_DIGEST_WINDOW_SECONDS + settings.EMAIL_WAKE_DELAY_SECONDS
+    assert window - 5 < wake_ups[1] <= window
+
+
+def test_deferred_emails_wake_the_dispatcher_when_due(db, make_user, make_job, wake_ups, monkeypatch):
+    monkeypatch.setattr(settings, "ALERT_DIGEST_WINDOW_SECONDS", 0)
+    user = make_user()
+    email_id = EmailQueueService.queue_status_change_alert(db, make_job(owner=user), user, "healthy", "unhealthy")
+    
+    assert EmailQueueService.defer_emails(db, [email_id], 60) == 1
+    assert EmailQueueService.defer_emails(db, [], 60) == 0
+    
+    assert wake_ups == [settings.EMAIL_WAKE_DELAY_SECONDS, 60 + settings.EMAIL_WAKE_DELAY_SECONDS]
+
+
+def test_duplicate_alert_does_not_wake_the_dispatcher(db, make_user, make_job, wake_ups, monkeypatch):
+    user = make_user()
+    job = make_job(owner=user)
+    EmailQueueService.queue_status_change_alert(db, job, user, "healthy", "unhealthy")
+    monkeypatch.setattr(email_queue_service, "_pending_wakes", [])
+    
+    EmailQueueService.queue_status_change_alert(db, job, user, "healthy", "unhealthy")
+    
+    assert len(wake_ups) == 1
+
+
+def test_broker_failure_leaves_the_alert_for_the_poll(db, make_user, make_job, monkeypatch):
+    def broker_down(args, countdown):
+        raise ConnectionError("broker unreachable")
+    
+    monkeypatch.setattr(email_queue_service, "_pending_wakes", [])
+    monkeypatch.setattr(dispatch_email_batches, "apply_async", broker_down)
+    user = make_user()
+    
+    queued = EmailQueueService.queue_status_change_alert(db, make_job(owner=user), user, "healthy", "unhealthy")
+    
+    assert queued is not None
+    assert db.query(EmailQueue).filter(EmailQueue.status == "pending").count() == 1
+
+
+def test_failed_sends_wake_the_dispatcher_for_the_earliest_retry(db, make_user, make_job, wake_ups, monkeypatch):
+    monkeypatch.setattr(settings, "ALERT_DIGEST_WINDOW_SECONDS", 0)
+    user = make_user()
+    retrying, out_of_attempts = (
+        EmailQueueService.queue_status_change_alert(db, make_job(owner=user), user, "healthy", "unhealthy")
+        for _ in range(2)
+    )
+    db.execute(update(EmailQueue).where(EmailQueue.id == retrying).values(attempts=1))
+    db.execute(update(EmailQueue).where(EmailQueue.id == out_of_attempts).values(attempts=3, max_attempts=3))
+    db.commit()
+    wake_ups.clear()
+    
+    assert EmailQueueService.mark_emails_failed(db, {retrying: "timeout", out_of_attempts: "rejected"}) == 2
+    
+    # Backoff after the first attempt is 120s; the exhausted row needs no wake-up
+    assert len(wake_ups) == 1
+    assert 120 - 5 < wake_ups[0] - settings.EMAIL_WAKE_DELAY_SECONDS <= 120
+    
+    wake_ups.clear()
+    assert EmailQueueService.mark_emails_failed(db, {out_of_attempts: "rejected"}) == 1
+    assert wake_ups == []
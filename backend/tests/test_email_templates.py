@@ -0,0 +1,114 @@
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from app.email import templates
+from app.email.templates import STATUS_CHANGE_TEMPLATE, render_email
+from app.models import EmailQueue
+from app.services.email_queue_service import EmailQueueService
+from app.workers import email_batch
+from app.workers.email_batch import _build_messages
+
+
+def alert_params(**overrides):
+    params = {
+        'job_url': "https://example.com/health",
+        'job_interval': 5,
+        'failure_threshold': 3,
+        'previous_status': "healthy",
+        'current_status': "unhealthy",
+        'error_message': None,
+        'detected_at': "2026-10-19 12:00:00 UTC",
+    }
+    params.update(overrides)
+    return params
+
+
+def queued(template_id=STATUS_CHANGE_TEMPLATE, params=None, **fields):
+    return SimpleNamespace(
+        id=uuid4(), dedup_key=None, recipient_email="owner@example.com",
+        template_id=template_id, template_params=params, **fields
+    )
+
+
+@pytest.mark.parametrize("previous, current, subject, marker", [
+    ("healthy", "unhealthy", "Service Down: https://example.com/health", "SERVICE DOWN"),
+    ("unhealthy", "healthy", "Service Restored: https://example.com/health", "SERVICE RESTORED"),
+    ("unknown", "healthy", "Monitor Online: https://example.com/health", "Monitoring Started!"),
+    ("unknown", "unhealthy", "Monitor Issue: https://example.com/health", "Monitor Setup Complete"),
+])
+def test_status_change_renders_each_transition(previous, current, subject, marker):
+    rendered_subject, html_content, text_content = render_email(
+        STATUS_CHANGE_TEMPLATE, alert_params(previous_status=previous, current_status=current)
+    )
+    
+    assert rendered_subject == subject
+    assert marker in html_content and marker in text_content
+
+
+def test_urls_and_errors_are_escaped_in_html_only():
+    params = alert_params(job_url="https://example.com/?a=<b>", error_message="<script>x</script>")
+    
+    _, html_content, text_content = render_email(STATUS_CHANGE_TEMPLATE, params)
+    
+    assert "<script>" not in html_content and "&lt;script&gt;" in html_content
+    assert "?a=&lt;b&gt;" in html_content
+    assert "Error Details: <script>x</script>" in text_content
+
+
+def test_unknown_template_is_rejected():
+    with pytest.raises(ValueError):
+        render_email("no_such_template", {})
+
+
+def test_queued_alert_stores_a_template_reference(db, make_user, make_job, monkeypatch):
+    monkeypatch.setattr(EmailQueueService, "wake_dispatcher", staticmethod(lambda countdown=0: None))
+    user = make_user()
+    job = make_job(owner=user, url="https://example.com/health")
+    
+    email_id = EmailQueueService.queue_status_change_alert(db, job, user, "healthy", "unhealthy", "timed out")
+    
+    email = db.get(EmailQueue, email_id)
+    assert email.template_id == STATUS_CHANGE_TEMPLATE
+    assert email.template_params['job_url'] == "https://example.com/health"
+    assert email.template_params['error_message'] == "timed out"
+    assert email.html_content is None and email.text_content is None
+    assert email.subject == "Service Down: https://example.com/health"
+
+
+def test_identical_params_are_rendered_once_per_batch(monkeypatch):
+    renders = []
+    
+    def counting_render(template_id, params):
+        renders.append(template_id)
+        return templates.render_email(template_id, params)
+    
+    monkeypatch.setattr(email_batch, "render_email", counting_render)
+    same = alert_params()
+    deliveries = [[queued(params=dict(same))], [queued(params=dict(same))], [queued(params=alert_params(job_interval=10))]]
+    
+    messages, failures = _build_messages(deliveries)
+    
+    assert len(messages) == 3 and failures == {}
+    assert len(renders) == 2
+    assert messages[0]['html'] == messages[1]['html']
+
+
+def test_legacy_rows_are_sent_with_their_stored_body():
+    legacy = queued(template_id=None, subject="Old alert", html_content="<p>old</p>", text_content="old")
+    
+    messages, _ = _build_messages([[legacy]])
+    
+    assert (messages[0]['subject'], messages[0]['html'], messages[0]['text']) == ("Old alert", "<p>old</p>", "old")
+
+
+def test_unrenderable_email_fails_alone():
+    broken = queued(params={'job_url': "https://example.com/"})  # missing the status fields
+    good = queued(params=alert_params())
+    
+    messages, failures = _build_messages([[broken], [good]])
+    
+    assert len(messages) == 1 and messages[0]['idempotency_key'] == str(good.id)
+    assert list(failures) == [broken.id]
+    assert failures[broken.id].startswith("Template render failed")
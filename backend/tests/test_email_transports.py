@@ -0,0 +1,177 @@
+import asyncio
+import random
+import time
+from types import SimpleNamespace
+from uuid import uuid4
+
+import httpx
+import pytest
+
+from app import database
+from app.email import fake_resend
+from app.email.transports import SharedTokenBucket, TokenBucket, ResendTransport, RetryPolicy
+from app.workers.email_batch import _idempotency_key
+
+
+@pytest.fixture
+def shared_db(pg_engine, session_factory, monkeypatch):
+    """Point SharedTokenBucket at the test database"""
+    monkeypatch.setattr(database, "engine", pg_engine)
+
+
+@pytest.fixture
+def fake_api():
+    def start(rate_limit=0.0, fail_rate=0.0, lost_rate=0.0):
+        server = fake_resend.serve(port=0, rate_limit=rate_limit, fail_rate=fail_rate, lost_rate=lost_rate, report=False)
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+    
+    servers = []
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def stats(url):
+    return httpx.get(f"{url}/stats").json()
+
+
+def messages(count, keyed=False):
+    return [
+        {
+            'from': 'alerts@example.com', 'to': [f"user{i}@example.com"], 'subject': 'Alert', 'text': 'down',
+            **({'idempotency_key': f"job-{i}:up>down:1"} if keyed else {})
+        }
+        for i in range(count)
+    ]
+
+
+def send(transport, batch):
+    async def run():
+        try:
+            return await transport.send_many(batch)
+        finally:
+            await transport.close()
+    
+    return asyncio.run(run())
+
+
+def fast_retries():
+    return RetryPolicy(max_retries=10, base_delay=0.001, max_delay=0.01)
+
+
+def test_shared_bucket_paces_all_holders_together(shared_db):
+    # Two processes' buckets with the same name draw from one budget
+    buckets = [SharedTokenBucket("test:shared", rate=20, capacity=1) for _ in range(2)]
+    
+    async def drain():
+        started_at = time.monotonic()
+        await asyncio.gather(*(buckets[i % 2].acquire() for i in range(10)))
+        return time.monotonic() - started_at
+    
+    elapsed = asyncio.run(drain())
+    assert 0.4 <= elapsed < 1.0  # first token free, then 9 at 20/s
+
+
+def test_shared_bucket_falls_back_when_database_is_down(monkeypatch):
+    bucket = SharedTokenBucket("test:down", rate=1000, fallback=TokenBucket(1000))
+    calls = []
+    
+    def unavailable(tokens):
+        calls.append(tokens)
+        raise ConnectionError("database down")
+    
+    monkeypatch.setattr(bucket, "_reserve", unavailable)
+    
+    async def acquire_many():
+        for _ in range(5):
+            await bucket.acquire()
+    
+    asyncio.run(acquire_many())
+    assert len(calls) == 1  # not retried until FALLBACK_SECONDS pass
+
+
+def test_fake_api_rate_limits_per_key(fake_api):
+    url = fake_api(rate_limit=2)
+    statuses = [
+        httpx.post(f"{url}/emails", json=messages(1)[0], headers={"Authorization": "Bearer a"}).status_code
+        for _ in range(3)
+    ]
+    other_key = httpx.post(f"{url}/emails", json=messages(1)[0], headers={"Authorization": "Bearer b"})
+    
+    assert statuses == [200, 200, 429]
+    assert other_key.status_code == 200
+
+
+def test_resend_transport_batches_within_the_shared_limit(shared_db, fake_api):
+    url = fake_api(rate_limit=20)
+    transports = [
+        ResendTransport(api_key="test-key", base_url=url, rate_per_second=20, batch_max=10)
+        for _ in range(3)
+    ]
+    
+    async def send_all():
+        try:
+            return await asyncio.gather(*(transport.send_many(messages(50)) for transport in transports))
+        finally:
+            for transport in transports:
+                await transport.close()
+    
+    results = [result for batch in asyncio.run(send_all()) for result in batch]
+    
+    assert len(results) == 150 and all(result['success'] for result in results)
+    assert stats(url) == {'requests': 15, 'emails': 150, 'rate_limited': 0, 'failed': 0, 'replayed': 0}
+
+
+def test_resend_transport_retries_server_errors(shared_db, fake_api):
+    url = fake_api(fail_rate=0.5)
+    transport = ResendTransport(api_key="test-key", base_url=url, rate_per_second=1000, retry_policy=fast_retries())
+    
+    results = send(transport, messages(20))
+    assert all(result['success'] for result in results)
+    assert stats(url)['emails'] == 20
+
+
+@pytest.mark.parametrize("batch_max", [1, 5])
+def test_retry_after_lost_response_does_not_resend(shared_db, fake_api, batch_max):
+    # The provider accepts every other request but the 500 hides it; the retry
+    # carries the same Idempotency-Key and is answered from the stored response
+    random.seed(7)
+    url = fake_api(lost_rate=0.5)
+    transport = ResendTransport(
+        api_key="test-key", base_url=url, rate_per_second=1000, batch_max=batch_max, retry_policy=fast_retries()
+    )
+    
+    results = send(transport, messages(20, keyed=True))
+    
+    counters = stats(url)
+    assert all(result['success'] for result in results)
+    assert counters['failed'] > 0 and counters['replayed'] == counters['failed']
+    assert counters['emails'] == 20
+
+
+def test_key_accepted_with_another_payload_counts_as_sent(shared_db, fake_api):
+    url = fake_api()
+    message = messages(1, keyed=True)[0]
+    first = {k: v for k, v in message.items() if k != 'idempotency_key'}
+    httpx.post(
+        f"{url}/emails", json={**first, 'text': 'rendered earlier'},
+        headers={"Authorization": "Bearer test-key", "Idempotency-Key": message['idempotency_key']}
+    )
+    
+    transport = ResendTransport(api_key="test-key", base_url=url, rate_per_second=1000)
+    results = send(transport, [message])
+    
+    assert results == [{'success': True, 'message_id': None, 'status': 'sent'}]
+    assert stats(url)['emails'] == 1
+
+
+def test_delivery_keys_are_stable_across_attempts():
+    alert = SimpleNamespace(id=uuid4(), dedup_key="job:up>down:42")
+    legacy = SimpleNamespace(id=uuid4(), dedup_key=None)
+    
+    assert _idempotency_key([alert]) == "job:up>down:42"
+    assert _idempotency_key([legacy]) == str(legacy.id)
+    assert _idempotency_key([alert, legacy]) == _idempotency_key([legacy, alert])
+    assert _idempotency_key([alert, legacy]).startswith("digest:")
@@ -0,0 +1,137 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app import fake_google
+from app.config import settings
+from app.services import google_cert_cache as cert_cache_module
+from app.services.google_cert_cache import GoogleCertCache
+from app.services.google_oauth_service import GoogleOAuthService
+
+
+@pytest.fixture
+def google():
+    """Stand-in certs server publishing max-age=100"""
+    server = fake_google.serve(port=0, max_age=100, audience="test-client-id")
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Monotonic clock of the cert cache, moved by hand"""
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(cert_cache_module, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def fetches(server):
+    return httpx.get(f"{server.url}/stats").json()['cert_fetches']
+
+
+def make_cache(server, **options):
+    return GoogleCertCache(f"{server.url}/oauth2/v1/certs", default_max_age=10, **options)
+
+
+def run(cache, *steps):
+    """Run coroutine factories in order on one loop, then close the cache"""
+    async def main():
+        try:
+            return [await step() for step in steps]
+        finally:
+            await cache.close()
+    
+    return asyncio.run(main())
+
+
+def test_certs_are_cached_for_max_age(google, clock):
+    cache = make_cache(google, refresh_margin=0)
+    
+    async def later():
+        clock.now += 99
+        return await cache.get_certs()
+    
+    async def expired():
+        clock.now += 1
+        return await cache.get_certs()
+    
+    first, cached, refetched = run(cache, cache.get_certs, later, expired)
+    
+    assert first == cached == refetched == google.keys.certs
+    assert cache._expires_at == clock.now + 100
+    assert fetches(google) == 2
+
+
+def test_refresh_margin_serves_cached_certs_and_refreshes_in_background(google, clock):
+    cache = make_cache(google, refresh_margin=0.1)
+    
+    async def near_expiry():
+        clock.now += 95
+        certs = await cache.get_certs()
+        fetched_before_refresh = fetches(google)
+        await cache._refresh_task
+        return certs, fetched_before_refresh
+    
+    _, (certs, fetched_before_refresh) = run(cache, cache.get_certs, near_expiry)
+    
+    assert certs == google.keys.certs
+    assert fetched_before_refresh == 1  # the caller did not wait for the network
+    assert fetches(google) == 2
+    assert cache._expires_at == clock.now + 100
+
+
+def test_unknown_kid_refetches_at_most_once_per_interval(google, clock):
+    cache = make_cache(google, min_refetch_interval=60)
+    
+    async def rotated_soon():
+        clock.now += 30
+        new_kid = google.keys.rotate()
+        return new_kid, await cache.get_certs(new_kid)
+    
+    async def unknown_again():
+        return await cache.get_certs("not-a-published-kid")
+    
+    async def after_interval():
+        clock.now += 31
+        return await cache.get_certs(new_kid)
+    
+    _, (new_kid, too_soon), _ = run(cache, cache.get_certs, rotated_soon, unknown_again)
+    assert new_kid not in too_soon  # within min_refetch_interval of the last fetch
+    assert fetches(google) == 1
+    
+    certs, = run(cache, after_interval)
+    assert new_kid in certs
+    assert fetches(google) == 2
+    
+    run(cache, unknown_again)
+    assert fetches(google) == 2  # rate limited again right after that fetch
+
+
+def test_google_login_token_verifies_against_stand_in(google, clock, monkeypatch):
+    monkeypatch.setattr(settings, "GOOGLE_CLIENT_ID", "test-client-id")
+    cache = make_cache(google)
+    monkeypatch.setattr("app.services.google_oauth_service.google_cert_cache", cache)
+    token = httpx.get(f"{google.url}/token", params={'email': 'ada@example.com'}).json()['id_token']
+    
+    async def verify():
+        return await GoogleOAuthService.verify_google_token(token)
+    
+    async def verify_after_rotation():
+        google.keys.rotate()
+        clock.now += 61  # past min_refetch_interval, so the new kid is fetched
+        rotated = google.keys.mint("test-client-id", "ada@example.com")
+        return await GoogleOAuthService.verify_google_token(rotated)
+    
+    idinfo, rotated_info = run(cache, verify, verify_after_rotation)
+    
+    assert idinfo['email'] == rotated_info['email'] == 'ada@example.com'
+    assert idinfo['aud'] == 'test-client-id'
+    
+    async def wrong_audience():
+        return await GoogleOAuthService.verify_google_token(google.keys.mint("another-client", "ada@example.com"))
+    
+    assert run(cache, wrong_audience) == [None]
@@ -0,0 +1,85 @@
+import threading
+import time
+
+import pytest
+
+from app.probes.scheduler import HostScheduler, host_key
+
+
+class ProbeLog:
+    """Probe factory recording start times and the peak concurrency per host"""
+    
+    def __init__(self, seconds=0.05):
+        self.seconds = seconds
+        self.starts = []
+        self.running = {}
+        self.peak = {}
+        self.peak_total = 0
+        self._lock = threading.Lock()
+    
+    def probe(self, host, value=None):
+        def run():
+            with self._lock:
+                self.starts.append((host, time.monotonic()))
+                self.running[host] = self.running.get(host, 0) + 1
+                self.peak[host] = max(self.peak.get(host, 0), self.running[host])
+                self.peak_total = max(self.peak_total, sum(self.running.values()))
+            time.sleep(self.seconds)
+            with self._lock:
+                self.running[host] -= 1
+            return value
+        return host, run
+    
+    def gaps(self, host):
+        times = [at for name, at in self.starts if name == host]
+        return [later - earlier for earlier, later in zip(times, times[1:])]
+
+
+def test_host_key_is_the_lowercased_hostname():
+    assert host_key("https://API.Example.com:8443/health?x=1") == "api.example.com"
+
+
+def test_results_come_back_in_task_order():
+    log = ProbeLog(seconds=0.01)
+    tasks = [log.probe(host, value=i) for i, host in enumerate(["a", "b", "a", "c", "b"])]
+    
+    futures = HostScheduler(max_concurrency=4, per_host_concurrency=2, min_spacing_seconds=0).run(tasks)
+    
+    assert [future.result() for future in futures] == [0, 1, 2, 3, 4]
+
+
+def test_per_host_and_overall_caps_hold():
+    log = ProbeLog()
+    tasks = [log.probe("busy.example") for _ in range(8)] + [log.probe(f"h{i}.example") for i in range(6)]
+    
+    HostScheduler(max_concurrency=4, per_host_concurrency=2, min_spacing_seconds=0).run(tasks)
+    
+    assert log.peak["busy.example"] == 2
+    assert log.peak_total == 4
+
+
+def test_probes_to_a_host_are_spaced():
+    log = ProbeLog(seconds=0.01)
+    tasks = [log.probe("slow.example") for _ in range(4)] + [log.probe("other.example")]
+    
+    started_at = time.monotonic()
+    HostScheduler(max_concurrency=8, per_host_concurrency=4, min_spacing_seconds=0.1).run(tasks)
+    
+    assert all(gap >= 0.095 for gap in log.gaps("slow.example"))
+    # The other host is not queued behind the spaced one
+    other_start = next(at for host, at in log.starts if host == "other.example")
+    assert other_start - started_at < 0.05
+
+
+def test_probe_exception_stays_on_its_future():
+    def broken():
+        raise ConnectionError("refused")
+    
+    log = ProbeLog(seconds=0)
+    futures = HostScheduler(max_concurrency=2, per_host_concurrency=1, min_spacing_seconds=0).run(
+        [("a", broken), log.probe("a", value="ok")]
+    )
+    
+    with pytest.raises(ConnectionError):
+        futures[0].result()
+    assert futures[1].result() == "ok"
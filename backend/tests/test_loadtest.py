@@ -0,0 +1,24 @@
+from app.loadtest import percentile, report, summarize
+
+
+def test_percentiles_use_the_nearest_rank():
+    latencies = [i / 1000 for i in range(1, 101)]
+    assert [percentile(latencies, share) for share in (0.5, 0.95, 0.99)] == [0.05, 0.095, 0.099]
+
+
+def test_summary_is_compared_with_a_baseline(capsys):
+    results = {
+        "/jobs": {'latencies': [0.1, 0.2, 0.3, 0.4], 'errors': []},
+        "/reports/": {'latencies': [], 'errors': [1.0]},
+    }
+    summary = summarize(results, duration=2)
+    assert summary["/jobs"] == {'ok': 4, 'errors': 0, 'per_second': 2.0, 'p50': 200.0, 'p95': 400.0, 'p99': 400.0}
+    assert summary["/reports/"]['p99'] is None
+    
+    baseline = {"/jobs": {'ok': 2, 'errors': 3, 'per_second': 1.0, 'p50': 400.0, 'p95': 800.0, 'p99': 1000.0}}
+    report(summary, baseline)
+    
+    jobs_line, reports_line = capsys.readouterr().out.splitlines()
+    assert "2.0/s vs 1.0/s (+100%)" in jobs_line and "0 errors vs 3" in jobs_line
+    assert "p50 200.0ms vs 400.0ms (-50%)" in jobs_line and "p99 400.0ms vs 1000.0ms (-60%)" in jobs_line
+    assert reports_line == "❌ /reports/: no successful requests, 1 errors"
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.config import settings
+from app.routes.metrics import verify_metrics_access
+from app.services.metrics_service import MetricsService
+
+
+def scrape(client="10.0.0.7", authorization=None):
+    headers = [(b"authorization", authorization.encode())] if authorization else []
+    request = Request({'type': 'http', 'method': 'GET', 'path': '/metrics', 'headers': headers, 'client': (client, 40000)})
+    try:
+        asyncio.run(verify_metrics_access(request))
+        return 200
+    except HTTPException as e:
+        return e.status_code
+
+
+@pytest.fixture
+def metrics_token(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "s3cret")
+
+
+@pytest.fixture
+def fresh_snapshot(monkeypatch):
+    monkeypatch.setattr(MetricsService, "_snapshot", None)
+    monkeypatch.setattr(MetricsService, "_snapshot_expires_at", 0.0)
+
+
+def test_without_a_token_only_localhost_may_scrape(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "")
+    
+    assert scrape(client="127.0.0.1") == 200
+    assert scrape(client="::1") == 200
+    assert scrape(client="203.0.113.9") == 403
+    assert scrape(client="172.18.0.1", authorization="Bearer anything") == 403
+
+
+def test_token_is_required_when_configured(metrics_token):
+    assert scrape(authorization="Bearer s3cret") == 200
+    assert scrape(authorization="bearer s3cret") == 200
+    assert scrape(client="127.0.0.1") == 401
+    assert scrape(authorization="Bearer wrong") == 401
+    assert scrape(authorization="Basic s3cret") == 401
+
+
+def test_snapshot_is_reused_within_its_ttl(run_async, monkeypatch, fresh_snapshot):
+    queries = []
+    original = MetricsService.get_queue_depths
+    
+    async def counting_queue_depths(db):
+        queries.append(1)
+        return await original(db)
+    
+    monkeypatch.setattr(MetricsService, "get_queue_depths", staticmethod(counting_queue_depths))
+    monkeypatch.setattr(settings, "METRICS_SNAPSHOT_TTL_SECONDS", 60)
+    
+    first = run_async(MetricsService.render)
+    second = run_async(MetricsService.render)
+    
+    assert len(queries) == 1
+    assert b'pingdaemon_queue_depth{queue="email",status="pending"} 0.0' in first
+    assert b"pingdaemon_queue_depth" in second
+    
+    monkeypatch.setattr(MetricsService, "_snapshot_expires_at", 0.0)
+    run_async(MetricsService.render)
+    assert len(queries) == 2
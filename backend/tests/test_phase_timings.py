@@ -0,0 +1,85 @@
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import settings
+from app.models import HealthLog, HealthLogSpan
+from app.probes.http import finish_timings, pack_timings
+from app.services.check_history_service import CheckHistoryService
+from app.services.health_service import HealthService
+
+
+def hop(seconds):
+    return SimpleNamespace(elapsed=timedelta(seconds=seconds))
+
+
+def test_ttfb_and_transfer_are_derived_from_the_hops():
+    response = SimpleNamespace(elapsed=timedelta(seconds=0.1), history=[hop(0.05)])
+    measured = {'dns': 0.01, 'connect': 0.02, 'tls': 0.03}
+    
+    timings = finish_timings(measured, total_seconds=0.2, response=response)
+    
+    assert timings == {'dns': 10.0, 'connect': 20.0, 'tls': 30.0, 'ttfb': 90.0, 'transfer': 50.0}
+
+
+def test_phases_a_failed_probe_never_reached_are_none():
+    assert finish_timings({'dns': 0.004}, total_seconds=1.0) == {
+        'dns': 4.0, 'connect': None, 'tls': None, 'ttfb': None, 'transfer': None
+    }
+
+
+def test_timings_are_packed_as_whole_milliseconds_in_phase_order():
+    assert pack_timings({'dns': 0.4, 'connect': 1.6, 'tls': None, 'ttfb': 99.5, 'transfer': 3}) == [0, 2, None, 100, 3]
+    assert pack_timings(None) is None
+
+
+def test_probe_reports_where_the_time_went(http_server):
+    def slow_headers():
+        time.sleep(0.1)
+        return b"ok"
+    
+    def slow_body():
+        yield b"partial "
+        time.sleep(0.1)
+        yield b"healthy"
+    
+    base = http_server({"/think": (200, {}, slow_headers), "/stream": (200, {}, slow_body())})
+    
+    thinking = HealthService.check_url_health(f"{base}/think")
+    streaming = HealthService.check_url_health(f"{base}/stream", assertions=[{'type': 'contains', 'value': 'healthy'}])
+    
+    assert thinking['timings']['ttfb'] >= 95 and thinking['timings']['transfer'] < 50
+    assert thinking['timings']['dns'] == 0.0  # IP address, no lookup
+    assert thinking['timings']['connect'] is not None and thinking['timings']['tls'] is None
+    assert streaming['is_healthy'] and streaming['timings']['transfer'] >= 95
+
+
+def test_full_rows_store_packed_timings(db, make_job, monkeypatch):
+    monkeypatch.setattr(settings, "HEALTH_LOG_STORAGE_MODE", "full")
+    job = make_job()
+    timings = {'dns': 1.2, 'connect': 3.0, 'tls': 12.7, 'ttfb': 80.0, 'transfer': 4.0}
+    
+    CheckHistoryService.record_check(db, job.id, {
+        'is_healthy': True, 'status_code': 200, 'error_message': None, 'response_time': 101.0, 'timings': timings
+    })
+    
+    assert db.query(HealthLog.phase_timings).scalar() == [1, 3, 13, 80, 4]
+
+
+def test_spans_keep_per_phase_sums(db, make_job, monkeypatch):
+    monkeypatch.setattr(settings, "HEALTH_LOG_STORAGE_MODE", "rle")
+    monkeypatch.setattr(settings, "RLE_LATENCY_ANOMALY_FACTOR", 3.0)
+    job = make_job()
+    for ttfb in (80.0, 90.0, 100.0):
+        CheckHistoryService.record_check(db, job.id, {
+            'is_healthy': True, 'status_code': 200, 'error_message': None, 'response_time': ttfb + 10,
+            'timings': {'dns': 1.0, 'connect': 2.0, 'tls': None, 'ttfb': ttfb, 'transfer': 7.0}
+        })
+    
+    # The first check gets a full row, the repeats collapse into a span
+    assert db.query(HealthLog.phase_timings).scalar() == [1, 2, None, 80, 7]
+    span = db.query(HealthLogSpan).one()
+    assert span.check_count == span.phase_timing_count == 2
+    assert span.phase_timing_sums == pytest.approx([2.0, 4.0, 0.0, 190.0, 14.0])
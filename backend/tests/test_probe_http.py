@@ -0,0 +1,101 @@
+import gzip
+import time
+
+import pytest
+import requests
+
+from app.probes.http import fetch, iter_body, new_probe_session
+
+
+def redirect_chain(hops, target=b"landed"):
+    """/0 → /1 → ... → /<hops> answering `target`; hop 1 has a path-relative Location"""
+    routes = {
+        f"/{i}": (302, {"Location": f"{i + 1}" if i == 1 else f"/{i + 1}"}, b"redirect body")
+        for i in range(hops)
+    }
+    routes[f"/{hops}"] = (200, {}, target)
+    return routes
+
+
+@pytest.fixture
+def session():
+    session = new_probe_session()
+    yield session
+    session.close()
+
+
+def test_follows_redirects_up_to_the_cap(http_server, session):
+    base = http_server(redirect_chain(3))
+    
+    response = fetch(session, f"{base}/0", timeout=5, max_redirects=3)
+    
+    assert response.status_code == 200 and response.content == b"landed"
+    assert [hop.status_code for hop in response.history] == [302, 302, 302]
+    assert response.url == f"{base}/3"
+
+
+def test_stops_after_the_cap_without_requesting_further(http_server, session):
+    base = http_server(redirect_chain(5))
+    
+    with pytest.raises(requests.exceptions.TooManyRedirects) as exceeded:
+        fetch(session, f"{base}/0", timeout=5, max_redirects=2)
+    
+    assert "Exceeded 2 redirects" in str(exceeded.value)
+    assert http_server.requests == ["/0", "/1", "/2"]
+
+
+def test_zero_cap_rejects_the_first_redirect(http_server, session):
+    base = http_server(redirect_chain(1))
+    
+    with pytest.raises(requests.exceptions.TooManyRedirects):
+        fetch(session, f"{base}/0", timeout=5, max_redirects=0)
+    assert http_server.requests == ["/0"]
+
+
+def test_redirect_loop_is_capped(http_server, session):
+    base = http_server({"/loop": (301, {"Location": "/loop"}, b"")})
+    
+    with pytest.raises(requests.exceptions.TooManyRedirects):
+        fetch(session, f"{base}/loop", timeout=5, max_redirects=5)
+    assert len(http_server.requests) == 6
+
+
+def test_absolute_location_to_another_host_is_followed(http_server, session):
+    other = http_server({"/": (200, {}, b"other host")})
+    base = http_server({"/away": (307, {"Location": f"{other}/"}, b"")})
+    
+    response = fetch(session, f"{base}/away", timeout=5, max_redirects=1)
+    
+    assert response.content == b"other host"
+    assert len(response.history) == 1
+
+
+def test_body_reads_stop_at_the_deadline_when_the_server_drips(http_server, session):
+    def drip():
+        for _ in range(100):
+            yield b"x"
+            time.sleep(0.05)
+    
+    base = http_server({"/drip": (200, {}, drip())})
+    response = fetch(session, f"{base}/drip", timeout=5, max_redirects=0)
+    
+    started_at = time.time()
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        for _ in iter_body(response, 1024 * 1024, deadline=started_at + 0.3):
+            pass
+    
+    # Each read returns what has arrived instead of waiting for a full chunk
+    assert time.time() - started_at < 0.5
+
+
+def test_body_is_decoded_and_cut_at_the_limit(http_server, session):
+    base = http_server({
+        "/gzip": (200, {"Content-Encoding": "gzip"}, gzip.compress(b"healthy" * 1000)),
+        "/stream": (200, {}, iter([b"first ", b"second"])),
+    })
+    
+    gzipped = fetch(session, f"{base}/gzip", timeout=5, max_redirects=0)
+    streamed = fetch(session, f"{base}/stream", timeout=5, max_redirects=0)
+    
+    assert b"".join(iter_body(gzipped, 20, time.time() + 5)) == b"healthy" * 2 + b"healthy"[:6]
+    assert b"".join(iter_body(streamed, 1024, time.time() + 5)) == b"first second"
@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from app.config import settings
+from app.services import probe_service
+from app.services.probe_service import ProbeService
+
+
+class SlowProbe:
+    """Blocking probe that counts its calls and sleeps `seconds`"""
+    
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.calls = 0
+        self._lock = threading.Lock()
+    
+    def __call__(self, target):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.seconds)
+        return {'target': target}
+
+
+@pytest.fixture(autouse=True)
+def empty_in_flight():
+    probe_service._in_flight.clear()
+    yield
+    probe_service._in_flight.clear()
+
+
+def test_concurrent_callers_share_one_probe():
+    probe = SlowProbe(0.2)
+    
+    async def burst():
+        return await asyncio.gather(*(
+            ProbeService._run_coalesced(("test-url", "https://a.example"), probe, "a") for _ in range(5)
+        ))
+    
+    results = asyncio.run(burst())
+    
+    assert probe.calls == 1
+    assert results == [{'target': 'a'}] * 5
+    assert probe_service._in_flight == {}
+
+
+def test_different_keys_probe_separately():
+    probe = SlowProbe(0.05)
+    
+    async def burst():
+        return await asyncio.gather(
+            ProbeService._run_coalesced(("test-url", "https://a.example"), probe, "a"),
+            ProbeService._run_coalesced(("test-url", "https://b.example"), probe, "b"),
+        )
+    
+    assert asyncio.run(burst()) == [{'target': 'a'}, {'target': 'b'}]
+    assert probe.calls == 2
+
+
+def test_over_budget_caller_gets_504_while_probe_finishes(monkeypatch):
+    monkeypatch.setattr(settings, "PROBE_REQUEST_BUDGET_SECONDS", 0.1)
+    probe = SlowProbe(0.3)
+    key = ("check-now", "job-1")
+    
+    async def impatient_then_joined():
+        with pytest.raises(HTTPException) as timed_out:
+            await ProbeService._run_coalesced(key, probe, "job-1")
+        # The probe was shielded, so it is still in flight for the next caller
+        assert key in probe_service._in_flight
+        monkeypatch.setattr(settings, "PROBE_REQUEST_BUDGET_SECONDS", 5)
+        result = await ProbeService._run_coalesced(key, probe, "job-1")
+        return timed_out.value, result
+    
+    error, result = asyncio.run(impatient_then_joined())
+    
+    assert error.status_code == 504
+    assert result == {'target': 'job-1'}
+    assert probe.calls == 1
+    assert probe_service._in_flight == {}
+
+
+def test_failed_probe_is_not_reused():
+    calls = []
+    
+    def flaky(target):
+        calls.append(target)
+        if len(calls) == 1:
+            raise RuntimeError("connection reset")
+        return {'target': target}
+    
+    async def twice():
+        with pytest.raises(RuntimeError):
+            await ProbeService._run_coalesced(("test-url", "x"), flaky, "x")
+        return await ProbeService._run_coalesced(("test-url", "x"), flaky, "x")
+    
+    assert asyncio.run(twice()) == {'target': 'x'}
+    assert len(calls) == 2
+
+
+def test_probes_beyond_the_pool_size_wait_for_a_slot(monkeypatch):
+    monkeypatch.setattr(probe_service, "_probe_executor", ThreadPoolExecutor(max_workers=2))
+    probe = SlowProbe(0.1)
+    
+    async def burst():
+        return await asyncio.gather(*(
+            ProbeService._run_coalesced(("test-url", f"https://{i}.example"), probe, i) for i in range(4)
+        ))
+    
+    started_at = time.perf_counter()
+    assert asyncio.run(burst()) == [{'target': i} for i in range(4)]
+    
+    # Four probes on two threads run in two rounds
+    assert time.perf_counter() - started_at >= 0.2
+    assert probe.calls == 4
+
+
+def test_check_now_on_a_deleted_job_is_404(session_factory, monkeypatch):
+    monkeypatch.setattr(probe_service, "SessionLocal", session_factory)
+    
+    job_id = uuid4()
+    
+    async def check_missing_job():
+        # The second caller waits on the first one's probe
+        return await asyncio.gather(
+            ProbeService.check_job_now(job_id), ProbeService.check_job_now(job_id), return_exceptions=True
+        )
+    
+    errors = asyncio.run(check_missing_job())
+    
+    assert len(errors) == 2 and all(isinstance(error, HTTPException) and error.status_code == 404 for error in errors)
@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models import HealthLog, HealthLogSpan
+from app.services.reports_service import ReportsService
+
+STEP = timedelta(minutes=5)
+TIMINGS = [1, 2, 3, 40, 5]
+
+
+def run_of_checks():
+    """
+    Twelve checks five minutes apart, six healthy then six failing, placed so a
+    4-hour window boundary of the response time history falls inside the healthy run
+    """
+    next_hour = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    boundary = next_hour - timedelta(hours=12)
+    start = boundary - 3.5 * STEP
+    healthy = [(start + i * STEP, True, 200, None, 100.0) for i in range(6)]
+    failing = [(start + i * STEP, False, 503, "HTTP 503", 40.0) for i in range(6, 12)]
+    return [healthy, failing]
+
+
+def store_full(db, job, runs):
+    for run in runs:
+        for checked_at, is_healthy, status_code, error_message, response_time in run:
+            db.add(HealthLog(
+                job_id=job.id, checked_at=checked_at, is_healthy=is_healthy, status_code=status_code,
+                error_message=error_message, response_time=response_time, phase_timings=TIMINGS
+            ))
+    db.commit()
+
+
+def store_rle(db, job, runs):
+    """What RLE storage keeps: the first check of each run as a row, the rest as one span per UTC hour"""
+    for (checked_at, is_healthy, status_code, error_message, response_time), *rest in runs:
+        db.add(HealthLog(
+            job_id=job.id, checked_at=checked_at, is_healthy=is_healthy, status_code=status_code,
+            error_message=error_message, response_time=response_time, phase_timings=TIMINGS
+        ))
+        by_hour = {}
+        for check in rest:
+            by_hour.setdefault(check[0].replace(minute=0, second=0, microsecond=0), []).append(check)
+        for checks in by_hour.values():
+            latencies = [check[4] for check in checks]
+            db.add(HealthLogSpan(
+                job_id=job.id, is_healthy=is_healthy, status_code=status_code, error_message=error_message,
+                check_count=len(checks), first_checked_at=checks[0][0], last_checked_at=checks[-1][0],
+                response_time_count=len(latencies), response_time_sum=sum(latencies),
+                phase_timing_sums=[float(value * len(checks)) for value in TIMINGS], phase_timing_count=len(checks),
+                is_open=False
+            ))
+    db.commit()
+
+
+@pytest.fixture
+def users(db, make_user, make_job):
+    runs = run_of_checks()
+    full_user, rle_user = make_user(), make_user()
+    store_full(db, make_job(owner=full_user), runs)
+    store_rle(db, make_job(owner=rle_user), runs)
+    return full_user, rle_user
+
+
+@pytest.mark.parametrize("report", [
+    "get_uptime_history",
+    "get_response_time_history",
+    "get_phase_timing_history",
+    "get_incidents_by_day",
+    "get_performance_metrics",
+])
+def test_reports_match_between_full_rows_and_spans(run_async, users, report):
+    full_user, rle_user = users
+    full = run_async(getattr(ReportsService, report), full_user)
+    rle = run_async(getattr(ReportsService, report), rle_user)
+    assert full == rle
+
+
+def test_span_checks_are_counted(run_async, users):
+    _, rle_user = users
+    metrics = run_async(ReportsService.get_performance_metrics, rle_user)
+    assert metrics.checksPerformed == 12
+    assert metrics.totalIncidents == 6
+    assert metrics.avgUptime == "50.0%"
+    assert metrics.avgResponseTime == "70ms"
+    
+    history = run_async(ReportsService.get_response_time_history, rle_user)
+    # 4 healthy checks before the boundary, 2 healthy and 6 failing after it
+    assert sorted(item.responseTime for item in history if item.responseTime) == [55.0, 100.0]
@@ -0,0 +1,61 @@
+import asyncio
+
+from passlib.context import CryptContext
+from sqlalchemy import select
+
+from app.config import settings
+from app.models.user import User
+from app.services.auth_service import AuthService
+from app.utils.security import pwd_context, verify_and_update_password, verify_and_update_password_async
+
+
+def rounds(hashed):
+    return int(hashed.split("$")[2])
+
+
+def cheap_hash(password, cost=4):
+    return CryptContext(schemes=["bcrypt"], bcrypt__rounds=cost).hash(password)
+
+
+def test_hash_with_other_rounds_is_rehashed_on_verify():
+    stored = cheap_hash("correct horse")
+    
+    valid, new_hash = verify_and_update_password("correct horse", stored)
+    
+    assert valid and rounds(new_hash) == settings.BCRYPT_ROUNDS
+    assert verify_and_update_password("correct horse", new_hash) == (True, None)
+    assert verify_and_update_password("wrong", stored) == (False, None)
+
+
+def test_higher_rounds_than_configured_are_rehashed_too():
+    stored = cheap_hash("correct horse", cost=settings.BCRYPT_ROUNDS + 1)
+    
+    valid, new_hash = verify_and_update_password("correct horse", stored)
+    
+    assert valid and rounds(new_hash) == settings.BCRYPT_ROUNDS
+
+
+def test_login_stores_the_rehashed_password(db, make_user, run_async):
+    make_user(email="legacy@example.com", hashed_password=cheap_hash("pw"))
+    
+    assert run_async(AuthService.authenticate_user, "legacy@example.com", "pw") is not None
+    
+    stored = db.execute(select(User.hashed_password).where(User.email == "legacy@example.com")).scalar_one()
+    assert rounds(stored) == settings.BCRYPT_ROUNDS
+
+
+def test_verification_runs_off_the_event_loop():
+    stored = pwd_context.hash("pw")
+    
+    async def verify_while_ticking():
+        ticks = 0
+        verification = asyncio.ensure_future(verify_and_update_password_async("pw", stored))
+        while not verification.done():
+            await asyncio.sleep(0.005)
+            ticks += 1
+        return verification.result(), ticks
+    
+    (valid, new_hash), ticks = asyncio.run(verify_while_ticking())
+    
+    assert valid and new_hash is None
+    assert ticks > 5  # the loop kept running during the bcrypt call
@@ -0,0 +1,61 @@
+import pytest
+from prometheus_client import REGISTRY
+
+from app.models import Job, HealthLog
+from app.services import sweep_service
+from app.services.health_service import HealthService
+from app.utils.urls import normalize_url
+from app.workers import checker
+
+
+@pytest.mark.parametrize("url, normalized", [
+    ("HTTPS://Example.COM/health", "https://example.com/health"),
+    ("https://example.com:443/health", "https://example.com/health"),
+    ("http://example.com:8080/health", "http://example.com:8080/health"),
+    ("https://example.com./health#section", "https://example.com/health"),
+    ("https://example.com", "https://example.com/"),
+    ("https://example.com/Health?B=2&a=1", "https://example.com/Health?B=2&a=1"),
+    ("http://[::1]:80/", "http://[::1]/"),
+    ("https://user:pw@Example.com/", "https://user:pw@example.com/"),
+    ("https://example.com:99999/", "https://example.com:99999/"),
+])
+def test_normalize_url(url, normalized):
+    assert normalize_url(url) == normalized
+
+
+def test_jobs_with_different_assertions_are_probed_separately():
+    plain = Job(url="https://example.com/", assertions=None)
+    same = Job(url="https://EXAMPLE.com", assertions=None)
+    asserting = Job(url="https://example.com/", assertions=[{'type': 'contains', 'value': 'ok'}])
+    
+    targets = HealthService.group_by_probe_target([plain, same, asserting])
+    
+    assert sorted(len(jobs) for jobs in targets.values()) == [1, 2]
+
+
+def test_sweep_probes_each_target_once_and_checks_every_job(db, pg_engine, session_factory, make_job, http_server,
+                                                           monkeypatch):
+    monkeypatch.setattr(sweep_service, "engine", pg_engine)
+    monkeypatch.setattr(checker, "SessionLocal", session_factory)
+    base = http_server({"/": (200, {}, b"all ok"), "/other": (200, {}, b"fine")})
+    host = base.replace("127.0.0.1", "LOCALHOST").replace("http://", "HTTP://")
+    plain_jobs = [
+        make_job(url=url, interval=60, current_status="healthy")
+        for url in (f"{base}/", f"{base}", f"{base}/#top", f"{host}/")
+    ]
+    make_job(url=f"{base}/other", interval=60, current_status="healthy")
+    make_job(url=f"{base}/", interval=60, current_status="healthy", assertions=[{'type': 'contains', 'value': 'ok'}])
+    shared_before = REGISTRY.get_sample_value("pingdaemon_shared_checks_total") or 0.0
+    
+    result = checker.check_jobs_by_interval.run(60)
+    
+    assert result['success'] and result['total_jobs_checked'] == 6
+    # "/" twice (plain and asserting), localhost once, "/other" once
+    assert result['probes_sent'] == 4
+    assert sorted(http_server.requests) == ["/", "/", "/", "/other"]
+    assert REGISTRY.get_sample_value("pingdaemon_shared_checks_total") - shared_before == 2
+    assert db.query(HealthLog).count() == 6
+    assert all(check['success'] for check in result['results'])
+    assert sum(1 for check in result['results'] if check['shared_probe']) == 3
+    db.expire_all()
+    assert all(db.get(Job, job.id).last_checked_at is not None for job in plain_jobs)
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import select, update
+
+from app.models import Job
+from app.models.sweep_run import SweepRun
+from app.services import sweep_service
+from app.services.sweep_service import SweepService
+from app.workers import checker
+from app.workers.checker import _published_at, check_jobs_by_interval
+
+
+@pytest.fixture
+def sweep_db(pg_engine, session_factory, monkeypatch):
+    """Point the sweep lock and the checker task at the test database"""
+    monkeypatch.setattr(sweep_service, "engine", pg_engine)
+    monkeypatch.setattr(checker, "SessionLocal", session_factory)
+
+
+def sweeps(interval, status):
+    return REGISTRY.get_sample_value("pingdaemon_sweeps_total", {'interval': str(interval), 'status': status}) or 0.0
+
+
+def test_sweep_lock_is_exclusive_per_interval(sweep_db):
+    with SweepService.sweep_lock(5) as first:
+        with SweepService.sweep_lock(5) as second, SweepService.sweep_lock(10) as other_interval:
+            assert (first, second, other_interval) == (True, False, True)
+    
+    with SweepService.sweep_lock(5) as again:
+        assert again
+
+
+def test_run_records_drift_duration_and_overrun(db):
+    scheduled_at = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+    started_at = scheduled_at + timedelta(seconds=40)
+    
+    on_time = SweepService.record_run(
+        db, 5, "completed", scheduled_at, started_at, started_at + timedelta(seconds=30), jobs_checked=60, probes_sent=45
+    )
+    assert REGISTRY.get_sample_value("pingdaemon_sweep_probe_dedup_ratio", {'interval': "5"}) == 0.25
+    overran = SweepService.record_run(
+        db, 5, "completed", scheduled_at, scheduled_at, scheduled_at + timedelta(minutes=6), jobs_checked=10, probes_sent=10
+    )
+    
+    assert (on_time.drift_seconds, on_time.duration_seconds, on_time.jobs_per_second) == (40, 30, 2)
+    assert not on_time.overran and overran.overran
+    assert db.scalar(select(SweepRun.probes_sent).where(SweepRun.id == on_time.id)) == 45
+
+
+def test_a_tick_during_a_running_sweep_is_coalesced(db, sweep_db):
+    before = sweeps(15, "coalesced")
+    
+    with SweepService.sweep_lock(15):
+        result = check_jobs_by_interval.run(15)
+    
+    assert result['coalesced'] and result['total_jobs_checked'] == 0
+    assert sweeps(15, "coalesced") == before + 1
+    assert db.scalars(select(SweepRun.status).where(SweepRun.interval_minutes == 15)).all() == ["coalesced"]
+
+
+def test_an_idle_tick_completes_and_is_recorded(db, sweep_db):
+    result = check_jobs_by_interval.run(30)
+    
+    assert result['success'] and not result.get('coalesced')
+    assert result['total_jobs_checked'] == 0 and not result['overran']
+    assert db.scalars(select(SweepRun.status).where(SweepRun.interval_minutes == 30)).all() == ["completed"]
+
+
+def test_published_at_header_gives_the_scheduled_time():
+    published = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+    
+    assert _published_at(SimpleNamespace(headers={'published_at': published.timestamp()})) == published
+    assert _published_at(SimpleNamespace(published_at=published.timestamp())) == published
+    assert _published_at(SimpleNamespace(headers=None)) is None
+
+
+def test_check_lag_counts_overdue_jobs(db, make_job, run_async):
+    fresh = make_job(interval=5)
+    late = make_job(interval=5)
+    make_job(interval=5, is_enabled=False)
+    now = datetime.now(timezone.utc)
+    db.execute(update(Job).where(Job.id == fresh.id).values(last_checked_at=now - timedelta(minutes=1)))
+    db.execute(update(Job).where(Job.id == late.id).values(last_checked_at=now - timedelta(minutes=20)))
+    db.commit()
+    
+    lag = run_async(SweepService.get_check_lag)
+    
+    assert lag[5]['jobs'] == 2 and lag[5]['overdue'] == 1
+    assert 890 < lag[5]['max_seconds'] < 920
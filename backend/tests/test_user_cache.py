@@ -0,0 +1,77 @@
+import time
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from prometheus_client import REGISTRY
+
+from app.models.user import User
+from app.services.auth_service import AuthService
+from app.utils.security import create_access_token
+from app.utils.user_cache import UserCache, user_cache
+
+
+def lookups(result):
+    return REGISTRY.get_sample_value("pingdaemon_user_cache_lookups_total", {'result': result}) or 0.0
+
+
+def user(**fields):
+    return User(id=uuid4(), email=f"{uuid4().hex[:8]}@example.com", is_active=True, **fields)
+
+
+def test_hits_and_misses_are_counted_and_exported():
+    cache = UserCache(max_size=10, ttl_seconds=60)
+    cached = user()
+    hits, misses = lookups("hit"), lookups("miss")
+    
+    assert cache.get(cached.id, None) is None
+    cache.set(cached, None)
+    snapshot = cache.get(cached.id, None)
+    
+    assert snapshot.email == cached.email and snapshot is not cached
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert (lookups("hit") - hits, lookups("miss") - misses) == (1, 1)
+
+
+def test_entry_expires_with_the_token():
+    cache = UserCache(max_size=10, ttl_seconds=60)
+    cached = user()
+    
+    cache.set(cached, int(time.time()) - 1)
+    cache.set(cached, int(time.time()) + 60)
+    
+    assert cache.get(cached.id, int(time.time()) - 1) is None  # expired token never cached
+    assert cache.stats()['size'] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = UserCache(max_size=2, ttl_seconds=60)
+    first, second, third = user(), user(), user()
+    cache.set(first, None)
+    cache.set(second, None)
+    cache.get(first.id, None)
+    
+    cache.set(third, None)
+    
+    assert cache.get(second.id, None) is None
+    assert cache.get(first.id, None) is not None
+    assert cache.evictions == 1
+
+
+def test_cached_user_skips_the_query_until_invalidated(db, make_user, run_async):
+    stored = make_user(email="cached@example.com")
+    user_id = stored.id
+    token = create_access_token({"sub": str(user_id)})
+    user_cache.clear()
+    
+    assert run_async(AuthService.get_current_user, token).email == "cached@example.com"
+    
+    # Gone from the database, but the cached snapshot answers without a query
+    db.delete(stored)
+    db.commit()
+    assert run_async(AuthService.get_current_user, token).id == user_id
+    
+    user_cache.invalidate(user_id)
+    with pytest.raises(HTTPException) as missing:
+        run_async(AuthService.get_current_user, token)
+    assert missing.value.status_code == 401
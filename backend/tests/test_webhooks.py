@@ -0,0 +1,168 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from sqlalchemy import select, update
+
+from app.config import settings
+from app.models.webhook import Webhook, WebhookDelivery, WebhookDeadLetter
+from app.services.webhook_service import WebhookService
+from app.webhooks.dispatcher import WebhookDispatcher
+from app.workers import webhooks as webhook_worker
+from app.workers.webhooks import process_webhook_deliveries
+
+
+@pytest.fixture
+def receiver():
+    """
+    Local webhook endpoint; paths answer receiver.statuses.get(path, 200)
+    after receiver.latency seconds. Requests land in receiver.received.
+    """
+    class Receiver:
+        statuses = {}
+        latency = 0.0
+        received = []
+        running = {}
+        peak = {}
+        lock = threading.Lock()
+    
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            with Receiver.lock:
+                Receiver.received.append((self.path, dict(self.headers), body))
+                Receiver.running[self.path] = Receiver.running.get(self.path, 0) + 1
+                Receiver.peak[self.path] = max(Receiver.peak.get(self.path, 0), Receiver.running[self.path])
+            time.sleep(Receiver.latency)
+            with Receiver.lock:
+                Receiver.running[self.path] -= 1
+            self.send_response(Receiver.statuses.get(self.path, 200))
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    Receiver.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield Receiver
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def make_webhook(db):
+    def make(user, url, **fields):
+        webhook = Webhook(url=url, user_id=user.id, **fields)
+        db.add(webhook)
+        db.commit()
+        return webhook
+    return make
+
+
+@pytest.fixture
+def no_wake(monkeypatch):
+    wakes = []
+    monkeypatch.setattr(WebhookService, "wake_dispatcher", staticmethod(lambda countdown=0: wakes.append(countdown)))
+    return wakes
+
+
+def delivery(url, **fields):
+    return {'url': url, 'kind': "json", 'secret': None, 'payload': {'event': "test"}, **fields}
+
+
+def test_status_change_fans_out_to_active_webhooks_once(db, make_user, make_job, make_webhook, no_wake):
+    user = make_user()
+    job = make_job(owner=user)
+    make_webhook(user, "https://hooks.example/a")
+    make_webhook(user, "https://hooks.example/b", kind="slack")
+    make_webhook(user, "https://hooks.example/off", is_active=False)
+    make_webhook(make_user(), "https://hooks.example/other-user")
+    
+    assert WebhookService.queue_status_change(db, job, "healthy", "unhealthy", "timed out") == 2
+    assert WebhookService.queue_status_change(db, job, "healthy", "unhealthy", "timed out") == 0
+    
+    rows = db.scalars(select(WebhookDelivery)).all()
+    assert len({row.id for row in rows}) == 2
+    assert rows[0].payload['current_status'] == "unhealthy"
+    assert len(no_wake) == 1
+
+
+def test_json_payloads_are_signed(receiver):
+    results = asyncio.run(WebhookDispatcher().deliver_many([delivery(f"{receiver.url}/signed", secret="shh")]))
+    
+    _, headers, body = receiver.received[0]
+    assert results[0]['success']
+    assert headers["X-PingDaemon-Signature"] == "sha256=" + hmac.new(b"shh", body, hashlib.sha256).hexdigest()
+    assert json.loads(body)['event'] == "test"
+
+
+def test_failures_are_classified_for_retry(receiver):
+    receiver.statuses = {"/busy": 503, "/slow-down": 429, "/gone": 404}
+    urls = [f"{receiver.url}/fine", f"{receiver.url}/busy", f"{receiver.url}/slow-down", f"{receiver.url}/gone",
+            "http://127.0.0.1:9/refused"]
+    
+    results = asyncio.run(WebhookDispatcher(timeout=5).deliver_many([delivery(url) for url in urls]))
+    
+    assert [result['success'] for result in results] == [True, False, False, False, False]
+    assert [result.get('retryable') for result in results[1:]] == [True, True, False, True]
+    assert results[3]['status_code'] == 404
+
+
+def test_one_slow_endpoint_gets_only_its_share_of_connections(receiver):
+    receiver.latency = 0.1
+    deliveries = [delivery(f"{receiver.url}/slow") for _ in range(6)] + [delivery(f"{receiver.url}/other")]
+    
+    started_at = time.perf_counter()
+    asyncio.run(WebhookDispatcher(max_concurrency=8, per_endpoint_concurrency=2).deliver_many(deliveries))
+    
+    assert receiver.peak["/slow"] == 2
+    assert time.perf_counter() - started_at >= 0.3  # six requests, two at a time
+
+
+def test_retry_delay_is_jittered_and_capped(monkeypatch):
+    monkeypatch.setattr(settings, "WEBHOOK_RETRY_BASE_SECONDS", 10)
+    monkeypatch.setattr(settings, "WEBHOOK_RETRY_MAX_SECONDS", 60)
+    
+    assert all(5 <= WebhookService.retry_delay(1) <= 10 for _ in range(50))
+    assert all(20 <= WebhookService.retry_delay(3) <= 40 for _ in range(50))
+    assert all(30 <= WebhookService.retry_delay(12) <= 60 for _ in range(50))
+
+
+def test_worker_delivers_retries_and_dead_letters(db, session_factory, make_user, make_job, make_webhook, receiver,
+                                                  no_wake, monkeypatch):
+    monkeypatch.setattr(webhook_worker, "get_db", lambda: iter([session_factory()]))
+    receiver.statuses = {"/down": 503, "/gone": 410}
+    user = make_user()
+    for path in ("/up", "/down", "/gone"):
+        make_webhook(user, f"{receiver.url}{path}")
+    WebhookService.queue_status_change(db, make_job(owner=user), "healthy", "unhealthy")
+    
+    result = process_webhook_deliveries.run(10)
+    
+    assert (result['delivered'], result['retrying'], result['dead_lettered']) == (1, 1, 1)
+    db.expire_all()
+    by_url = {webhook.url: webhook.id for webhook in db.scalars(select(Webhook))}
+    retrying = db.scalars(select(WebhookDelivery).where(WebhookDelivery.webhook_id == by_url[f"{receiver.url}/down"])).one()
+    assert retrying.status == "pending" and retrying.attempts == 1 and retrying.response_status == 503
+    assert retrying.next_attempt_at > datetime.now(timezone.utc)
+    dead = db.scalars(select(WebhookDeadLetter)).one()
+    assert dead.webhook_id == by_url[f"{receiver.url}/gone"] and dead.response_status == 410
+    
+    # The last attempt is dead-lettered too
+    db.execute(update(WebhookDelivery).where(WebhookDelivery.id == retrying.id).values(
+        next_attempt_at=datetime.now(timezone.utc), attempts=retrying.max_attempts - 1
+    ))
+    db.commit()
+    
+    assert process_webhook_deliveries.run(10)['dead_lettered'] == 1
+    assert len(db.scalars(select(WebhookDeadLetter)).all()) == 2